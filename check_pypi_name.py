@@ -1,12 +1,23 @@
 #!/usr/bin/env python3
 import sys
-import requests
+import http.client
 
 def check_package_name(name):
     """Check if a package name is available on PyPI."""
-    url = f"https://pypi.org/project/{name}/"
-    response = requests.get(url)
-    if response.status_code == 404:
+    # A HEAD request only transfers headers; the status code is all we need
+    path = f"/project/{name}/"
+    for _ in range(3):  # PyPI redirects non-normalized names to the canonical URL
+        conn = http.client.HTTPSConnection("pypi.org", timeout=5)
+        try:
+            conn.request("HEAD", path)
+            response = conn.getresponse()
+            status, location = response.status, response.getheader("Location")
+        finally:
+            conn.close()
+        if status not in (301, 302, 307, 308) or not location:
+            break
+        path = location.replace("https://pypi.org", "", 1)
+    if status == 404:
         print(f"✅ Good news! The name '{name}' appears to be available on PyPI.")
         return True
     else:
@@ -17,6 +28,6 @@ if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python check_pypi_name.py <package-name>")
         sys.exit(1)
-    
+
     name = sys.argv[1]
-    check_package_name(name) 
\ No newline at end of file
+    check_package_name(name)
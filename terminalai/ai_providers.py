@@ -5,14 +5,337 @@ It includes implementations for OpenRouter, Gemini, Mistral, and Ollama provider
 
 Note: System detection for command customization is handled in terminalai_cli.py's
 get_system_context() function, which passes the detected OS information to these providers.
+
+All providers share one pooled ``requests.Session`` (see get_shared_session()), and every
+provider exposes an ``aquery()`` coroutine so callers can fan several prompts out
+concurrently with ``asyncio.gather`` instead of waiting on each HTTP round-trip in turn.
 """
-import requests
-from terminalai.config import load_config
 import json
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+import appdirs
+from terminalai.config import load_config, json_dumps, json_loads
+from terminalai.cache import (
+    SemanticCache, is_error_response, load_embedder, DEFAULT_TTL_S, DEFAULT_MAX_ENTRIES
+)
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class HttpSettings:
+    """Connection pool and timeout settings for a provider's HTTP traffic.
+
+    Attributes:
+        max_connections: Connections kept open per host. Concurrent requests beyond
+            this still run, but their connections are discarded instead of reused.
+        max_hosts: Distinct hosts whose connection pools are kept; the least recently
+            used host's pool is closed beyond this.
+        timeout: Seconds to wait for a response before giving up.
+        max_retries: Times a request is retried after a 429 or 503 response.
+    """
+    max_connections: int = 100
+    max_hosts: int = 10
+    timeout: float = 30
+    max_retries: int = 3
+
+    @classmethod
+    def from_config(cls, http_config, **defaults):
+        """Build settings from a provider's "http" config section.
+
+        Args:
+            http_config: Dict with optional max_connections, max_hosts, timeout_s and
+                max_retries keys.
+            **defaults: Field values to use for keys missing from http_config.
+
+        Returns:
+            An HttpSettings instance.
+        """
+        settings = cls(**defaults)
+        return cls(
+            max_connections=int(http_config.get("max_connections", settings.max_connections)),
+            max_hosts=int(http_config.get("max_hosts", settings.max_hosts)),
+            timeout=float(http_config.get("timeout_s", settings.timeout)),
+            max_retries=int(http_config.get("max_retries", settings.max_retries)),
+        )
+
+class RateLimiter:
+    """Spaces out requests so they stay under a requests-per-minute cap.
+
+    Safe to share between threads and coroutines: callers reserve the next free
+    slot under a lock and then wait for it outside the lock.
+    """
+
+    def __init__(self, rate_limit_rpm):
+        """Initialize the limiter.
+
+        Args:
+            rate_limit_rpm: Maximum number of requests per minute.
+        """
+        self.interval = 60.0 / rate_limit_rpm
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Claim the next free request slot.
+
+        Returns:
+            Seconds the caller must wait before sending its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            return slot - now
+
+    def wait(self):
+        """Block until the caller may send its request."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def await_slot(self):
+        """Wait without blocking the event loop until the caller may send its request."""
+        import asyncio  # Deferred: the synchronous CLI path never needs it
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def defer(self, seconds):
+        """Hold back every caller sharing this limiter, e.g. after the server answered 429.
+
+        Args:
+            seconds: Minimum time from now before the next slot is handed out.
+        """
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+# One limiter per provider name, shared by every instance of that provider
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+def get_rate_limiter(provider_name, rate_limit_rpm):
+    """Return the process-wide RateLimiter for a provider, creating it on first use.
+
+    Args:
+        provider_name: Name of the provider, as used in the config file.
+        rate_limit_rpm: Requests per minute allowed for the provider.
+
+    Returns:
+        A RateLimiter shared by all callers passing the same provider name and rate.
+    """
+    key = (provider_name, rate_limit_rpm)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = _LIMITERS[key] = RateLimiter(rate_limit_rpm)
+        return limiter
+
+# Responses that mean "slow down" rather than "failed"
+RETRY_STATUSES = (429, 503)
+
+def retry_delay(response, attempt, base=1.0, cap=30.0):
+    """Seconds to wait before retrying a throttled request.
+
+    Uses the server's Retry-After header when it gives a number of seconds,
+    otherwise exponential backoff with jitter.
+
+    Args:
+        response: The 429/503 response.
+        attempt: Number of retries already made (0 for the first).
+        base: Backoff for the first retry, in seconds.
+        cap: Upper bound on the backoff, in seconds.
+    """
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), cap)
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+# Submitted batch jobs, so their status can be checked across runs
+BATCHES_PATH = os.path.expanduser("~/.terminalai_batches.json")
+# Last Ollama model listing per host, with HTTP validators (see OllamaProvider.list_models)
+MODELS_CACHE_PATH = os.path.join(appdirs.user_cache_dir("terminalai"), "ollama_models.json")
+
+def _load_json_file(path):
+    """Read a JSON object from path, or return {} if it is missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            return json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+def _save_json_file(path, data):
+    """Write data to path as JSON, creating the parent directory if needed."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json_dumps(data))
+
+def load_batches():
+    """Return the recorded batch jobs as a dict of batch id -> metadata."""
+    return _load_json_file(BATCHES_PATH)
+
+def record_batch(batch_id, provider_name, prompt_count):
+    """Record a submitted batch job in BATCHES_PATH.
+
+    Args:
+        batch_id: The provider's batch id.
+        provider_name: Name of the provider the batch was submitted to.
+        prompt_count: Number of prompts in the batch.
+    """
+    batches = load_batches()
+    batches[batch_id] = {
+        "provider": provider_name,
+        "prompts": prompt_count,
+        "submitted_at": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    _save_json_file(BATCHES_PATH, batches)
+
+def build_body_prefix(constant_fields):
+    """Serialize the fields of a request body that never change, once.
+
+    Args:
+        constant_fields: Dict of the body's constant fields.
+
+    Returns:
+        The JSON object text with its closing brace left off, for finish_body().
+    """
+    return json_dumps(constant_fields, compact=True)[:-1]
+
+def finish_body(prefix, **fields):
+    """Complete a body prefix from build_body_prefix() with the per-call fields.
+
+    Only the per-call fields are serialized, so the cost scales with the prompt
+    rather than with the whole request template.
+
+    Returns:
+        The request body as UTF-8 encoded JSON.
+    """
+    tail = json_dumps(fields, compact=True)[1:]
+    separator = "," if len(prefix) > 1 and len(tail) > 1 else ""
+    return (prefix + separator + tail).encode("utf-8")
+
+_sessions = {}
+
+def get_shared_session(http_settings=None):
+    """Return the process-wide HTTP session for the given settings, creating it on first use.
+
+    The session keeps connections alive between requests, so repeated or concurrent
+    queries to the same provider reuse an open TCP/TLS connection. Providers with
+    identical settings share one session.
+
+    Args:
+        http_settings: Optional HttpSettings for the connection pool. Defaults to HttpSettings().
+
+    Returns:
+        A requests.Session with a connection pool sized by http_settings.
+    """
+    http_settings = http_settings or HttpSettings()
+    session = _sessions.get(http_settings)
+    if session is None:
+        # requests is imported on first use to keep it off the CLI's startup path
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=http_settings.max_hosts,
+            pool_maxsize=http_settings.max_connections
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _sessions[http_settings] = session
+    return session
+
+def _chat_answer(payload):
+    return payload["choices"][0]["message"]["content"]
+
+def _gemini_answer(payload):
+    return payload["candidates"][0]["content"]["parts"][0]["text"]
 
 class AIProvider:
     """Base class for all AI providers."""
 
+    PREWARM_URL = None  # Cheap URL on the provider's API host, used by prewarm()
+
+    def __init__(self, session=None, http_settings=None):
+        """Initialize the provider.
+
+        Args:
+            session: Optional requests.Session to send requests with. Defaults to the shared session.
+            http_settings: Optional HttpSettings for pool size and request timeout.
+        """
+        self.http_settings = http_settings or HttpSettings()
+        self.session = session or get_shared_session(self.http_settings)
+        # Set by get_provider() when the provider's config has a rate_limit_rpm
+        self.rate_limiter = None
+
+    def _post(self, url, **kwargs):
+        """POST through the provider's session under its rate limit, retrying 429/503 responses.
+
+        A throttled response defers the shared rate limiter, so every request to
+        this provider backs off together instead of each retrying on its own.
+
+        Args:
+            url: The URL to post to.
+            **kwargs: Passed on to session.post(); timeout defaults to http_settings.timeout.
+
+        Returns:
+            The last response received.
+        """
+        # Bound once; the retry loop would otherwise re-resolve them on every attempt
+        post, limiter, max_retries = self.session.post, self.rate_limiter, self.http_settings.max_retries
+        kwargs.setdefault("timeout", self.http_settings.timeout)
+        for attempt in range(max_retries + 1):
+            if limiter:
+                limiter.wait()
+            response = post(url, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            delay = retry_delay(response, attempt)
+            if limiter:
+                limiter.defer(delay)
+            else:
+                time.sleep(delay)
+        return response
+
+    def _post_json(self, url, extract, label, **kwargs):
+        """POST a request and pull the answer out of its JSON response.
+
+        Args:
+            url: The URL to post to.
+            extract: Callable mapping the decoded JSON response to the answer text.
+            label: Provider name used in the "[<label> API error] ..." string returned on failure.
+            **kwargs: Passed on to _post().
+
+        Returns:
+            The answer text, or an error string.
+        """
+        from requests import RequestException
+        try:
+            response = self._post(url, **kwargs)
+            response.raise_for_status()
+            return extract(json_loads(response.content))
+        except (RequestException, ValueError, KeyError, IndexError) as e:
+            return f"[{label} API error] {e}"
+
+    @staticmethod
+    def _split_prompt(prompt):
+        """Split a prompt into (system prompt, user prompt); the system prompt is None if there is none."""
+        sep = prompt.find("\n\n")
+        return (prompt[:sep], prompt[sep + 2:]) if sep >= 0 else (None, prompt)
+
+    @staticmethod
+    def _chat_body(prompt):
+        """Build the chat-completions request body (without the model) for a prompt."""
+        system_prompt, user_prompt = AIProvider._split_prompt(prompt)
+        user_message = {"role": "user", "content": user_prompt}
+        return {
+            "messages": [{"role": "system", "content": system_prompt}, user_message]
+            if system_prompt is not None else [user_message]
+        }
+
     def query(self, prompt):
         """Query the AI provider with the given prompt.
 
@@ -24,6 +347,129 @@ class AIProvider:
         """
         raise NotImplementedError
 
+    async def aquery(self, prompt):
+        """Query the AI provider without blocking the running event loop.
+
+        The blocking HTTP call runs in the loop's default executor, so several
+        aquery() calls awaited together overlap their network latency.
+
+        Args:
+            prompt: The text prompt to send to the AI provider.
+
+        Returns:
+            The response from the AI provider.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.query, prompt)
+
+    async def aquery_many(self, prompts, max_concurrency=8):
+        """Query the AI provider with several prompts concurrently.
+
+        Args:
+            prompts: List of text prompts.
+            max_concurrency: Maximum number of requests in flight at once.
+
+        Returns:
+            List of responses, in the same order as prompts.
+        """
+        import asyncio
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded_query(prompt):
+            async with semaphore:
+                return await self.aquery(prompt)
+
+        return list(await asyncio.gather(*(bounded_query(p) for p in prompts)))
+
+    def query_many(self, prompts, max_concurrency=8):
+        """Query the AI provider with several prompts, overlapping their network latency.
+
+        A single prompt is sent synchronously; more are sent from a thread pool
+        sharing the provider's session.
+
+        Args:
+            prompts: List of text prompts.
+            max_concurrency: Maximum number of requests in flight at once.
+
+        Returns:
+            List of responses, in the same order as prompts.
+        """
+        return self._map_queries(self.query, prompts, max_concurrency)
+
+    @staticmethod
+    def _map_queries(query, prompts, max_concurrency):
+        """Call query on every prompt, concurrently when there is more than one."""
+        if len(prompts) <= 1:
+            return [query(prompt) for prompt in prompts]
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts))) as executor:
+            return list(executor.map(query, prompts))
+
+    def submit_batch(self, prompts):
+        """Submit prompts to the provider's batch API for asynchronous processing.
+
+        Args:
+            prompts: List of text prompts.
+
+        Returns:
+            The provider's batch id.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch jobs")
+
+    def get_batch(self, batch_id):
+        """Fetch the current state of a batch job.
+
+        Args:
+            batch_id: The id returned by submit_batch().
+
+        Returns:
+            The batch job as returned by the provider, including its "status".
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch jobs")
+
+    def poll_batch(self, batch_id, interval=30):
+        """Wait for a batch job to finish and collect its responses.
+
+        Args:
+            batch_id: The id returned by submit_batch().
+            interval: Seconds to sleep between status checks.
+
+        Returns:
+            List of response texts in the order the prompts were submitted.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch jobs")
+
+    def prewarm(self):
+        """Open a connection to the provider in the background.
+
+        Sends a HEAD request from a daemon thread so the TCP and TLS handshakes are
+        done, and the connection is back in the shared pool, by the time the first
+        query is sent. Network failures are only logged at debug level; the query
+        will report them.
+
+        Returns:
+            The started thread, or None if the provider has no PREWARM_URL.
+        """
+        url = self.prewarm_url()
+        if not url:
+            return None
+
+        def head():
+            from requests import RequestException
+            try:
+                self.session.head(url, allow_redirects=False, timeout=self.http_settings.timeout)
+            except RequestException as e:
+                logger.debug("Pre-warming %s failed: %s", url, e)
+
+        thread = threading.Thread(target=head, name="terminalai-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def prewarm_url(self):
+        """Return the URL prewarm() requests."""
+        return self.PREWARM_URL
+
     def generate_response(self, user_query, system_context, verbose=False, override_system_prompt=None):
         """Generate a response with the given query and system context.
 
@@ -51,16 +497,50 @@ class AIProvider:
         # Add AI marker prefix
         return f"[AI] {response}"
 
+# Provider name -> (class, config key passed as the first argument, its default,
+# optional config keys passed as keyword arguments, HttpSettings defaults)
+_PROVIDERS = {}
+
+def register(name, config_key, default="", options=(), **http_defaults):
+    """Class decorator that makes a provider available to get_provider() under the given name.
+
+    Args:
+        name: Provider name as used in the config file.
+        config_key: Config key whose value is the provider's first constructor argument.
+            The provider is not created if the value is empty.
+        default: Value used when config_key is missing from the config.
+        options: Further config keys passed as keyword arguments when present.
+        **http_defaults: HttpSettings defaults for this provider (e.g. timeout=60).
+    """
+    def decorator(cls):
+        _PROVIDERS[name] = (cls, config_key, default, tuple(options), http_defaults)
+        return cls
+    return decorator
+
+@register("openrouter", "api_key")
 class OpenRouterProvider(AIProvider):
     """OpenRouter AI provider implementation."""
 
-    def __init__(self, api_key):
+    MODEL = "openai/gpt-3.5-turbo"  # Default model, can be modified
+    PREWARM_URL = "https://openrouter.ai/"
+
+    def __init__(self, api_key, session=None, http_settings=None):
         """Initialize the OpenRouter provider.
 
         Args:
             api_key: API key for OpenRouter service.
+            session: Optional requests.Session to send requests with.
+            http_settings: Optional HttpSettings for pool size and request timeout.
         """
+        super().__init__(session, http_settings)
         self.api_key = api_key
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://github.com/coaxialdolor/terminalai"
+        }
+        self._url = "https://openrouter.ai/api/v1/chat/completions"
+        self._body_prefix = build_body_prefix({"model": self.MODEL})
 
     def query(self, prompt):
         """Query OpenRouter API with the given prompt.
@@ -71,49 +551,30 @@ class OpenRouterProvider(AIProvider):
         Returns:
             The response text from OpenRouter.
         """
-        url = "https://openrouter.ai/api/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "https://github.com/coaxialdolor/terminalai"
-        }
+        data = finish_body(self._body_prefix, **self._chat_body(prompt))
 
-        # Check if the prompt includes a system prompt section
-        if "\n\n" in prompt:
-            system_prompt, user_prompt = prompt.split("\n\n", 1)
-            data = {
-                "model": "openai/gpt-3.5-turbo",  # Default model, can be modified
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-            }
-        else:
-            # Just a user prompt without system instructions
-            data = {
-                "model": "openai/gpt-3.5-turbo",
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ]
-            }
-
-        try:
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
-        except (requests.RequestException, KeyError, IndexError) as e:
-            return f"[OpenRouter API error] {e}"
+        return self._post_json(self._url, _chat_answer, "OpenRouter", headers=self._headers, data=data)
 
+@register("gemini", "api_key")
 class GeminiProvider(AIProvider):
     """Google Gemini AI provider implementation."""
 
-    def __init__(self, api_key):
+    PREWARM_URL = "https://generativelanguage.googleapis.com/"
+
+    def __init__(self, api_key, session=None, http_settings=None):
         """Initialize the Gemini provider.
 
         Args:
             api_key: API key for Google Gemini service.
+            session: Optional requests.Session to send requests with.
+            http_settings: Optional HttpSettings for pool size and request timeout.
         """
+        super().__init__(session, http_settings)
         self.api_key = api_key
+        self._headers = {
+            "Content-Type": "application/json"
+        }
+        self._url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={api_key}"
 
     def query(self, prompt):
         """Query Google Gemini API with the given prompt.
@@ -124,61 +585,37 @@ class GeminiProvider(AIProvider):
         Returns:
             The response text from Gemini.
         """
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
-        headers = {
-            "Content-Type": "application/json"
-        }
-
-        # Check if the prompt includes a system prompt section
-        if "\n\n" in prompt:
-            system_prompt, user_prompt = prompt.split("\n\n", 1)
-            # Gemini doesn't natively support system prompts, so we'll format it
-            formatted_prompt = (
-                f"System instructions: {system_prompt}\n\nUser query: {user_prompt}"
-            )
-            data = {
-                "contents": [
-                    {
-                        "parts": [
-                            {"text": formatted_prompt}
-                        ]
-                    }
-                ]
-            }
-        else:
-            # Just a user prompt without system instructions
-            data = {
-                "contents": [
-                    {
-                        "parts": [
-                            {"text": prompt}
-                        ]
-                    }
-                ]
-            }
+        system_prompt, user_prompt = self._split_prompt(prompt)
+        # Gemini doesn't natively support system prompts, so we'll format it
+        text = f"System instructions: {system_prompt}\n\nUser query: {user_prompt}" if system_prompt is not None else prompt
+        data = json_dumps({"contents": [{"parts": [{"text": text}]}]}, compact=True).encode("utf-8")
 
-        try:
-            response = requests.post(
-                f"{url}?key={self.api_key}",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()["candidates"][0]["content"]["parts"][0]["text"]
-        except (requests.RequestException, KeyError, IndexError) as e:
-            return f"[Gemini API error] {e}"
+        return self._post_json(self._url, _gemini_answer, "Gemini", headers=self._headers, data=data)
 
+@register("mistral", "api_key")
 class MistralProvider(AIProvider):
     """Mistral AI provider implementation."""
 
-    def __init__(self, api_key):
+    BASE_URL = "https://api.mistral.ai/v1"
+    MODEL = "mistral-tiny"  # You can change to another model if needed
+    BATCH_PENDING_STATUSES = ("QUEUED", "RUNNING")
+    PREWARM_URL = "https://api.mistral.ai/"
+
+    def __init__(self, api_key, session=None, http_settings=None):
         """Initialize the Mistral provider.
 
         Args:
             api_key: API key for Mistral service.
+            session: Optional requests.Session to send requests with.
+            http_settings: Optional HttpSettings for pool size and request timeout.
         """
+        super().__init__(session, http_settings)
         self.api_key = api_key
+        # Built once; the batch endpoints send only the auth header
+        self._auth = {"Authorization": f"Bearer {self.api_key}"}
+        self._headers = dict(self._auth, **{"Content-Type": "application/json"})
+        self._url = f"{self.BASE_URL}/chat/completions"
+        self._body_prefix = build_body_prefix({"model": self.MODEL})
 
     def query(self, prompt):
         """Query Mistral API with the given prompt.
@@ -189,51 +626,162 @@ class MistralProvider(AIProvider):
         Returns:
             The response text from Mistral.
         """
-        # Real Mistral API call
-        url = "https://api.mistral.ai/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        data = finish_body(self._body_prefix, **self._chat_body(prompt))
 
-        # Check if the prompt includes a system prompt section
-        if "\n\n" in prompt:
-            system_prompt, user_prompt = prompt.split("\n\n", 1)
-            data = {
-                "model": "mistral-tiny",  # You can change to another model if needed
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-            }
-        else:
-            # Just a user prompt without system instructions
-            data = {
-                "model": "mistral-tiny",  # You can change to another model if needed
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ]
-            }
+        return self._post_json(self._url, _chat_answer, "Mistral", headers=self._headers, data=data)
 
-        try:
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
-        except (requests.RequestException, KeyError, IndexError) as e:
-            return f"[Mistral API error] {e}"
+    def submit_batch(self, prompts):
+        """Submit prompts to Mistral's batch API for asynchronous, discounted processing.
+
+        The prompts are uploaded as a JSONL file and a batch job is created for it.
+        The job id is recorded in BATCHES_PATH so its status can be checked later,
+        even from another process (see `ai --batch-status`).
+
+        Args:
+            prompts: List of text prompts.
+
+        Returns:
+            The batch job id.
+
+        Raises:
+            requests.RequestException: If the upload or job creation fails.
+        """
+        lines = [
+            json_dumps({"custom_id": str(i), "body": self._chat_body(prompt)}, compact=True)
+            for i, prompt in enumerate(prompts)
+        ]
+
+        upload = self._post(
+            f"{self.BASE_URL}/files",
+            headers=self._auth,
+            files={"file": ("batch.jsonl", "\n".join(lines).encode("utf-8"))},
+            data={"purpose": "batch"}
+        )
+        upload.raise_for_status()
 
+        job = self._post(
+            f"{self.BASE_URL}/batch/jobs",
+            headers=self._headers,
+            data=json_dumps({
+                "input_files": [json_loads(upload.content)["id"]],
+                "model": self.MODEL,
+                "endpoint": "/v1/chat/completions"
+            }, compact=True).encode("utf-8")
+        )
+        job.raise_for_status()
+        batch_id = json_loads(job.content)["id"]
+        record_batch(batch_id, "mistral", len(prompts))
+        return batch_id
+
+    def get_batch(self, batch_id):
+        """Fetch the current state of a batch job.
+
+        Args:
+            batch_id: The id returned by submit_batch().
+
+        Returns:
+            The batch job as returned by the API (includes "status" and, once done, "output_file").
+        """
+        response = self.session.get(
+            f"{self.BASE_URL}/batch/jobs/{batch_id}",
+            headers=self._auth,
+            timeout=self.http_settings.timeout
+        )
+        response.raise_for_status()
+        return json_loads(response.content)
+
+    def poll_batch(self, batch_id, interval=30):
+        """Wait for a batch job to finish and collect its responses.
+
+        Args:
+            batch_id: The id returned by submit_batch().
+            interval: Seconds to sleep between status checks.
+
+        Returns:
+            List of response texts in the order the prompts were submitted. Prompts
+            that failed are returned as "[Mistral API error] ..." strings.
+
+        Raises:
+            RuntimeError: If the job ends in a status other than SUCCESS.
+        """
+        job = self.get_batch(batch_id)
+        while job["status"] in self.BATCH_PENDING_STATUSES:
+            time.sleep(interval)
+            job = self.get_batch(batch_id)
+        if job["status"] != "SUCCESS":
+            raise RuntimeError(f"Batch {batch_id} ended with status {job['status']}")
+
+        output = self.session.get(
+            f"{self.BASE_URL}/files/{job['output_file']}/content",
+            headers=self._auth,
+            timeout=self.http_settings.timeout
+        )
+        output.raise_for_status()
+
+        results = [None] * job.get("total_requests", 0)
+        # Parse the raw bytes line by line; output.text would first run charset detection on the whole file
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            item = json_loads(line)
+            index = int(item["custom_id"])
+            if index >= len(results):
+                results.extend([None] * (index + 1 - len(results)))
+            try:
+                results[index] = _chat_answer(item["response"]["body"])
+            except (KeyError, IndexError, TypeError):
+                results[index] = f"[Mistral API error] {item.get('error') or item.get('response')}"
+        return results
+
+@register("ollama", "host", "http://localhost:11434", options=("model",), timeout=60)
 class OllamaProvider(AIProvider):
     """Ollama local model provider implementation."""
 
-    def __init__(self, host, model="llama3"):
+    def __init__(self, host, model="llama3", session=None, http_settings=None):
         """Initialize the Ollama provider.
 
         Args:
             host: The host URL for the Ollama server.
             model: The model name to use (e.g., "mistral:latest", "llama3")
+            session: Optional requests.Session to send requests with.
+            http_settings: Optional HttpSettings. Local generation is slow, so the default timeout is 60s.
         """
+        super().__init__(session, http_settings or HttpSettings(timeout=60))
         self.host = host
         self.model = model # Ensure this is set to e.g., "mistral:latest" in your config
+        self._headers = {
+            "Content-Type": "application/json"
+        }
+        self._url = f"{host}/api/generate"
+        # Streamed, so the read timeout applies between chunks rather than to the whole generation
+        self._body_prefix = build_body_prefix({"model": self.model, "stream": True})
+
+    def stream_query(self, prompt):
+        """Query Ollama and yield the response text piece by piece as it is generated.
+
+        Args:
+            prompt: The combined system and user prompt.
+
+        Yields:
+            Fragments of the response text, in order.
+
+        Raises:
+            requests.RequestException: If the request fails.
+            RuntimeError: If Ollama reports an error part-way through the stream.
+        """
+        data = finish_body(self._body_prefix, prompt=prompt)
+        with self._post(self._url, headers=self._headers, data=data, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json_loads(line)
+                if "error" in chunk:
+                    raise RuntimeError(chunk["error"])
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
 
     def query(self, prompt):
         """Query Ollama API with the given prompt.
@@ -244,92 +792,344 @@ class OllamaProvider(AIProvider):
         Returns:
             The response text from Ollama.
         """
-        url = f"{self.host}/api/generate"
-        headers = {
-            "Content-Type": "application/json"
-        }
-
-        data = {
-            "model": self.model,
-            "prompt": prompt,
-            "stream": False
-        }
-
-        response = None
+        from requests import HTTPError, RequestException
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=60)
-            response.raise_for_status()
-            
-            response_json = response.json()
-            return response_json.get("response", "").strip()
-        
-        except requests.exceptions.HTTPError as http_err:
+            return "".join(self.stream_query(prompt)).strip()
+        except HTTPError as http_err:
             error_message = f"HTTP error occurred: {http_err}"
-            if response is not None:
-                error_message += f" - Response Text: {response.text}"
+            if http_err.response is not None:
+                error_message += f" - Response Text: {http_err.response.text}"
             print(f"[OllamaProvider ERROR] {error_message}")
             return f"[Ollama API error] {error_message}"
-        except requests.exceptions.RequestException as req_err:
+        except RequestException as req_err:
             error_message = f"Request exception occurred: {req_err}"
             print(f"[OllamaProvider ERROR] {error_message}")
             return f"[Ollama API error] {error_message}"
         except json.JSONDecodeError as json_err:
             error_message = f"JSON decode error: {json_err}"
-            if response is not None:
-                error_message += f" - Received text was: {response.text}"
-            print(f"[OllamaProvider ERROR] {error_message}")
-            return f"[Ollama API error] {error_message}"
-        except KeyError as key_err:
-            error_message = f"KeyError: '{key_err}' not found in response."
-            if response is not None:
-                try:
-                    error_message += f" - Full JSON response: {response.json()}"
-                except json.JSONDecodeError:
-                    error_message += f" - Could not parse JSON from: {response.text}"
             print(f"[OllamaProvider ERROR] {error_message}")
             return f"[Ollama API error] {error_message}"
         except Exception as e:
             error_message = f"An unexpected error occurred: {e}"
-            if response is not None:
-                error_message += f" - Response Text: {response.text}"
             print(f"[OllamaProvider ERROR] {error_message}")
             return f"[Ollama API error] {error_message}"
 
-def get_provider(provider_name=None):
+    def prewarm_url(self):
+        """Return the server root, which Ollama answers cheaply (doubles as a liveness probe)."""
+        return f"{self.host}/"
+
+    def iter_models(self):
+        """Yield the models installed on the Ollama server, one dict per model.
+
+        The /api/tags response is streamed and, when ijson is installed, parsed
+        incrementally, so the first model is available before the whole list arrives.
+
+        Yields:
+            Model dicts with "name", "size", "modified_at", etc.
+
+        Raises:
+            requests.RequestException: If the server cannot be reached or its
+                response is not valid JSON.
+        """
+        response = self.session.get(f"{self.host}/api/tags", stream=True, timeout=self.http_settings.timeout)
+        with response:
+            response.raise_for_status()
+            yield from self._parse_models(response)
+
+    @staticmethod
+    def _parse_models(response):
+        """Yield the entries of a streamed /api/tags response, incrementally if ijson is installed."""
+        # Parse errors are raised as RequestException, as response.json() did, so callers
+        # handling an unreachable server also handle a malformed listing
+        from requests import RequestException
+        try:
+            import ijson
+        except ImportError:
+            try:
+                models = json_loads(response.content).get("models", [])
+            except ValueError as e:
+                raise RequestException(f"Malformed /api/tags response: {e}") from e
+            yield from models
+            return
+        response.raw.decode_content = True
+        try:
+            yield from ijson.items(response.raw, "models.item", use_float=True)
+        except ijson.JSONError as e:
+            raise RequestException(f"Malformed /api/tags response: {e}") from e
+
+    def list_models(self):
+        """List the models installed on the Ollama server.
+
+        The last listing per host is kept in MODELS_CACHE_PATH together with its
+        ETag/Last-Modified validators. Requests are conditional, so an unchanged
+        listing is answered with a 304 and read from disk; if the server cannot be
+        reached, the cached (possibly stale) listing is returned instead of an error.
+
+        Returns:
+            A list of model dicts, or an "[Ollama API error] ..." string on failure.
+        """
+        cache = _load_json_file(MODELS_CACHE_PATH)
+        cached = cache.get(self.host)
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            response = self.session.get(
+                f"{self.host}/api/tags", headers=headers, stream=True, timeout=self.http_settings.timeout
+            )
+            with response:
+                if response.status_code == 304 and cached:
+                    return cached["models"]
+                response.raise_for_status()
+                models = list(self._parse_models(response))
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+        except Exception as e:
+            if cached:
+                return cached["models"]
+            return f"[Ollama API error] {e}"
+
+        cache[self.host] = dict(validators, models=models)
+        _save_json_file(MODELS_CACHE_PATH, cache)
+        return models
+
+class ProviderWrapper(AIProvider):
+    """Base class for providers that wrap another provider and add behaviour around it.
+
+    Everything not overridden is forwarded to the wrapped provider.
+    """
+
+    def __init__(self, provider):
+        """Initialize the wrapper.
+
+        Args:
+            provider: The AIProvider instance to wrap.
+        """
+        # The wrapped provider owns the session and HTTP settings, so skip AIProvider.__init__
+        self.provider = provider
+
+    def __getattr__(self, name):
+        # Expose the wrapped provider's attributes (api_key, model, session, ...)
+        return getattr(self.provider, name)
+
+    def query(self, prompt):
+        """Query the wrapped provider with the given prompt."""
+        return self.provider.query(prompt)
+
+    def submit_batch(self, prompts):
+        """Submit a batch job through the wrapped provider."""
+        return self.provider.submit_batch(prompts)
+
+    def get_batch(self, batch_id):
+        """Fetch a batch job through the wrapped provider."""
+        return self.provider.get_batch(batch_id)
+
+    def poll_batch(self, batch_id, interval=30):
+        """Wait for a batch job through the wrapped provider."""
+        return self.provider.poll_batch(batch_id, interval)
+
+    def prewarm(self):
+        """Pre-warm the wrapped provider's connection."""
+        return self.provider.prewarm()
+
+class BatchProcessor(ProviderWrapper):
+    """Wraps a provider to send batches of prompts with bounded concurrency and a rate limit.
+
+    Single queries pass straight through to the wrapped provider; only
+    aquery_many() and query_many() are throttled.
+    """
+
+    def __init__(self, provider, max_concurrency=8, rate_limit_rpm=0):
+        """Initialize the batch processor.
+
+        Args:
+            provider: The AIProvider instance to wrap.
+            max_concurrency: Maximum number of requests in flight at once.
+            rate_limit_rpm: Maximum requests per minute, or 0 for no limit.
+        """
+        super().__init__(provider)
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = RateLimiter(rate_limit_rpm) if rate_limit_rpm else None
+
+    async def aquery_many(self, prompts, max_concurrency=None):
+        """Query the wrapped provider with several prompts under the configured limits.
+
+        Args:
+            prompts: List of text prompts.
+            max_concurrency: Optional override for the configured concurrency limit.
+
+        Returns:
+            List of responses, in the same order as prompts.
+        """
+        import asyncio
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def throttled_query(prompt):
+            async with semaphore:
+                if self.rate_limiter:
+                    await self.rate_limiter.await_slot()
+                return await self.aquery(prompt)
+
+        return list(await asyncio.gather(*(throttled_query(p) for p in prompts)))
+
+    def query_many(self, prompts, max_concurrency=None):
+        """Query the wrapped provider with several prompts from a thread pool under the configured limits.
+
+        Args:
+            prompts: List of text prompts.
+            max_concurrency: Optional override for the configured concurrency limit.
+
+        Returns:
+            List of responses, in the same order as prompts.
+        """
+        if not self.rate_limiter:
+            return self._map_queries(self.query, prompts, max_concurrency or self.max_concurrency)
+
+        # Reserve the rate-limit slots up front so requests go out in prompt order
+        now = time.monotonic()
+        jobs = [(now + self.rate_limiter.reserve(), prompt) for prompt in prompts]
+
+        def throttled_query(job):
+            send_at, prompt = job
+            delay = send_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            return self.query(prompt)
+
+        return self._map_queries(throttled_query, jobs, max_concurrency or self.max_concurrency)
+
+class CachedProvider(ProviderWrapper):
+    """Wraps a provider so repeated prompts are answered from a SemanticCache.
+
+    Error responses are never cached, so a failed request is retried next time.
+    """
+
+    def __init__(self, provider, cache):
+        """Initialize the cached provider.
+
+        Args:
+            provider: The AIProvider instance to wrap.
+            cache: The SemanticCache to read from and write to.
+        """
+        super().__init__(provider)
+        self.cache = cache
+
+    def query(self, prompt):
+        """Answer from the cache, or query the wrapped provider and cache its response.
+
+        Args:
+            prompt: The text prompt to send to the AI provider.
+
+        Returns:
+            The cached or freshly fetched response.
+        """
+        response = self.cache.get(prompt)
+        if response is not None:
+            return response
+        response = self.provider.query(prompt)
+        if not is_error_response(response):
+            self.cache.put(prompt, response)
+        return response
+
+# Provider name -> (config, registry entry, provider) for providers built on the shared session
+_provider_cache = {}
+
+def get_provider(provider_name=None, session=None):
     """Get the provider instance for the specified name or the default one.
 
+    Providers built on the shared session are reused for as long as the config
+    (and the provider's registration) stays the same, so repeated calls, e.g.
+    once per chat turn, keep the same response cache and rate limiter.
+
     Args:
         provider_name: Optional name of the provider to use. If None, use the default.
+        session: Optional requests.Session to hand to the provider. Defaults to a shared session
+            sized by the provider's "http" config section.
 
     Returns:
         An instance of the appropriate AI provider class, or None if unable to initialize.
+        When the cache is enabled in the config, the provider is wrapped in a CachedProvider.
+        When batching is enabled in the config, the provider is wrapped in a BatchProcessor.
     """
     config = load_config()
+    name = provider_name or config.get("default_provider", "")
+    entry = _PROVIDERS.get(name)
+    if session is None:
+        cached = _provider_cache.get(name)
+        if cached and cached[0] == config and cached[1] is entry:
+            return cached[2]
+
+    provider = _build_provider(config, name, session)
+    if provider and session is None:
+        _provider_cache[name] = (config, entry, provider)
+    return provider
+
+def _build_provider(config, provider_name, session):
+    """Create the named provider from config and wrap it as the config asks."""
+    provider = _create_provider(config, provider_name, session)
+
+    cache_cfg = config.get("cache", {})
+    if provider and cache_cfg.get("enabled", False):
+        embedder = load_embedder() if cache_cfg.get("semantic", False) else None
+        cache = SemanticCache(
+            threshold=cache_cfg.get("threshold", 0.93),
+            embedder=embedder,
+            ttl_s=cache_cfg.get("ttl_s", DEFAULT_TTL_S),
+            max_entries=cache_cfg.get("max_entries", DEFAULT_MAX_ENTRIES)
+        )
+        provider = CachedProvider(provider, cache)
+
+    batch_cfg = config.get("batch", {})
+    if provider and batch_cfg.get("enabled", False):
+        return BatchProcessor(
+            provider,
+            max_concurrency=batch_cfg.get("max_concurrency", 8),
+            rate_limit_rpm=batch_cfg.get("rate_limit_rpm", 0)
+        )
+    return provider
+
+async def get_provider_async(provider_name=None, session=None):
+    """Async counterpart of get_provider() for use inside coroutines.
+
+    Reading the config (and loading the embedding model, if the semantic cache is
+    enabled) blocks, so it runs in the loop's default executor.
 
+    Args:
+        provider_name: Optional name of the provider to use. If None, use the default.
+        session: Optional requests.Session to hand to the provider.
+
+    Returns:
+        The same provider get_provider() would return, or None.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, get_provider, provider_name, session)
+
+def _create_provider(config, provider_name, session):
+    """Instantiate the named provider (or the configured default) from config."""
     # Use specified provider or default from config
     if not provider_name:
         provider_name = config.get("default_provider", "")
 
-    if not provider_name:
+    entry = _PROVIDERS.get(provider_name)
+    if entry is None:
+        return None
+    cls, config_key, default, options, http_defaults = entry
+
+    provider_cfg = config.get("providers", {}).get(provider_name, {})
+    value = provider_cfg.get(config_key, default)
+    if not value:
         return None
+    kwargs = {key: provider_cfg[key] for key in options if key in provider_cfg}
+    http_settings = HttpSettings.from_config(provider_cfg.get("http", {}), **http_defaults)
+    provider = cls(value, session=session, http_settings=http_settings, **kwargs)
 
-    # Initialize the appropriate provider based on name
-    if provider_name == "openrouter":
-        api_key = config.get("providers", {}).get("openrouter", {}).get("api_key", "")
-        if api_key:
-            return OpenRouterProvider(api_key)
-    elif provider_name == "gemini":
-        api_key = config.get("providers", {}).get("gemini", {}).get("api_key", "")
-        if api_key:
-            return GeminiProvider(api_key)
-    elif provider_name == "mistral":
-        api_key = config.get("providers", {}).get("mistral", {}).get("api_key", "")
-        if api_key:
-            return MistralProvider(api_key)
-    elif provider_name == "ollama":
-        ollama_config = config.get("providers", {}).get("ollama", {})
-        host = ollama_config.get("host", "http://localhost:11434")
-        model = ollama_config.get("model", "llama3")
-        return OllamaProvider(host, model)
-
-    return None
+    rate_limit_rpm = provider_cfg.get("rate_limit_rpm", 0)
+    if rate_limit_rpm:
+        provider.rate_limiter = get_rate_limiter(provider_name, rate_limit_rpm)
+    return provider
@@ -2,57 +2,49 @@
 This is a copy of test_command_extraction.py for evaluation purposes.
 """
 # --- Begin copy ---
+import contextlib
+import io
+import itertools
 import os
+import re
 import shutil
 import subprocess
 import sys
 import time
-import re
 import pytest
 from terminalai.command_extraction import extract_commands, is_stateful_command, is_risky_command
 import unittest.mock
 
 # Test directory for all file/folder operations
-TEST_DIR = os.path.join(os.getcwd(), "test_terminalai_parsing")
+# One directory per pytest-xdist worker, so parallel runs (pytest -n auto) never remove each other's files
+TEST_DIR = os.path.join(os.getcwd(), f"test_terminalai_parsing_{os.environ.get('PYTEST_XDIST_WORKER', 'main')}")
 
-@pytest.fixture(scope="module", autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 def setup_and_teardown():
     """Setup and teardown fixture for test_terminalai_parsing directory."""
-    # Setup: create test directory
-    if not os.path.exists(TEST_DIR):
-        os.makedirs(TEST_DIR)
+    # Setup: create test directory (created once per session; both extraction modules share it)
+    os.makedirs(TEST_DIR, exist_ok=True)
     yield
-    # Teardown: remove test directory and its contents
-    if os.path.exists(TEST_DIR):
-        shutil.rmtree(TEST_DIR)
-
-def test_single_command_in_code_block():
-    """Test extraction of a single command in a code block."""
-    ai_response = """
-Here is the command:
-```bash
-ls -l
-```
-"""
-    commands = extract_commands(ai_response)
-    assert commands == ["ls -l"]
-    assert not is_stateful_command(commands[0])
-    assert not is_risky_command(commands[0])
+    # Teardown: remove test directory and its contents, unless kept for the next local run
+    if os.environ.get("TERMINALAI_KEEP_TESTDIR") != "1":
+        shutil.rmtree(TEST_DIR, ignore_errors=True)
 
-def test_multiple_commands_separate_blocks():
-    """Test extracting multiple commands from separate code blocks."""
-    ai_response = """
-First list files:
-```bash
-ls
-```
-Then show hidden files:
-```bash
-ls -a
-```
-"""
+# Plain fenced-block responses: each yields exactly the expected commands, none stateful or risky
+@pytest.mark.parametrize("ai_response,expected", [
+    pytest.param("\nHere is the command:\n```bash\nls -l\n```\n", ["ls -l"], id="single_command_in_code_block"),
+    pytest.param("\nFirst list files:\n```bash\nls\n```\nThen show hidden files:\n```bash\nls -a\n```\n",
+                 ["ls", "ls -a"], id="multiple_commands_separate_blocks"),
+    pytest.param("\n```bash\n# This is a comment\nls -l\n```\n", ["ls -l"], id="command_with_comment_inside_block"),
+    pytest.param("\n```bash\ngrep foo file.txt | sort | uniq\n```\n", ["grep foo file.txt | sort | uniq"],
+                 id="command_with_pipe"),
+    pytest.param("\n```bash\nls -l -a -h\n```\n", ["ls -l -a -h"], id="command_with_multiple_flags"),
+    pytest.param("\n```bash\n   ls    -l\n```\n", ["ls    -l"], id="command_with_extra_whitespace"),
+])
+def test_extract_parse(ai_response, expected):
+    """Test extracting commands from plain fenced code blocks."""
     commands = extract_commands(ai_response)
-    assert commands == ["ls", "ls -a"]
+    assert commands == expected
+    assert not any(is_stateful_command(cmd) or is_risky_command(cmd) for cmd in commands)
 
 def test_multiple_commands_single_block():
     """Test extraction of multiple commands in a single code block."""
@@ -68,17 +60,6 @@ cd test_terminalai_parsing
     assert not is_stateful_command(commands[0])
     assert is_stateful_command(commands[1])
 
-def test_command_with_comment_inside_block():
-    """Test extracting a command with a comment inside a code block."""
-    ai_response = """
-```bash
-# This is a comment
-ls -l
-```
-"""
-    commands = extract_commands(ai_response)
-    assert commands == ["ls -l"]
-
 def test_no_command_factual_response():
     """Test that factual responses do not extract commands."""
     ai_response = """
@@ -136,33 +117,14 @@ cp file.txt /path/to/folder/
 
 def test_command_with_actual_test_dir():
     """Test extraction of a command with an actual test directory path."""
+    expected = f"touch {TEST_DIR}/file.txt"
     ai_response = f"""
 ```bash
-touch {TEST_DIR}/file.txt
-```
-"""
-    commands = extract_commands(ai_response)
-    assert commands == [f"touch {TEST_DIR}/file.txt"]
-
-def test_command_with_extra_whitespace():
-    """Test extracting a command with extra whitespace."""
-    ai_response = """
-```bash
-   ls    -l
-```
-"""
-    commands = extract_commands(ai_response)
-    assert commands == ["ls    -l"]
-
-def test_command_with_pipe():
-    """Test extracting a command with a pipe."""
-    ai_response = """
-```bash
-grep foo file.txt | sort | uniq
+{expected}
 ```
 """
     commands = extract_commands(ai_response)
-    assert commands == ["grep foo file.txt | sort | uniq"]
+    assert commands == [expected]
 
 def test_command_with_comment_outside_block():
     """Test extracting a command with a comment outside a code block."""
@@ -188,19 +150,20 @@ file2.txt
     # Should not treat these as commands
     assert commands == []
 
-def test_command_with_multiple_flags():
-    """Test extracting a command with multiple flags."""
-    ai_response = """
-```bash
-ls -l -a -h
-```
-"""
-    commands = extract_commands(ai_response)
-    assert commands == ["ls -l -a -h"]
+# Queries must not be answered from the response cache, which persists between runs: the run id
+# (taken once) keeps them unique across runs and xdist workers, the counter within this process
+_RUN_ID = f"{os.getpid()}-{time.time_ns()}"
+_query_serial = itertools.count()
+
+def _unique_suffix():
+    return f"{_RUN_ID}-{next(_query_serial)}"
+
+# First digit / letter in the CLI output; the search loop runs in C instead of per-character Python calls
+_DIGIT_RE = re.compile(r'\d')
+_LETTER_RE = re.compile(r'[^\W\d_]')
 
 def run_cli_query(query):
     """Run the CLI with a direct query and return stdout. Mocked for integration tests."""
-    env = os.environ.copy()
     # If the query is for 'two ways' or 'three ways', mock the output
     if "two ways" in query:
         # Return two commands in code blocks
@@ -219,19 +182,28 @@ def run_cli_query(query):
             "```bash\ndir\n```\n"
             "Explanation: The first command uses ls, the second uses find, the third uses dir.\n"
         )
-    # For all other queries, call the real CLI
-    result = subprocess.run([
-        sys.executable, '-m', 'terminalai.terminalai_cli', query
-    ], capture_output=True, text=True, check=False, env=env)
-    return result.stdout + result.stderr
+    # Set TERMINALAI_TEST_SUBPROCESS=1 to run the CLI the way a user would, in a fresh interpreter
+    if os.environ.get("TERMINALAI_TEST_SUBPROCESS") == "1":
+        result = subprocess.run([sys.executable, '-m', 'terminalai.terminalai_cli', query],
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, check=False)
+        return result.stdout
+    # For all other queries, call the real CLI in this process
+    from terminalai.terminalai_cli import main as cli_main
+    output = io.StringIO()
+    with unittest.mock.patch.object(sys, "argv", ["ai", query]), \
+            unittest.mock.patch.object(sys, "stdin", io.StringIO()), \
+            contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            cli_main()
+        except SystemExit:
+            pass
+    return output.getvalue()
 
 def test_cli_direct_query():
     """Test the CLI with a direct query."""
     query = "How do I list files in the current directory?"
     output = run_cli_query(query)
-    if not ("ls" in output or "ls -l" in output):
-        print("\n[DEBUG CLI OUTPUT]\n" + output)
-    assert "ls" in output or "ls -l" in output
+    assert "ls" in output or "ls -l" in output, f"Expected 'ls' in CLI output:\n{output}"
 
 # Integration tests that made real API calls have been removed for offline reliability.
 # The following tests were removed:
@@ -242,56 +214,84 @@ def test_cli_direct_query():
 
 def test_cli_unique_query():
     """Test the CLI with a unique query."""
-    unique_query = f"What is the current Unix timestamp? (test {int(time.time())})"
+    unique_query = f"What is the current Unix timestamp? (test {_unique_suffix()})"
     output = run_cli_query(unique_query)
-    print("\n[UNIQUE CLI OUTPUT]\n" + output)
     # We can't assert the exact output, but we expect a number or a command like 'date +%s' in the output
-    assert "date" in output or any(char.isdigit() for char in output)
+    assert "date" in output or _DIGIT_RE.search(output) is not None, f"Unexpected CLI output:\n{output}"
 
 def test_cli_unique_query_2():
     """Test the CLI with a unique query."""
-    unique_query = f"What is the output of 'whoami' on a typical Unix system? (test {int(time.time())})"
+    unique_query = f"What is the output of 'whoami' on a typical Unix system? (test {_unique_suffix()})"
     output = run_cli_query(unique_query)
-    print("\n[UNIQUE CLI OUTPUT 2]\n" + output)
-    assert "whoami" in output or any(char.isalpha() for char in output)
+    assert "whoami" in output or _LETTER_RE.search(output) is not None, f"Unexpected CLI output:\n{output}"
 
 def test_cli_unique_query_3():
     """Test the CLI with a unique query."""
-    unique_query = f"How do I count the number of lines in a file called data.txt? (test {int(time.time())})"
+    unique_query = f"How do I count the number of lines in a file called data.txt? (test {_unique_suffix()})"
     output = run_cli_query(unique_query)
-    print("\n[UNIQUE CLI OUTPUT 3]\n" + output)
-    assert "wc -l" in output or "cat" in output or any(char.isdigit() for char in output)
+    assert "wc -l" in output or "cat" in output or _DIGIT_RE.search(output) is not None, \
+        f"Unexpected CLI output:\n{output}"
+
+def _code_blocks(output):
+    """Return the bodies of fenced code blocks (minus a bash/sh tag) using str.find() instead of a lazy regex."""
+    blocks = []
+    pos = 0
+    while True:
+        start = output.find('```', pos)
+        if start < 0:
+            return blocks
+        body = start + 3
+        if output.startswith('bash', body):
+            body += 4
+        elif output.startswith('sh', body):
+            body += 2
+        if output.startswith('\n', body):
+            body += 1
+        end = output.find('```', body)
+        if end < 0:
+            return blocks
+        blocks.append(output[body:end])
+        pos = end + 3
+
+def _panel_lines(output):
+    """Return the non-empty contents of rich panel rows (lines framed by │ ... │)."""
+    lines = []
+    if '│' not in output:
+        return lines
+    for raw in output.splitlines():
+        row = raw.strip()
+        if len(row) >= 2 and row[0] == '│' and row[-1] == '│':
+            inner = row[1:-1].strip()
+            if inner:
+                lines.append(inner)
+    return lines
+
+# Panel rows that hold CLI chrome rather than a command
+_PANEL_SKIP_PREFIXES = ('TerminalAI', 'Command', 'Found', 'AI Chat Mode', 'Type ')
 
 def extract_commands_from_output(output):
     """Extract commands from both Markdown code blocks and rich panel output."""
     commands = []
     # Extract from Markdown code blocks
-    code_blocks = re.findall(r'```(?:bash|sh)?\n?([\s\S]*?)```', output)
+    code_blocks = _code_blocks(output)
     for block in code_blocks:
         for line in block.splitlines():
             line = line.strip()
             if line and not line.startswith('#'):
                 commands.append(line)
     # Extract from rich panels (lines between │ ... │)
-    panel_lines = re.findall(r'^\s*│\s*(.*?)\s*│\s*$', output, re.MULTILINE)
+    panel_lines = _panel_lines(output)
     for line in panel_lines:
         # Exclude lines that are just explanations or empty
-        if line and not line.startswith('TerminalAI') and not line.startswith('Command') and not line.startswith('Found') and not line.startswith('AI Chat Mode') and not line.startswith('Type '):
+        if line and not line.startswith(_PANEL_SKIP_PREFIXES):
             commands.append(line.strip())
     # Deduplicate, preserve order
-    seen = set()
-    result = []
-    for cmd in commands:
-        if cmd and cmd not in seen:
-            seen.add(cmd)
-            result.append(cmd)
-    return result
+    return [cmd for cmd in dict.fromkeys(commands) if cmd]
 
 def test_cli_two_ways_query():
     """Test the CLI with a query asking for two ways to list files."""
-    unique_query = f"Show me two ways to list files in the current directory. (test {int(time.time())})"
+    unique_query = f"Show me two ways to list files in the current directory. (test {_unique_suffix()})"
     output = run_cli_query(unique_query)
-    print("\n[TWO WAYS CLI OUTPUT]\n" + output)
     commands = extract_commands_from_output(output)
     assert len(commands) >= 2, (
         f"Expected at least 2 commands, got {len(commands)}. Output:\n{output}"
@@ -304,9 +304,8 @@ def test_cli_two_ways_query():
 
 def test_cli_three_ways_query():
     """Test the CLI with a query asking for three ways to list files."""
-    unique_query = f"Give me three ways to list files in the current directory. (test {int(time.time())})"
+    unique_query = f"Give me three ways to list files in the current directory. (test {_unique_suffix()})"
     output = run_cli_query(unique_query)
-    print("\n[THREE WAYS CLI OUTPUT]\n" + output)
     commands = extract_commands_from_output(output)
     assert len(commands) >= 3, (
         f"Expected at least 3 commands, got {len(commands)}. Output:\n{output}"
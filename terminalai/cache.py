@@ -0,0 +1,188 @@
+"""Response cache for TerminalAI providers.
+
+Responses are kept in a small SQLite database, readable only by the user. Lookups
+go through two tiers: an exact match on the SHA-256 of the prompt, then (optionally)
+a semantic match that compares sentence embeddings of the user's question by cosine
+similarity. Entries expire after a TTL and the oldest are evicted past a size limit.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+CACHE_PATH = os.path.expanduser("~/.terminalai_cache.sqlite3")
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_TTL_S = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 1000
+
+def _sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def split_prompt(prompt):
+    """Split a full prompt into its context and the user's question.
+
+    generate_response() builds prompts as "<system context>\\n\\n<user query>",
+    so the last paragraph is the question and everything before it is context.
+
+    Args:
+        prompt: The full prompt sent to the provider.
+
+    Returns:
+        A (context, question) tuple. The context is empty for bare prompts.
+    """
+    context, _, question = prompt.rpartition("\n\n")
+    return context, question
+
+def is_error_response(response):
+    """Return True for empty responses and the "[<Provider> API error] ..." strings providers return on failure."""
+    if not isinstance(response, str) or not response.strip():
+        return True
+    return response.startswith("[") and "API error" in response.split("]", 1)[0]
+
+def load_embedder(model_name=EMBEDDING_MODEL):
+    """Load a local sentence-transformers model for the semantic tier.
+
+    Returns:
+        A callable mapping text to a list of floats, or None if
+        sentence-transformers is not installed.
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    model = SentenceTransformer(model_name)
+    return lambda text: model.encode(text, normalize_embeddings=True).tolist()
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+class SemanticCache:
+    """Two-tier prompt/response cache backed by SQLite.
+
+    Entries are keyed by the hash of the whole prompt and grouped by the hash of
+    its context (the system prompt plus OS and working directory), so a semantic
+    hit is only ever served for a question asked in the same context.
+    """
+
+    def __init__(self, path=None, threshold=0.93, embedder=None, ttl_s=DEFAULT_TTL_S,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        """Initialize the cache.
+
+        Args:
+            path: SQLite file to use. Defaults to ~/.terminalai_cache.sqlite3.
+            threshold: Minimum cosine similarity for a semantic hit.
+            embedder: Optional callable mapping text to a vector. When None,
+                only exact matches are served.
+            ttl_s: Seconds a response is served for after it is stored.
+            max_entries: Most responses kept; the oldest are evicted beyond it.
+        """
+        self.path = path or CACHE_PATH
+        self.threshold = threshold
+        self.embedder = embedder
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Opened lazily so building a provider never touches the disk
+        if self._conn is None:
+            # Prompts and answers are private: create the file (and tighten an older one) as 0o600,
+            # like the config. SQLite gives its journal files the same permissions.
+            os.close(os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o600))
+            os.chmod(self.path, 0o600)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, context TEXT, prompt TEXT, response TEXT, "
+                "embedding BLOB, created_at REAL, expires_at REAL)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+            if "expires_at" not in columns:
+                # Caches written before entries expired: their rows count as expired
+                self._conn.execute("ALTER TABLE responses ADD COLUMN expires_at REAL")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_context ON responses (context)")
+        return self._conn
+
+    def _embed(self, text):
+        return array("f", self.embedder(text)) if self.embedder else None
+
+    def get(self, prompt):
+        """Look up a cached response for the prompt.
+
+        Args:
+            prompt: The full prompt.
+
+        Returns:
+            The cached response, or None on a miss.
+        """
+        context, question = split_prompt(prompt)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND expires_at > ?", (_sha256(prompt), now)
+            ).fetchone()
+            if row:
+                return row[0]
+            if not self.embedder:
+                return None
+            rows = conn.execute(
+                "SELECT response, embedding FROM responses "
+                "WHERE context = ? AND embedding IS NOT NULL AND expires_at > ?",
+                (_sha256(context), now)
+            ).fetchall()
+
+        if not rows:
+            return None
+        vector = self._embed(question)
+        best_response, best_score = None, self.threshold
+        for response, blob in rows:
+            stored = array("f")
+            stored.frombytes(blob)
+            score = _cosine(vector, stored)
+            if score > best_score:
+                best_response, best_score = response, score
+        return best_response
+
+    def put(self, prompt, response):
+        """Store a response for the prompt.
+
+        Args:
+            prompt: The full prompt.
+            response: The provider's response.
+        """
+        context, question = split_prompt(prompt)
+        vector = self._embed(question)
+        blob = vector.tobytes() if vector is not None else None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, context, prompt, response, embedding, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (_sha256(prompt), _sha256(context), prompt, response, blob, now, now + self.ttl_s)
+            )
+            # Drop expired entries, then the oldest ones beyond max_entries
+            conn.execute("DELETE FROM responses WHERE expires_at IS NULL OR expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            conn.commit()
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
@@ -1,40 +1,34 @@
 """CLI interaction functionality for TerminalAI."""
 import os
+import re
 import sys
 import argparse
+import threading
 import time # Import time module for sleep
 from terminalai.command_utils import run_shell_command, is_shell_command
-from terminalai.command_extraction import is_stateful_command, is_risky_command
+from terminalai.command_extraction import classify_command
 from terminalai.clipboard_utils import copy_to_clipboard
 
-# Imports for rich components - from HEAD, as 021offshoot was missing some
-from rich.console import Console
-from rich.panel import Panel
-from rich.text import Text
-from rich.rule import Rule
+# rich, shell_integration and formatting are imported inside the functions that use them,
+# so `ai --version` and `ai --help` never load them
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from rich.console import Console
 
 # Imports for terminalai components - from HEAD, as 021offshoot was missing some
 from terminalai.config import (
     load_config, save_config,
     get_system_prompt, DEFAULT_SYSTEM_PROMPT
 )
-from terminalai.shell_integration import (
-    install_shell_integration, uninstall_shell_integration,
-    check_shell_integration, get_system_context
-)
-from terminalai.ai_providers import get_provider
-from terminalai.formatting import print_ai_answer_with_rich
 # Use the more specific get_commands_interactive (alias for extract_commands) from 021offshoot
-from terminalai.command_extraction import extract_commands as get_commands_interactive
-from terminalai.__init__ import __version__
+from terminalai.command_extraction import extract_commands as get_commands_interactive, parse_response
+from terminalai import __version__
 from terminalai.color_utils import (
     colorize_success, colorize_error, colorize_info,
     colorize_prompt, colorize_highlight, AI_COLOR, COMMAND_COLOR, INFO_COLOR,
     ERROR_COLOR, SUCCESS_COLOR, PROMPT_COLOR, HIGHLIGHT_COLOR, RESET, BOLD
 )
 from terminalai.query_utils import preprocess_query
-import requests # Add this import for Ollama model fetching
-import json # Add this import for parsing Ollama response
 
 # System Prompt for AI Risk Assessment (Hardcoded)
 _RISK_ASSESSMENT_SYSTEM_PROMPT = """
@@ -51,10 +45,179 @@ Instructions:
 - Output *only* the risk explanation, with no conversational introduction or closing.
 """
 
+# Unquoted, any of these means the command needs a shell: operators (|, &&, ;, redirects,
+# subshells, newlines), expansions ($, `) and globs (*, ?, [, {)
+_SHELL_SPECIAL_CHARS = frozenset("|&;<>()`$*?[{\n")
+# A leading VAR=value assignment only means something to the shell
+_ENV_ASSIGNMENT_RE = re.compile(r"\s*[A-Za-z_][A-Za-z0-9_]*=")
+
+def _needs_shell(command):
+    """Check whether a command needs the shell or can be run directly from shlex.split().
+
+    Quoting is followed the way the shell does, so characters inside single quotes
+    (e.g. `grep 'a|b' file`) don't count. `$` and backticks still expand inside
+    double quotes, and `~` only expands at the start of a word.
+
+    Args:
+        command (str): The command to check.
+
+    Returns:
+        bool: True if the command uses operators, expansions or globs.
+    """
+    if _ENV_ASSIGNMENT_RE.match(command):
+        return True
+    quote = None
+    escaped = False
+    word_start = True
+    for char in command:
+        if escaped:
+            # An escaped character is literal, even a space
+            escaped = word_start = False
+            continue
+        if quote == "'":
+            if char == "'":
+                quote = None
+        elif char == "\\":
+            escaped = True
+        elif quote == '"':
+            if char == '"':
+                quote = None
+            elif char in "$`":
+                return True
+        elif char in "'\"":
+            quote = char
+        elif char in _SHELL_SPECIAL_CHARS or (char == "~" and word_start):
+            return True
+        word_start = quote is None and char in " \t"
+    return False
+
+# Destination -> default for every option added by _add_long_options()
+_LONG_OPTION_DEFAULTS = {
+    "setup": False, "version": False, "chat": False, "set_default": False, "set_ollama": False,
+    "batch_status": False, "provider": None, "read_file": None, "explain": None, "eval_mode": False,
+}
+
+# Flags the fast path in _fast_parse_args() understands, by destination
+_SHORT_FLAGS = {
+    "-y": "yes", "--yes": "yes",
+    "-v": "verbose", "--verbose": "verbose",
+    "-l": "long", "--long": "long",
+    # main() answers --version before anything else, so it never needs the full parser
+    "--version": "version",
+}
+
+# Console shared by handle_commands(), run_command() and interactive_mode(); see _get_console()
+_console = None
+
+def _get_console():
+    """Return the shared Console, creating it on first use.
+
+    Creating a Console probes the terminal, so it is done once rather than for every
+    command. It writes to whatever sys.stdout is at print time.
+    """
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+def _fast_parse_args(argv):
+    """Parse the common `ai [-y] [-v] [-l] "query"` form without building an ArgumentParser.
+
+    Args:
+        argv: Command line arguments, without the program name or --eval-mode.
+
+    Returns:
+        A namespace with the same attributes parse_args() produces, or None when
+        the arguments need the full parser (help, long options, combined flags).
+    """
+    args = dict(_LONG_OPTION_DEFAULTS, query=None, yes=False, verbose=False, long=False)
+    for arg in argv:
+        if arg in _SHORT_FLAGS:
+            args[_SHORT_FLAGS[arg]] = True
+        elif arg.startswith("-"):
+            return None
+        elif args["query"] is None:
+            # Like parse_known_args(), extra positional words are ignored
+            args["query"] = arg
+    return argparse.Namespace(**args)
+
+def _add_long_options(parser):
+    """Register the long-only flags (setup shortcuts, provider override, file options)."""
+    parser.add_argument(
+        "--setup",
+        action="store_true",
+        help=argparse.SUPPRESS
+    )
+
+    parser.add_argument(
+        "--version",
+        action="store_true",
+        help=argparse.SUPPRESS
+    )
+
+    parser.add_argument(
+        "--chat",
+        action="store_true",
+        help=argparse.SUPPRESS
+    )
+
+    parser.add_argument(
+        "--set-default",
+        action="store_true",
+        help="Shortcut to set the default AI provider."
+    )
+
+    parser.add_argument(
+        "--set-ollama",
+        action="store_true",
+        help="Shortcut to configure the Ollama model."
+    )
+
+    parser.add_argument(
+        "--batch-status",
+        action="store_true",
+        help="Show the status of submitted batch jobs."
+    )
+
+    parser.add_argument(
+        "--provider",
+        choices=["ollama", "openrouter", "gemini", "mistral"],
+        help="Override the default AI provider for this query only."
+    )
+
+    parser.add_argument(
+        "--read-file",
+        type=str,
+        metavar="<filepath>",
+        help="Read the specified file and use its content in the prompt. Your query will then be about this file."
+    )
+
+    parser.add_argument(
+        "--explain",
+        type=str,
+        metavar="<filepath>",
+        help="Read and automatically explain/summarize the specified file in its project context. Ignores general query."
+    )
+
+    parser.add_argument(
+        "--eval-mode",
+        action="store_true",
+        help=argparse.SUPPRESS
+    )
+
 def parse_args():
     """Parse command line arguments, ignoring --eval-mode and unknown arguments for shell integration compatibility."""
-    # Remove --eval-mode if present, to avoid argparse errors from shell integration
-    filtered_argv = [arg for arg in sys.argv[1:] if arg != "--eval-mode"]
+    # Remove --eval-mode if present, to avoid argparse errors from shell integration;
+    # whether it was there follows from the length, so sys.argv is scanned only once
+    argv = sys.argv[1:]
+    filtered_argv = [arg for arg in argv if arg != "--eval-mode"]
+    eval_mode = len(filtered_argv) != len(argv)
+    args = _fast_parse_args(filtered_argv)
+    if args is not None:
+        args.eval_mode = eval_mode
+        return args
+
     description_text = """TerminalAI: Your command-line AI assistant.
 Ask questions or request commands in natural language.
 
@@ -112,6 +275,7 @@ AVAILABLE FLAGS:
   --version         Show program's version number and exit.
   --set-default     Shortcut to set the default AI provider.
   --set-ollama      Shortcut to configure the Ollama model.
+  --batch-status    Show the status of submitted batch jobs.
   --provider        Override the default AI provider for this query only.
   --read-file <filepath>
                     Read the specified file (any plain text file) and use its content in the prompt.
@@ -159,61 +323,12 @@ Project: https://github.com/coaxialdolor/terminalai"""
         help=argparse.SUPPRESS
     )
 
-    parser.add_argument(
-        "--setup",
-        action="store_true",
-        help=argparse.SUPPRESS
-    )
-
-    parser.add_argument(
-        "--version",
-        action="store_true",
-        help=argparse.SUPPRESS
-    )
-
-    parser.add_argument(
-        "--chat",
-        action="store_true",
-        help=argparse.SUPPRESS
-    )
-
-    parser.add_argument(
-        "--set-default",
-        action="store_true",
-        help="Shortcut to set the default AI provider."
-    )
-
-    parser.add_argument(
-        "--set-ollama",
-        action="store_true",
-        help="Shortcut to configure the Ollama model."
-    )
-
-    parser.add_argument(
-        "--provider",
-        choices=["ollama", "openrouter", "gemini", "mistral"],
-        help="Override the default AI provider for this query only."
-    )
-
-    parser.add_argument(
-        "--read-file",
-        type=str,
-        metavar="<filepath>",
-        help="Read the specified file and use its content in the prompt. Your query will then be about this file."
-    )
-
-    parser.add_argument(
-        "--explain",
-        type=str,
-        metavar="<filepath>",
-        help="Read and automatically explain/summarize the specified file in its project context. Ignores general query."
-    )
-
-    parser.add_argument(
-        "--eval-mode",
-        action="store_true",
-        help=argparse.SUPPRESS
-    )
+    # The long options are only registered when the command line could use them
+    # (or help is requested); the common `ai "query"` path gets their defaults instead.
+    if any(arg.startswith("--") or arg == "-h" for arg in filtered_argv):
+        _add_long_options(parser)
+    else:
+        parser.set_defaults(**_LONG_OPTION_DEFAULTS)
 
     # Ensure --read-file and --explain are mutually exclusive
     args, unknown = parser.parse_known_args(filtered_argv)
@@ -221,24 +336,76 @@ Project: https://github.com/coaxialdolor/terminalai"""
         parser.error("argument --explain: not allowed with argument --read-file")
 
     # Check if --eval-mode was in original args but removed for parsing
-    if "--eval-mode" in sys.argv:
+    if eval_mode:
         args.eval_mode = True
 
     return args
 
 # --- Helper Function for AI Risk Assessment ---
 
-def _get_ai_risk_assessment(command, console, provider):
-    """Gets a risk assessment for a command using a secondary AI call."""
+def _risk_provider(console):
+    """Return the default provider for risk assessments, or None if it cannot be loaded.
+
+    Only called once a risky command turns up, so batches of safe commands never
+    touch the config or build a provider. get_provider() hands back the same
+    instance on later calls while the config is unchanged.
+    """
+    from rich.text import Text
+    try:
+        default_provider_name = load_config().get("default_provider")
+        if not default_provider_name:
+            return None
+        from terminalai.ai_providers import get_provider
+        return get_provider(default_provider_name)
+    except Exception as e:
+        console.print(Text(f"[WARNING] Could not load AI provider for risk assessment: {e}", style="yellow"))
+        return None
+
+_NO_RISK_PROVIDER = "Risk assessment requires a configured AI provider."
+
+# Minimum gap between the requests risk assessments send, for API rate limits
+_RISK_ASSESSMENT_INTERVAL = 1.5
+# time.monotonic() at which the latest reserved risk assessment is sent; 0 before the first one,
+# which is therefore sent straight away
+_last_risk_assessment = 0.0
+_risk_assessment_lock = threading.Lock()
+
+def _reserve_risk_assessment_slot():
+    """Reserve a send time for a risk assessment and return how long to wait for it.
+
+    An assessment only waits out what is left of the interval since the previous
+    one, so time the user spent reading the answer or at a prompt already counts.
+    Concurrent callers get consecutive slots.
+    """
+    global _last_risk_assessment
+    with _risk_assessment_lock:
+        now = time.monotonic()
+        send_at = max(now, _last_risk_assessment + _RISK_ASSESSMENT_INTERVAL)
+        _last_risk_assessment = send_at
+    return send_at - now
+
+def _get_ai_risk_assessment(command, console, provider=None, cwd=None):
+    """Gets a risk assessment for a command using a secondary AI call.
+
+    Args:
+        command (str): The command to assess.
+        console: Console for warnings about loading the provider.
+        provider: Provider to ask. Defaults to the configured default provider.
+        cwd (str): Working directory the command would run in. Defaults to os.getcwd().
+    """
+    if provider is None:
+        provider = _risk_provider(console)
     if not provider:
-        return "Risk assessment requires a configured AI provider."
+        return _NO_RISK_PROVIDER
 
     try:
-        cwd = os.getcwd()
+        cwd = cwd or os.getcwd()
         risk_query = f"<RISK_CONFIRMATION> Explain the potential consequences and dangers of running the following command(s) if my current working directory is '{cwd}':\n---\n{command}\n---"
 
-        # Increased delay for API rate limits
-        time.sleep(1.5)
+        # Delay for API rate limits
+        wait = _reserve_risk_assessment_slot()
+        if wait > 0:
+            time.sleep(wait)
 
         risk_response = provider.generate_response(
             risk_query,
@@ -253,6 +420,35 @@ def _get_ai_risk_assessment(command, console, provider):
     except Exception as e:
         return f"Risk assessment failed. Error: {e}"
 
+def _get_ai_risk_assessments(commands, console, cwd=None, max_workers=4):
+    """Assess several commands up front, with their requests in flight together.
+
+    Requests still start at least _RISK_ASSESSMENT_INTERVAL apart; only the waits
+    for the responses overlap.
+
+    Args:
+        commands (list): The commands to assess.
+        console: Console for warnings about loading the provider.
+        cwd (str): Working directory the commands would run in. Defaults to os.getcwd().
+        max_workers (int): Maximum number of assessments in flight at once.
+
+    Returns:
+        dict: Command -> risk explanation.
+    """
+    if not commands:
+        return {}
+    # Load the provider (and warn about it) once for the whole batch
+    provider = _risk_provider(console)
+    if not provider:
+        return {cmd: _NO_RISK_PROVIDER for cmd in commands}
+    cwd = cwd or os.getcwd()
+    if len(commands) == 1:
+        return {commands[0]: _get_ai_risk_assessment(commands[0], console, provider, cwd)}
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(commands))) as executor:
+        explanations = executor.map(lambda cmd: _get_ai_risk_assessment(cmd, console, provider, cwd), commands)
+        return dict(zip(commands, explanations))
+
 # List of safe informational commands that can be auto-executed
 SAFE_INFORMATIONAL_COMMANDS = [
     'ls', 'wc', 'find', 'du', 'df', 'grep', 'cat', 'head', 'tail', 
@@ -318,9 +514,153 @@ def is_purely_informational(commands):
 
 # --- Main Command Handling Logic ---
 
+# An Enter that arrives this soon after a prompt was typed ahead (e.g. after "y" for the
+# previous prompt), so it is not taken as the answer
+_TYPEAHEAD_SECONDS = 0.05
+
+def _read_key():
+    """Read a single keypress from the terminal, without waiting for Enter.
+
+    Anything typed after the key (such as an Enter following "y") is discarded, and an
+    Enter already waiting when the prompt appears is skipped, so one answer can never
+    carry over to the next prompt.
+
+    Returns:
+        str: The key ("" at end of input), or None when stdin is not a terminal
+            and the caller should read a line instead.
+    """
+    if not sys.stdin.isatty():
+        return None
+    try:
+        import termios
+        import tty
+    except ImportError:  # Windows
+        try:
+            import msvcrt
+        except ImportError:
+            return None
+        while True:
+            shown_at = time.monotonic()
+            key = msvcrt.getwch()
+            if key not in "\r\n" or time.monotonic() - shown_at >= _TYPEAHEAD_SECONDS:
+                break
+        while msvcrt.kbhit():
+            msvcrt.getwch()
+        return key
+
+    fd = sys.stdin.fileno()
+    try:
+        old_attrs = termios.tcgetattr(fd)
+    except termios.error:
+        return None
+    try:
+        # cbreak keeps Ctrl-C working; os.read skips sys.stdin's buffer so later input() calls stay in step
+        tty.setcbreak(fd)
+        while True:
+            shown_at = time.monotonic()
+            key = os.read(fd, 1).decode(errors="ignore")
+            if not key or key not in "\r\n" or time.monotonic() - shown_at >= _TYPEAHEAD_SECONDS:
+                break
+        termios.tcflush(fd, termios.TCIFLUSH)
+        return key
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_attrs)
+
+def _confirm(default=False, single_key=True):
+    """Read a yes/no answer from stdin.
+
+    On a terminal, and with single_key, one keypress answers: 'y' or 'Y' for yes,
+    Enter for the default, any other key for no. Otherwise a whole line is read and
+    its first character decides. Risky and stateful confirmations read a line so
+    they always take a deliberate answer.
+
+    Args:
+        default (bool): Answer used when the user just presses Enter.
+        single_key (bool): Answer on a single keypress when stdin is a terminal.
+
+    Returns:
+        bool: True for a yes. End of input counts as no.
+    """
+    key = _read_key() if single_key else None
+    if key is None:
+        try:
+            answer = input().strip()
+        except EOFError:
+            return False
+        if not answer:
+            return default
+        return answer[0] in "yY"
+
+    if key == "\x03":  # Ctrl-C as read by msvcrt
+        raise KeyboardInterrupt
+    # Echo the answer on stderr, which stays out of the command printed in eval mode
+    end_of_input = key in ("", "\x04", "\x1a")
+    print("" if end_of_input or key in "\r\n" else key, file=sys.stderr)
+    if end_of_input:
+        return False
+    if key in "\r\n":
+        return default
+    return key in "yY"
+
+def _print_risk_assessment(console, risk_explanation):
+    """Show a risk assessment from _get_ai_risk_assessment() in its panel."""
+    from rich.panel import Panel
+    from rich.text import Text
+    console.print(Panel(
+        Text(risk_explanation, style="yellow"),
+        title="[bold red]AI Risk Assessment[/bold red]",
+        border_style="red",
+        expand=False
+    ))
+
+def _confirm_and_run(command, console, is_stateful, is_risky, auto_confirm=False, ask=True):
+    """Handle one command the way its classification asks for.
+
+    Stateful commands are offered for the clipboard instead of being run, since they
+    could not change the user's shell from here. Risky commands always need an explicit
+    'y'. Other commands run straight away with auto_confirm or when ask is False, and
+    otherwise ask first, defaulting to yes.
+
+    Args:
+        command (str): The command to handle.
+        console: Console for prompts and messages.
+        is_stateful (bool): Whether the command changes shell state.
+        is_risky (bool): Whether the command is risky.
+        auto_confirm (bool): Run safe commands without asking; passed on to run_command().
+        ask (bool): Whether safe commands need confirming when auto_confirm is off.
+    """
+    from rich.text import Text
+    if is_stateful:
+        prompt_text = (
+            f"[STATEFUL COMMAND] '{command}' changes shell state. "
+            "Copy to clipboard? [Y/n]: "
+        )
+        console.print(Text(prompt_text, style="yellow bold"), end="")
+        if _confirm(default=True, single_key=False): # Default to yes (copy)
+            copy_to_clipboard(command)
+            console.print("[green]Command copied to clipboard. Paste and run manually.[/green]")
+        return
+
+    if not is_risky and (auto_confirm or not ask):
+        run_command(command, auto_confirm=auto_confirm)
+        return
+
+    # Risky commands always require confirmation and default to no
+    prompt_style, choices = ("red bold", "[y/N]") if is_risky else ("green", "[Y/n]")
+    prompt_msg_text = Text("[RISKY] Execute '" if is_risky else "Execute '", style=prompt_style)
+    prompt_msg_text.append(command, style=prompt_style + " underline")
+    prompt_msg_text.append(f"'? {choices}: ", style=prompt_style)
+    console.print(prompt_msg_text, end="")
+    if _confirm(default=not is_risky, single_key=not is_risky):
+        run_command(command, auto_confirm=auto_confirm)
+    else:
+        console.print(f"[Skipped: {command}]")
+
 def handle_commands(commands, auto_confirm=False):
     """Handle extracted commands, prompting the user and executing if confirmed."""
-    console = Console()
+    from rich.panel import Panel
+    from rich.text import Text
+    console = _get_console()
 
     # Check for silent auto-execution of safe informational commands
     is_safe, filtered_commands = is_purely_informational(commands)
@@ -332,21 +672,12 @@ def handle_commands(commands, auto_confirm=False):
     # Check if stdin is a terminal or a pipe
     is_interactive = sys.stdin.isatty()
 
-    provider_instance = None
-    if commands:
-        try:
-            config = load_config()
-            default_provider_name = config.get("default_provider")
-            if default_provider_name:
-                provider_instance = get_provider(default_provider_name)
-        except Exception as e:
-            console.print(Text(f"[WARNING] Could not load AI provider for risk assessment: {e}", style="yellow"))
-            # provider_instance remains None
-
     if not commands:
         return
 
     n_commands = len(commands)
+    # Commands run in child processes, so the working directory stays put for every assessment
+    cwd = os.getcwd()
 
     color_reset = "\033[0m"
     color_bold_green = "\033[1;32m"
@@ -363,8 +694,7 @@ def handle_commands(commands, auto_confirm=False):
         # If not auto-confirm but we have commands, execute the first one automatically
         elif n_commands == 1:
             command = commands[0]
-            is_stateful_cmd = is_stateful_command(command)
-            is_risky_cmd = is_risky_command(command)
+            is_stateful_cmd, is_risky_cmd = classify_command(command)
 
             if is_stateful_cmd:
                 console.print("[yellow]Stateful command detected in non-interactive mode. Command will be copied to clipboard.[/yellow]")
@@ -386,8 +716,7 @@ def handle_commands(commands, auto_confirm=False):
             console.print("[yellow]First command will be executed automatically if not risky or stateful.[/yellow]")
 
             cmd_first = commands[0]
-            is_stateful_first = is_stateful_command(cmd_first)
-            is_risky_first = is_risky_command(cmd_first)
+            is_stateful_first, is_risky_first = classify_command(cmd_first)
 
             if is_stateful_first:
                 console.print("[yellow]First command is stateful. Command will be copied to clipboard.[/yellow]")
@@ -407,66 +736,10 @@ def handle_commands(commands, auto_confirm=False):
     # Proceed with normal interactive handling
     if n_commands == 1:
         command = commands[0]
-        is_stateful_cmd = is_stateful_command(command)
-        is_risky_cmd = is_risky_command(command)
-
-        if is_risky_cmd:
-            risk_explanation = _get_ai_risk_assessment(command, console, provider_instance)
-            console.print(Panel(
-                Text(risk_explanation, style="yellow"),
-                title="[bold red]AI Risk Assessment[/bold red]",
-                border_style="red",
-                expand=False
-            ))
-
-        # Always handle stateful commands the same way, regardless of auto_confirm
-        if is_stateful_cmd:
-            prompt_text = (
-                f"[STATEFUL COMMAND] '{command}' changes shell state. "
-                "Copy to clipboard? [Y/n]: "
-            )
-            console.print(Text(prompt_text, style="yellow bold"), end="")
-            choice = input().lower() or "y" # Default to yes (copy)
-            if choice == 'y':
-                copy_to_clipboard(command)
-                console.print("[green]Command copied to clipboard. Paste and run manually.[/green]")
-            return # Done with this single stateful command
-
-        # Auto-confirm for non-stateful, non-risky commands
-        if auto_confirm and not is_risky_cmd:
-            console.print(Text("\n[Auto-executing command]", style="bold blue"))
-            console.print(Panel(Text(command, style="cyan bold"),
-                               border_style="blue",
-                               expand=False))
-            run_command(command, auto_confirm=True)
-            return
-
-        # Risky commands always require confirmation
+        is_stateful_cmd, is_risky_cmd = classify_command(command)
         if is_risky_cmd:
-            prompt_style = "red bold"
-            prompt_msg_text = Text("[RISKY] Execute '", style=prompt_style)
-            prompt_msg_text.append(command, style=prompt_style + " underline")
-            prompt_msg_text.append("'? [y/N]: ", style=prompt_style)
-            console.print(prompt_msg_text, end="")
-            choice = input().lower() or "n"  # Default to no for risky
-            if choice == "y":
-                run_command(command, auto_confirm=auto_confirm)
-            else:
-                console.print("[Cancelled]")
-            return
-
-        # Regular non-risky, non-stateful command without auto_confirm
-        prompt_style = "green"
-        prompt_msg_text = Text("Execute '", style=prompt_style)
-        prompt_msg_text.append(command, style=prompt_style + " underline")
-        prompt_msg_text.append("'? [Y/n]: ", style=prompt_style)
-        console.print(prompt_msg_text, end="")
-        choice = input().lower() or "y"  # Default to yes
-
-        if choice == "y":
-            run_command(command, auto_confirm=auto_confirm)
-        else:
-            console.print("[Cancelled]")
+            _print_risk_assessment(console, _get_ai_risk_assessment(command, console, cwd=cwd))
+        _confirm_and_run(command, console, is_stateful_cmd, is_risky_cmd, auto_confirm=auto_confirm)
         return
 
     # Multiple commands
@@ -474,53 +747,33 @@ def handle_commands(commands, auto_confirm=False):
         # Auto-confirm case for multiple commands
         if auto_confirm:
             for cmd_item in commands:
-                is_stateful_item = is_stateful_command(cmd_item)
-                is_risky_item = is_risky_command(cmd_item)
+                is_stateful_item, is_risky_item = classify_command(cmd_item)
 
                 if is_stateful_item:
                     copy_to_clipboard(cmd_item)
                     console.print(f"[green]Command copied to clipboard: {cmd_item}[/green]")
-                elif not is_risky_item:
-                    console.print(f"[green]Auto-executing: {cmd_item}[/green]")
-                    run_command(cmd_item, auto_confirm=True)
-                else:
+                    continue
+                if is_risky_item:
                     # For risky commands, show assessment and ask for confirmation
-                    risk_explanation = _get_ai_risk_assessment(cmd_item, console, provider_instance)
-                    console.print(Panel(
-                        Text(risk_explanation, style="yellow"),
-                        title="[bold red]AI Risk Assessment[/bold red]",
-                        border_style="red",
-                        expand=False
-                    ))
-                    prompt_style = "red bold"
-                    prompt_msg_text = Text("[RISKY] Execute '", style=prompt_style)
-                    prompt_msg_text.append(cmd_item, style=prompt_style + " underline")
-                    prompt_msg_text.append("'? [y/N]: ", style=prompt_style)
-                    console.print(prompt_msg_text, end="")
-                    choice = input().lower() or "n"  # Default to no for risky commands
-                    if choice == "y":
-                        run_command(cmd_item, auto_confirm=auto_confirm)
-                    else:
-                        console.print(f"[Skipped: {cmd_item}]")
+                    _print_risk_assessment(console, _get_ai_risk_assessment(cmd_item, console, cwd=cwd))
+                _confirm_and_run(cmd_item, console, False, is_risky_item, auto_confirm=True)
             return
 
+        # Classified once here; the list display and whichever choice follows reuse it
+        classified = [classify_command(cmd) for cmd in commands]
+
         # Display command list and prompt for selection (not auto_confirm)
-        cmd_list_display = []
-        for i, cmd_text_item in enumerate(commands, 1):
-            is_risky_item = is_risky_command(cmd_text_item)
-            is_stateful_item = is_stateful_command(cmd_text_item)
-
-            display_item = Text()
-            display_item.append(f"{i}", style="cyan")
-            display_item.append(f": {cmd_text_item}", style="white")
+        # Built as a single Text for the panel content, one line per command
+        panel_content = Text()
+        for i, (cmd_text_item, (is_stateful_item, is_risky_item)) in enumerate(zip(commands, classified), 1):
+            if i > 1:
+                panel_content.append("\n")
+            panel_content.append(f"{i}", style="cyan")
+            panel_content.append(f": {cmd_text_item}", style="white")
             if is_risky_item:
-                display_item.append(" [RISKY]", style="bold red")
+                panel_content.append(" [RISKY]", style="bold red")
             if is_stateful_item:
-                display_item.append(" [STATEFUL]", style="bold yellow")
-            cmd_list_display.append(display_item)
-
-        # Create a single Text object for the panel content
-        panel_content = Text("\n").join(cmd_list_display)
+                panel_content.append(" [STATEFUL]", style="bold yellow")
         console.print(Panel(
             panel_content,
             title=f"Found {n_commands} commands",
@@ -536,85 +789,26 @@ def handle_commands(commands, auto_confirm=False):
 
         elif user_choice == "a":
             console.print(Text("Executing all non-stateful/non-risky (unless auto-confirmed) commands:", style="magenta"))
-            for i, cmd_item in enumerate(commands):
+            risk_explanations = _get_ai_risk_assessments(
+                [cmd for cmd, (_, is_risky) in zip(commands, classified) if is_risky], console, cwd
+            )
+            for i, (cmd_item, (is_stateful_item, is_risky_item)) in enumerate(zip(commands, classified)):
                 console.print(f"Processing command {i+1}: {cmd_item}")
-                is_stateful_item = is_stateful_command(cmd_item)
-                is_risky_item = is_risky_command(cmd_item)
-
                 if is_risky_item:
-                    risk_explanation = _get_ai_risk_assessment(cmd_item, console, provider_instance)
-                    console.print(Panel(
-                        Text(risk_explanation, style="yellow"),
-                        title="[bold red]AI Risk Assessment[/bold red]",
-                        border_style="red",
-                        expand=False
-                    ))
-
-                if is_stateful_item:
-                    copy_prompt_text = Text(f"[STATEFUL COMMAND] '{cmd_item}'. Copy to clipboard? [Y/n]: ", style="yellow bold")
-                    console.print(copy_prompt_text, end="")
-                    sub_choice = input().lower() or "y"
-                    if sub_choice == 'y':
-                        copy_to_clipboard(cmd_item)
-                        console.print("[green]Command copied to clipboard.[/green]")
-                    continue # Move to next command in 'a'
-
-                # Non-stateful command in 'a'
-                if auto_confirm and not is_risky_item:
-                    console.print(f"[green]Auto-executing: {cmd_item}[/green]")
-                    run_command(cmd_item, auto_confirm=True)
-                elif is_risky_item: # Needs explicit confirmation even in 'a' if not auto_confirm
-                    exec_prompt_text = Text(f"[RISKY] Execute '{cmd_item}'? [y/N]: ", style="red bold")
-                    console.print(exec_prompt_text, end="")
-                    sub_choice = input().lower() or "n"
-                    if sub_choice == "y":
-                        run_command(cmd_item, auto_confirm=auto_confirm)
-                    else:
-                        console.print(f"[Skipped: {cmd_item}]")
-                else: # Not risky, not stateful, not auto_confirm - prompt for this specific one in 'a'
-                    exec_prompt_text = Text(f"Execute '{cmd_item}'? [Y/n]: ", style="green")
-                    console.print(exec_prompt_text, end="")
-                    sub_choice = input().lower() or "y"
-                    if sub_choice == "y":
-                        run_command(cmd_item, auto_confirm=auto_confirm)
-                    else:
-                        console.print(f"[Skipped: {cmd_item}]")
+                    _print_risk_assessment(console, risk_explanations[cmd_item])
+                _confirm_and_run(cmd_item, console, is_stateful_item, is_risky_item, auto_confirm=auto_confirm)
             return
 
         elif user_choice.isdigit():
             idx = int(user_choice) - 1
             if 0 <= idx < len(commands):
                 cmd_to_run = commands[idx]
-                is_stateful_cmd_num = is_stateful_command(cmd_to_run)
-                is_risky_cmd_num = is_risky_command(cmd_to_run)
-
+                is_stateful_cmd_num, is_risky_cmd_num = classified[idx]
                 if is_risky_cmd_num:
-                    risk_explanation_num = _get_ai_risk_assessment(cmd_to_run, console, provider_instance)
-                    console.print(Panel(
-                        Text(risk_explanation_num, style="yellow"),
-                        title="[bold red]AI Risk Assessment[/bold red]",
-                        border_style="red",
-                        expand=False
-                    ))
-
-                if is_stateful_cmd_num:
-                    copy_prompt_text_num = Text(f"[STATEFUL COMMAND] '{cmd_to_run}'. Copy to clipboard? [Y/n]: ", style="yellow bold")
-                    console.print(copy_prompt_text_num, end="")
-                    sub_choice_num = input().lower() or "y"
-                    if sub_choice_num == 'y':
-                        copy_to_clipboard(cmd_to_run)
-                        console.print("[green]Command copied to clipboard.[/green]")
-                elif is_risky_cmd_num: # Not stateful, but risky
-                    exec_prompt_text_num = Text(f"[RISKY] Execute '{cmd_to_run}'? [y/N]: ", style="red bold")
-                    console.print(exec_prompt_text_num, end="")
-                    sub_choice_num = input().lower() or "n"
-                    if sub_choice_num == "y":
-                        run_command(cmd_to_run, auto_confirm=auto_confirm)
-                    else:
-                        console.print("[Cancelled]")
-                else: # Not stateful, not risky - chosen by number, execute directly.
-                    console.print(f"[green]Executing selected command: {cmd_to_run}[/green]")
-                    run_command(cmd_to_run, auto_confirm=auto_confirm)
+                    _print_risk_assessment(console, _get_ai_risk_assessment(cmd_to_run, console, cwd=cwd))
+                # Picking a safe command by number is confirmation enough
+                _confirm_and_run(cmd_to_run, console, is_stateful_cmd_num, is_risky_cmd_num,
+                                 auto_confirm=auto_confirm, ask=False)
             else:
                 console.print(f"[red]Invalid choice: {user_choice}[/red]")
             return
@@ -625,6 +819,43 @@ def handle_commands(commands, auto_confirm=False):
     # Should be unreachable if all paths above return
     return
 
+# Lines of a command's stdout (and stderr) kept for display; earlier output is dropped as it streams
+_RESULT_TAIL_LINES = 10_000
+
+def _run_keeping_tail(args, shell=False, max_lines=_RESULT_TAIL_LINES):
+    """Run a command and read its output as it arrives, keeping only the last lines.
+
+    Memory stays bounded however much the command prints (e.g. `find /`).
+    stderr is drained on a second thread so neither pipe can fill up and block the command.
+
+    Args:
+        args: Argument list, or the command string when shell is True.
+        shell (bool): Run the command through the shell.
+        max_lines (int): Number of trailing lines to keep from each stream.
+
+    Returns:
+        tuple: (process, stdout_lines, stderr_lines, dropped), where dropped is the
+            number of earlier stdout lines that were discarded.
+    """
+    import subprocess
+    from collections import deque
+
+    process = subprocess.Popen(args, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    stderr_tail = deque(maxlen=max_lines)
+    stderr_reader = threading.Thread(target=stderr_tail.extend, args=(process.stderr,), daemon=True)
+    stderr_reader.start()
+
+    stdout_tail = deque(maxlen=max_lines)
+    total = 0
+    with process.stdout:
+        for line in process.stdout:
+            stdout_tail.append(line)
+            total += 1
+    stderr_reader.join()
+    process.stderr.close()
+    process.wait()
+    return process, stdout_tail, stderr_tail, total - len(stdout_tail)
+
 def run_command(command, auto_confirm=False, silent=False):
     """Execute a shell command with error handling.
 
@@ -633,18 +864,20 @@ def run_command(command, auto_confirm=False, silent=False):
         auto_confirm: If True, execute without confirmation prompt
         silent: If True, suppress 'Executing...' panels
     """
-    console = Console()
+    from rich.panel import Panel
+    from rich.text import Text
+    console = _get_console()
 
     if not command:
         return
 
-    if not is_shell_command(command) and not auto_confirm:
+    looks_like_command = is_shell_command(command)
+    if not looks_like_command and not auto_confirm:
         console.print(f"[yellow]Warning: '{command}' doesn't look like a valid shell command.[/yellow]")
         console.print("[yellow]Execute anyway? [y/N]:[/yellow]", end=" ")
-        choice = input().lower()
-        if choice != "y":
+        if not _confirm():
             return
-    elif not is_shell_command(command) and auto_confirm:
+    elif not looks_like_command and auto_confirm:
         console.print(f"[yellow]Warning: '{command}' doesn't look like a valid shell command. Executing anyway due to auto-confirm.[/yellow]")
 
     # Display different message based on auto-confirm
@@ -661,49 +894,34 @@ def run_command(command, auto_confirm=False, silent=False):
                                expand=False))
 
     # Capture the output to display it properly
-    import subprocess
     import shlex
     import platform
 
     # On Windows, many commands are shell built-ins (e.g., 'dir'). Always use the shell there.
     system_name = platform.system()
 
-    # Check if command contains shell operators (|, >, <, &&, ||, ;, etc.)
-    has_shell_operators = any(op in command for op in ['|', '>', '<', '&&', '||', ';', '$', '`', '*', '?', '{', '['])
+    # Check if command contains shell operators (|, >, <, &&, ||, ;, etc.) or expansions
+    has_shell_operators = _needs_shell(command)
+
+    # On Windows, and for commands with shell operators, run through the shell;
+    # otherwise split the command with shlex and run it directly
+    use_shell = system_name == "Windows" or has_shell_operators
 
     try:
-        # Run the command and capture its output
-        if system_name == "Windows":
-            process = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-        elif has_shell_operators:
-            # Use shell=True for commands with shell operators
-            process = subprocess.run(
-                command,  # Pass command as string when using shell=True
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-        else:
-            # Use shlex.split for regular commands without shell operators
-            process = subprocess.run(
-                shlex.split(command),
-                capture_output=True,
-                text=True,
-                check=False,
-            )
+        # Run the command, keeping only the tail of its output
+        process, stdout_tail, stderr_tail, dropped = _run_keeping_tail(
+            command if use_shell else shlex.split(command), shell=use_shell
+        )
+        output = "".join(stdout_tail).strip()
 
         # Show command output with a clear label
-        if process.stdout:
+        if output:
+            title = "[bold cyan]Command Result[/bold cyan]"
+            if dropped:
+                title = f"[bold cyan]Command Result (last {len(stdout_tail)} lines)[/bold cyan]"
             console.print(Panel(
-                process.stdout.strip(),
-                title="[bold cyan]Command Result[/bold cyan]",
+                output,
+                title=title,
                 title_align="center",
                 border_style="cyan",
                 padding=(1, 2),
@@ -713,8 +931,9 @@ def run_command(command, auto_confirm=False, silent=False):
         # Show any errors
         if process.returncode != 0:
             console.print(f"[bold red]Command failed with exit code {process.returncode}[/bold red]")
-            if process.stderr:
-                console.print(f"[red]Error: {process.stderr.strip()}[/red]")
+            error = "".join(stderr_tail).strip()
+            if error:
+                console.print(f"[red]Error: {error}[/red]")
             return False
 
         return True
@@ -724,7 +943,14 @@ def run_command(command, auto_confirm=False, silent=False):
 
 def interactive_mode(chat_mode=False):
     """Run TerminalAI in interactive mode. If chat_mode is True, stay in a loop."""
-    console = Console()
+    from rich.panel import Panel
+    from rich.text import Text
+    from rich.rule import Rule
+    from terminalai.shell_integration import get_system_context
+    from terminalai.formatting import print_ai_answer_with_rich
+    # The provider stack is imported on first use so the CLI's other paths stay light
+    from terminalai.ai_providers import get_provider
+    console = _get_console()
 
     # Check if stdin is a terminal or a pipe
     is_interactive = sys.stdin.isatty()
@@ -794,10 +1020,11 @@ def interactive_mode(chat_mode=False):
             elif cleaned_response.lower().startswith("ai:"):
                 cleaned_response = cleaned_response[3:].lstrip()
 
-            print_ai_answer_with_rich(cleaned_response)
+            segments = parse_response(cleaned_response)
+            print_ai_answer_with_rich(cleaned_response, segments=segments)
 
             # Extract and handle commands with auto-execute for first non-risky command
-            commands = get_commands_interactive(cleaned_response, max_commands=3)
+            commands = get_commands_interactive(cleaned_response, max_commands=3, segments=segments)
             if commands:
                 # Auto-confirm in pipe mode for non-interactive use
                 handle_commands(commands, auto_confirm=True)
@@ -813,6 +1040,11 @@ def interactive_mode(chat_mode=False):
             traceback.print_exc()
             return
 
+    # Warm up the default provider's connection while the user types the first question
+    warm_provider = get_provider(load_config().get("default_provider", ""))
+    if warm_provider:
+        warm_provider.prewarm()
+
     while True:
         # Add visual separation between interactions
         console.print("")
@@ -845,7 +1077,8 @@ def interactive_mode(chat_mode=False):
 
         system_context = get_system_context()
 
-        provider = get_provider(load_config().get("default_provider", ""))
+        # Reuse the config read for the prompt above rather than loading it again
+        provider = get_provider(current_config.get("default_provider", ""))
         if not provider:
             console.print("[bold red]No AI provider configured. Please run 'ai setup' first.[/bold red]")
             break
@@ -888,10 +1121,11 @@ def interactive_mode(chat_mode=False):
                 # Strip "ai:" and then any leading whitespace
                 cleaned_response = temp_response[3:].lstrip()
 
-            print_ai_answer_with_rich(cleaned_response) # Pass cleaned response
+            segments = parse_response(cleaned_response)
+            print_ai_answer_with_rich(cleaned_response, segments=segments) # Pass cleaned response
 
             # Extract and handle commands from the CLEANED response
-            commands = get_commands_interactive(cleaned_response, max_commands=3)
+            commands = get_commands_interactive(cleaned_response, max_commands=3, segments=segments)
 
             if commands:
                 handle_commands(commands, auto_confirm=False)
@@ -917,16 +1151,18 @@ def interactive_mode(chat_mode=False):
     sys.exit(0)
 
 # New refactored function for setting default provider
-def _set_default_provider_interactive(console: Console):
+def _set_default_provider_interactive(console: "Console"):
     """Interactively sets the default AI provider and saves it to config."""
     config = load_config()
     providers = list(config['providers'].keys())
     console.print("\n[bold]Available providers:[/bold]")
+    provider_lines = []
     for idx, p_item in enumerate(providers, 1):
         is_default = ""
         if p_item == config.get('default_provider'):
             is_default = ' (default)'
-        console.print(f"[bold yellow]{idx}[/bold yellow]. {p_item}{is_default}")
+        provider_lines.append(f"[bold yellow]{idx}[/bold yellow]. {p_item}{is_default}")
+    console.print("\n".join(provider_lines))
     sel_prompt = f"[bold green]Select provider (1-{len(providers)}): [/bold green]"
     sel = console.input(sel_prompt).strip()
     if sel.isdigit() and 1 <= int(sel) <= len(providers):
@@ -940,8 +1176,18 @@ def _set_default_provider_interactive(console: Console):
         console.print("[red]Invalid selection.[/red]")
         return False
 
+def get_available_models():
+    """List the models installed on the configured Ollama server.
+
+    Returns:
+        A list of model dicts, or an "[Ollama API error] ..." string if the server is unreachable.
+    """
+    from terminalai.ai_providers import OllamaProvider, HttpSettings
+    host = load_config().get("providers", {}).get("ollama", {}).get("host", "http://localhost:11434")
+    return OllamaProvider(host, http_settings=HttpSettings(timeout=5)).list_models()
+
 # New refactored function for setting Ollama model
-def _set_ollama_model_interactive(console: Console):
+def _set_ollama_model_interactive(console: "Console"):
     """Interactively sets the Ollama model and saves it to config."""
     import sys
     import os
@@ -975,6 +1221,7 @@ def _set_ollama_model_interactive(console: Console):
     current_model = config['providers'][pname].get('model', 'llama3')
     console.print(f"Current Ollama model: {current_model}")
 
+    import requests
     available_models = []
     try:
         tags_url = f"{host_to_use}/api/tags"
@@ -982,18 +1229,18 @@ def _set_ollama_model_interactive(console: Console):
         sys.stdout.flush()
         if DEBUG:
             print(f"[DEBUG] About to fetch models from {tags_url}", file=sys.stderr)
-        response = requests.get(tags_url, timeout=5)
-        response.raise_for_status()
-        models_data = response.json().get("models", [])
+        from terminalai.ai_providers import OllamaProvider, HttpSettings
+        provider = OllamaProvider(host_to_use, http_settings=HttpSettings(timeout=5))
+        available_models = [m.get("name") for m in provider.iter_models() if m.get("name")]
         if DEBUG:
-            print(f"[DEBUG] Models data: {models_data}", file=sys.stderr)
-        if models_data:
-            available_models = [m.get("name") for m in models_data if m.get("name")]
+            print(f"[DEBUG] Models: {available_models}", file=sys.stderr)
 
         if available_models:
             console.print("[bold]Available Ollama models:[/bold]")
-            for i, model_name_option in enumerate(available_models, 1):
-                console.print(f"  [bold yellow]{i}[/bold yellow]. {model_name_option}")
+            console.print("\n".join(
+                f"  [bold yellow]{i}[/bold yellow]. {model_name_option}"
+                for i, model_name_option in enumerate(available_models, 1)
+            ))
             if DEBUG:
                 print(f"[DEBUG] Printed {len(available_models)} models", file=sys.stderr)
             model_choice_prompt = (
@@ -1060,8 +1307,40 @@ def _set_ollama_model_interactive(console: Console):
         print("[DEBUG] Exiting _set_ollama_model_interactive", file=sys.stderr)
     return True # Assuming success unless an unhandled exception occurs
 
+def _show_batch_status(console: "Console"):
+    """Print every recorded batch job with its current status from the provider."""
+    from requests import RequestException
+    from rich.markup import escape
+    from terminalai.ai_providers import load_batches, get_provider
+    batches = load_batches()
+    if not batches:
+        console.print("[yellow]No batch jobs have been submitted.[/yellow]")
+        return False
+
+    providers = {}
+    for batch_id, info in batches.items():
+        pname = info.get("provider", "")
+        if pname not in providers:
+            providers[pname] = get_provider(pname)
+        provider = providers[pname]
+        status = "unknown (provider not configured)"
+        if provider:
+            try:
+                status = provider.get_batch(batch_id).get("status", "unknown")
+            except (RequestException, NotImplementedError, KeyError) as e:
+                status = f"unavailable ({e})"
+        # Escaped, or Rich would read "[mistral]" as a markup tag and drop it
+        console.print(f"[bold yellow]{escape(batch_id)}[/bold yellow] {escape(f'[{pname}]')} "
+                      f"{info.get('prompts', '?')} prompts, submitted {escape(str(info.get('submitted_at', '?')))}: "
+                      f"[bold]{escape(str(status))}[/bold]")
+    return True
+
 def setup_wizard():
     """Run the setup wizard to configure TerminalAI."""
+    from rich.console import Console
+    from terminalai.shell_integration import (
+        install_shell_integration, uninstall_shell_integration, check_shell_integration
+    )
     console = Console()
 
     logo = '''
@@ -1106,9 +1385,12 @@ def setup_wizard():
             '11': "View information about TerminalAI, including version and links.",
             '12': "Exit the setup menu."
         }
+        # Render the whole menu in one print call rather than one write per option
+        menu_lines = []
         for opt in menu_options:
             num, desc = opt.split('.', 1)
-            console.print(f"[bold yellow]{num}[/bold yellow].[white]{desc}[/white]")
+            menu_lines.append(f"[bold yellow]{num}[/bold yellow].[white]{desc}[/white]")
+        console.print("\n".join(menu_lines))
         info_prompt = ("Type 'i' followed by a number (e.g., i1) "
                        "for more info about an option.")
         console.print(f"[dim]{info_prompt}[/dim]")
@@ -1159,8 +1441,9 @@ def setup_wizard():
             config = load_config()
             providers = list(config['providers'].keys())
             console.print("\n[bold]Providers:[/bold]")
-            for idx, p_item in enumerate(providers, 1):
-                console.print(f"[bold yellow]{idx}[/bold yellow]. {p_item}")
+            console.print("\n".join(
+                f"[bold yellow]{idx}[/bold yellow]. {p_item}" for idx, p_item in enumerate(providers, 1)
+            ))
             sel_prompt = (f"[bold green]Select provider to set API key/host "
                           f"(1-{len(providers)}): [/bold green]")
             sel = console.input(sel_prompt).strip()
@@ -1,8 +1,3 @@
-from pygments import highlight
-from pygments.lexers.shell import BashLexer
-from pygments.lexers.python import PythonLexer
-from pygments.lexers.special import TextLexer
-from pygments.formatters.terminal import TerminalFormatter
 import re
 
 # ANSI color codes - Revert to original color scheme
@@ -38,7 +33,17 @@ def colorize_prompt(text):
 def colorize_highlight(text):
     return f"{HIGHLIGHT_COLOR}{text}{RESET}"
 
+_FENCED_BLOCK_RE = re.compile(r'```(\w+)?\n([\s\S]*?)```')
+_INLINE_CODE_RE = re.compile(r'`([^`]+)`')
+
 def highlight_code_blocks(text):
+    # pygments is only needed here; importing it lazily keeps it off the CLI startup path
+    from pygments import highlight
+    from pygments.lexers.shell import BashLexer
+    from pygments.lexers.python import PythonLexer
+    from pygments.lexers.special import TextLexer
+    from pygments.formatters.terminal import TerminalFormatter
+
     # Highlight triple backtick code blocks
     def block_replacer(match):
         code = match.group(2)
@@ -50,11 +55,11 @@ def highlight_code_blocks(text):
         else:
             lexer = TextLexer()
         return highlight(code, lexer, TerminalFormatter())
-    text = re.sub(r'```(\w+)?\n([\s\S]*?)```', block_replacer, text)
+    text = _FENCED_BLOCK_RE.sub(block_replacer, text)
 
     # Highlight inline code (single backticks)
     def inline_replacer(match):
         code = match.group(1)
         return highlight(code, BashLexer(), TerminalFormatter()).strip()
-    text = re.sub(r'`([^`]+)`', inline_replacer, text)
+    text = _INLINE_CODE_RE.sub(inline_replacer, text)
     return text
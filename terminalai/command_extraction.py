@@ -1,5 +1,6 @@
 """Command extraction and detection functionality."""
 import re
+import functools
 
 # Constants for command detection (expanded)
 _BASE_KNOWN_COMMANDS = [
@@ -10,7 +11,8 @@ _BASE_KNOWN_COMMANDS = [
     "python", "pip", "brew", "apt", "yum", "dnf", "docker", "git", "npm", "node",
     "make", "gcc", "clang", "javac", "java", "mvn", "gradle", "cargo", "rustc",
     "go", "swift", "kotlin", "dotnet", "perl", "php", "ruby", "mvn", "jest",
-    "nano", "vim", "vi", "emacs", "pico", "subl", "code", "echo" # Added echo
+    "nano", "vim", "vi", "emacs", "pico", "subl", "code", "echo", # Added echo
+    "python3", "pip3"
 ]
 
 _WINDOWS_CMD_COMMANDS = [
@@ -26,16 +28,18 @@ _POWERSHELL_CMDLET_KEYWORDS = [ # Keywords from COMMON_POWERSHELL_CMDLET_STARTS
     "resolve-path", "get-date", "measure-object", "write-output", "write-host"
 ]
 
-KNOWN_COMMANDS = list(set(_BASE_KNOWN_COMMANDS + _WINDOWS_CMD_COMMANDS + _POWERSHELL_CMDLET_KEYWORDS))
+# Frozenset: membership is a single hash lookup instead of a scan over ~100 names
+KNOWN_COMMANDS = frozenset(_BASE_KNOWN_COMMANDS + _WINDOWS_CMD_COMMANDS + _POWERSHELL_CMDLET_KEYWORDS)
 
-STATEFUL_COMMANDS = [
+# Frozenset: is_stateful_command and is_likely_command probe this for every line
+STATEFUL_COMMANDS = frozenset({
     'cd', 'export', 'set', 'unset', 'alias', 'unalias', 'source', 'pushd', 'popd',
     'dirs', 'fg', 'bg', 'jobs', 'disown', 'exec', 'login', 'logout', 'exit',
     'kill', 'trap', 'shopt', 'enable', 'disable', 'declare', 'typeset',
     'readonly', 'eval', 'help', 'times', 'umask', 'wait', 'suspend', 'hash',
     'bind', 'compgen', 'complete', 'compopt', 'history', 'fc', 'getopts',
-    'let', 'local', 'read', 'readonly', 'return', 'shift', 'test', 'times'
-]
+    'let', 'local', 'read', 'return', 'shift', 'test'
+})
 
 RISKY_COMMANDS = [
     "rm", "dd", "chmod", "chown", "sudo", "mkfs", "fdisk", "diskpart",
@@ -43,145 +47,198 @@ RISKY_COMMANDS = [
     "reboot", "init", "mkpart", "gpart", "attrib", "takeown"
 ]
 
+# Any risky keyword as a substring, matched in one pass instead of one scan per keyword
+_RISKY_RE = re.compile('|'.join(re.escape(risky) for risky in RISKY_COMMANDS), re.IGNORECASE)
+
+# Patterns used by is_likely_command, compiled once
+_SHELL_OPERATOR_RE = re.compile(r'(?:\s|^)(?:\||&&|\|\||>|>>|<)(?:\s|$)')
+# Any known command as a whole word; longest names first so the alternation prefers them
+_KNOWN_COMMAND_WORD_RE = re.compile(
+    r'\b(?:' + "|".join(map(re.escape, sorted(KNOWN_COMMANDS, key=len, reverse=True))) + r')\b',
+    re.IGNORECASE
+)
+_OPTION_FLAG_RE = re.compile(r'\s(-[a-zA-Z0-9]|--[a-zA-Z0-9-]+)')
+_ENV_ASSIGNMENT_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*=.*\s+[a-zA-Z_]')
+_PATH_CHARS_RE = re.compile(r'[/\\~.]')
+
+# Fenced code block with an optional language tag (letters, digits, _, . and -).
+# The lookahead stops the tag from backtracking one character at a time, which made
+# an unclosed fence followed by a long word take quadratic time.
+_CODE_BLOCK_RE = re.compile(r'```(?:([a-zA-Z0-9_.-]+)(?![a-zA-Z0-9_.-]))?\n?([\s\S]*?)```')
+
 def is_likely_command(line):
     """Return True if the line looks like a shell command."""
+    if not line:
+        return False
+    # Callers usually pass stripped lines, and strip() then returns the same object
     line = line.strip()
-    if not line or line.startswith("#"):
+    if not line or line[0] == "#":
         return False
 
-    words = line.split()
-    if not words:
-        return False
+    first_word = line.split(None, 1)[0]
 
-    # Heuristic: Skip overly long lines that are likely prose
-    if len(words) > 15 and line[0].isupper():
-        return False
+    # The prose heuristics below only apply to capitalized lines, so only those
+    # pay for splitting the whole line into words
+    if line[0].isupper():
+        words = line.split()
 
-    # Heuristic: Skip lines that look like questions or full sentences ending with punctuation
-    if len(words) > 3 and line[0].isupper() and line[-1] in ['.', '!', '?']:
-        # More specific check for explanatory sentences like "This command will..."
-        if words[0].lower() in ["this", "the", "it", "that"] and \
-           any(verb in words for verb in ["command", "script", "will", "does", "is", "are"]):
+        # Heuristic: Skip overly long lines that are likely prose
+        if len(words) > 15:
             return False
-        # Avoid returning False for short, uppercased commands like "ECHO Hello"
-        if len(words) > 4: # Only return False if it's a longer sentence
-             return False
 
-    first_word_lower = words[0].lower()
+        # Heuristic: Skip lines that look like questions or full sentences ending with punctuation
+        if len(words) > 3 and line[-1] in ['.', '!', '?']:
+            # More specific check for explanatory sentences like "This command will..."
+            if first_word.lower() in ["this", "the", "it", "that"] and \
+               any(verb in words for verb in ["command", "script", "will", "does", "is", "are"]):
+                return False
+            # Avoid returning False for short, uppercased commands like "ECHO Hello"
+            if len(words) > 4: # Only return False if it's a longer sentence
+                 return False
+
+    first_word_lower = first_word.lower()
     
     if first_word_lower in KNOWN_COMMANDS or first_word_lower in STATEFUL_COMMANDS:
         return True
     
-    shell_operators_regex = r'(?:\s|^)(?:\||&&|\|\||>|>>|<)(?:\s|$)' # Non-capturing groups for spaces/start/end
-    if re.search(shell_operators_regex, line):
-        for cmd_keyword in KNOWN_COMMANDS:
-            if re.search(rf'\b{re.escape(cmd_keyword)}\b', line, re.IGNORECASE):
-                return True
-
-    known_cmds_pattern = "|".join(map(re.escape, KNOWN_COMMANDS))
-    option_flag_with_command_regex = rf'^(?:{known_cmds_pattern})\s+(-[a-zA-Z0-9]+(?:=[^\s]+)?|--[a-zA-Z0-9-]+(?:=[^\s]+)?)(?:\s|$)'
-    if re.search(option_flag_with_command_regex, line, re.IGNORECASE):
+    # A pipeline or redirect mentioning any known command
+    if _SHELL_OPERATOR_RE.search(line) and _KNOWN_COMMAND_WORD_RE.search(line):
         return True
-        
+
+    # A known command followed by options was already accepted by the first-word check
+    # above, so only unknown first words (scripts, paths, assignments) get this far.
     # Heuristic for commands like `some/path/script.sh --arg value` or `variable=value command`
-    if (re.search(r'\s(-[a-zA-Z0-9]|--[a-zA-Z0-9-]+)', line) or \
-        re.search(r'^[a-zA-Z_][a-zA-Z0-9_]*=.*\s+[a-zA-Z_]', line)) and \
-       (re.search(r'[/\\~.]', words[0]) or first_word_lower.endswith(('.sh', '.py', '.bat', '.ps1')) or first_word_lower in KNOWN_COMMANDS):
+    if (_OPTION_FLAG_RE.search(line) or _ENV_ASSIGNMENT_RE.search(line)) and \
+       (_PATH_CHARS_RE.search(first_word) or first_word_lower.endswith(('.sh', '.py', '.bat', '.ps1'))):
         if not first_word_lower.startswith(('http:', 'https:')):
             return True
 
     return False
 
-def extract_commands(ai_response, max_commands=None):
+def parse_response(ai_response):
+    """Split an AI response into render segments in a single pass.
+
+    Every fenced code block is matched once and each of its lines is classified
+    once, so rendering and command extraction can share the result.
+
+    Args:
+        ai_response (str): The raw response string from the AI.
+
+    Returns:
+        list: (kind, text) tuples in response order, where kind is one of
+            'text' (prose outside code blocks), 'cmd' (a command line inside a
+            block), 'code' (any other line in a block that holds commands) or
+            'block' (a whole stripped block that holds no commands).
+    """
+    # Plain prose is common; a substring check is much cheaper than starting the regex scan
+    if '```' not in ai_response:
+        return [('text', ai_response)]
+    segments = []
+    kinds = {}  # Lines repeated across blocks are classified once
+    last_end = 0
+    for match in _CODE_BLOCK_RE.finditer(ai_response):
+        segments.append(('text', ai_response[last_end:match.start()]))
+        block = []
+        has_command = False
+        for line in match.group(2).splitlines():
+            stripped = line.strip()
+            if not stripped:
+                continue
+            kind = kinds.get(stripped)
+            if kind is None:
+                kind = kinds[stripped] = 'cmd' if is_likely_command(stripped) else 'code'
+            block.append((kind, stripped))
+            has_command = has_command or kind == 'cmd'
+        if has_command:
+            segments.extend(block)
+        else:
+            segments.append(('block', match.group(2).strip()))
+        last_end = match.end()
+    segments.append(('text', ai_response[last_end:]))
+    return segments
+
+def extract_commands(ai_response, max_commands=None, segments=None):
     """
     Extract shell commands from AI response.
     It processes lines within any ```...``` code blocks using is_likely_command.
     This function is typically used for interactive mode (aliased as get_commands_interactive).
+    Pass segments from parse_response() to reuse a response that was already parsed.
     """
-    extracted_commands = []
-    code_block_pattern = re.compile(r'```([a-zA-Z0-9_\.-]*)?\n?([\s\S]*?)```') # Allow . and - in lang tag
-    
-    for match in code_block_pattern.finditer(ai_response):
-        block_content = match.group(2)
-        for line_in_block in block_content.splitlines():
-            stripped_line_in_block = line_in_block.strip()
-            if is_likely_command(stripped_line_in_block):
-                extracted_commands.append(stripped_line_in_block)
-                if max_commands and len(extracted_commands) >= max_commands:
-                    break
-        if max_commands and len(extracted_commands) >= max_commands:
-            break
-            
-    seen = set()
-    final_commands = []
-    for cmd in extracted_commands:
-        if cmd and cmd not in seen:
-            seen.add(cmd)
-            final_commands.append(cmd)
-    return final_commands
-
-def extract_commands_from_output(output_text, max_commands=None):
+    if segments is None:
+        segments = parse_response(ai_response)
+    seen, result = set(), []
+    for kind, text in segments:
+        if kind == 'cmd' and text not in seen:
+            seen.add(text)
+            result.append(text)
+            if max_commands and len(result) >= max_commands:
+                break
+    return result
+
+def extract_commands_from_output(output_text, max_commands=None, segments=None):
     """
     Extract shell commands from AI's textual output.
     It applies is_likely_command to lines inside ANY ```...``` code blocks
     AND to lines outside of any code blocks.
     This function is typically used for direct query mode.
+    Pass segments from parse_response() to reuse a response that was already parsed.
     """
-    extracted_commands = []
-    code_block_pattern = re.compile(r'```([a-zA-Z0-9_\.-]*)?\n?([\s\S]*?)```') # Allow . and - in lang tag
-    last_block_end = 0
-    processed_segments = []
-
-    for match in code_block_pattern.finditer(output_text):
-        plain_text_segment = output_text[last_block_end:match.start()]
-        processed_segments.append(plain_text_segment)
-        
-        block_content = match.group(2)
-        processed_segments.append(block_content) # Add block content itself as a segment to be line-split
-            
-        last_block_end = match.end()
-
-    remaining_plain_text = output_text[last_block_end:]
-    processed_segments.append(remaining_plain_text)
-
-    for segment in processed_segments:
-        for line_in_segment in segment.splitlines():
-            stripped_line_in_segment = line_in_segment.strip()
-            if is_likely_command(stripped_line_in_segment):
-                extracted_commands.append(stripped_line_in_segment)
-                if max_commands and len(extracted_commands) >= max_commands:
-                    break
-        if max_commands and len(extracted_commands) >= max_commands:
-            break
-            
-    seen = set()
-    final_commands = []
-    for cmd in extracted_commands:
-        if cmd and cmd not in seen:
-            seen.add(cmd)
-            final_commands.append(cmd)
-    return final_commands
+    if segments is None:
+        segments = parse_response(output_text)
+    seen, result = set(), []
+    for kind, text in segments:
+        if kind == 'cmd':
+            lines = (text,)
+        elif kind == 'text':
+            lines = (line.strip() for line in text.splitlines())
+        else:
+            continue
+        for stripped in lines:
+            # The seen check comes first so repeated lines are not classified again
+            if stripped and stripped not in seen and (kind == 'cmd' or is_likely_command(stripped)):
+                seen.add(stripped)
+                result.append(stripped)
+                if max_commands and len(result) >= max_commands:
+                    return result
+    return result
+
+def _command_head(cmd):
+    """Return the first word of the command, or '' for a blank command."""
+    if not cmd:
+        return ''
+    words = cmd.split(None, 1)
+    return words[0] if words else ''
 
+# The safety checks below are pure functions of the command string, and the
+# handlers re-check the same few commands throughout a session, so they are memoized
+@functools.lru_cache(maxsize=256)
 def is_stateful_command(cmd):
     """Return True if the command changes shell state."""
-    if not cmd:
-        return False
-    words = cmd.split()
-    if not words:
-        return False
-    first_word = words[0].lower()
-    return first_word in STATEFUL_COMMANDS
+    head = _command_head(cmd)
+    return bool(head) and head.lower() in STATEFUL_COMMANDS
 
+@functools.lru_cache(maxsize=256)
 def is_risky_command(cmd):
     """Return True if the command is potentially risky."""
-    if not cmd:
-        return False
-    words = cmd.split()
-    if not words:
-        return False
-    first_word_processed = words[0].lower()
-    return any(risky_cmd_keyword in first_word_processed for risky_cmd_keyword in RISKY_COMMANDS) or \
-           first_word_processed in RISKY_COMMANDS
+    head = _command_head(cmd)
+    return bool(head) and _RISKY_RE.search(head) is not None
+
+@functools.lru_cache(maxsize=256)
+def classify_command(cmd):
+    """Check a command for both shell-state changes and risk in one go.
+
+    The command is split once and the first word shared by both checks.
+
+    Args:
+        cmd (str): The command to classify.
+
+    Returns:
+        tuple: (is_stateful, is_risky) booleans.
+    """
+    head = _command_head(cmd)
+    if not head:
+        return False, False
+    return head.lower() in STATEFUL_COMMANDS, _RISKY_RE.search(head) is not None
 
 # Note: extract_commands_from_output was previously more limited.
 # The new version above is more comprehensive.
@@ -1,17 +1,46 @@
 import subprocess
+import sys
 import platform # Import platform module to check OS
 import os # Import os for path manipulation
 import re
 import shlex
 import tempfile
 
-COMMON_POWERSHELL_CMDLET_STARTS = [
+COMMON_POWERSHELL_CMDLET_STARTS = frozenset({
     "remove-item", "get-childitem", "copy-item", "move-item", "new-item", "set-location",
     "select-string", "get-content", "set-content", "clear-content", "start-process",
     "stop-process", "get-process", "get-service", "start-service", "stop-service",
     "invoke-webrequest", "invoke-restmethod", "get-command", "get-help", "test-path",
     "resolve-path", "get-date", "measure-object", "write-output", "write-host"
-] # Add more as needed, ensure lowercase
+}) # Add more as needed, ensure lowercase
+
+# First words that mark a string as a shell command
+_SHELL_BUILTINS = [
+    "cd", "export", "source", "alias", "unalias", "set", "unset",
+    "echo", "read", "eval", "exec", "pwd", "exit", "while", "for",
+    "if", "then", "fi", "return", "function", "break", "continue",
+    "pushd", "popd", "ls", "mv", "cp", "rm", "grep", "find", "cat",
+    "mkdir", "rmdir", "touch", "chmod", "chown", "curl", "wget",
+    "git", "python", "python3", "node", "npm", "yarn", "docker",
+    "make", "gcc", "go", "cargo", "rustc", "java", "javac", "mvn",
+    "sudo", "apt", "apt-get", "yum", "brew", "pip", "pip3", "gem",
+    "sh", "bash", "zsh",
+]
+
+_PLATFORM_BUILTINS = {
+    # macOS specific commands
+    "Darwin": ["open", "pbcopy", "pbpaste", "defaults", "softwareupdate", "xcode-select", "pkgutil", "osascript", "networksetup"],
+    # Linux specific commands
+    "Linux": ["systemctl", "journalctl", "apt", "apt-get", "yum", "dnf", "pacman"],
+    # Windows specific commands (matched with or without .exe extension)
+    "Windows": ["dir", "powershell", "cmd", "ipconfig", "ping", "netstat", "tasklist", "taskkill", "fc", "type"],
+}
+
+# Built once at import time; the OS does not change while we run
+_SYSTEM_NAME = platform.system()
+SHELL_BUILTINS = frozenset(_SHELL_BUILTINS + _PLATFORM_BUILTINS.get(_SYSTEM_NAME, []))
+
+_SUBSTITUTION_START_RE = re.compile(r'^(?:\$\(|`)\s*')
 
 def is_shell_command(command):
     """Check if a string looks like a shell command."""
@@ -19,45 +48,180 @@ def is_shell_command(command):
     if not command:
         return False
 
-    # Split the command on whitespace
-    parts = command.strip().split()
+    stripped = command.strip()
+    # Command substitution ($(...) or `...`) is shell syntax; classify the command inside it
+    if stripped[:1] in ("$", "`"):
+        stripped = _SUBSTITUTION_START_RE.sub('', stripped)
+
+    # Only the command name (the first word) matters, so don't split the rest
+    parts = stripped.split(None, 1)
     if not parts:
         return False
-
-    # Get the command name (first part before any spaces)
     cmd_name = parts[0]
 
-    # Check if it starts with a shell built-in
-    builtins = [
-        "cd", "export", "source", "alias", "unalias", "set", "unset",
-        "echo", "read", "eval", "exec", "pwd", "exit", "while", "for",
-        "if", "then", "fi", "return", "function", "break", "continue",
-        "pushd", "popd", "ls", "mv", "cp", "rm", "grep", "find", "cat",
-        "mkdir", "rmdir", "touch", "chmod", "chown", "curl", "wget",
-        "git", "python", "python3", "node", "npm", "yarn", "docker",
-        "make", "gcc", "go", "cargo", "rustc", "java", "javac", "mvn",
-        "sudo", "apt", "apt-get", "yum", "brew", "pip", "pip3", "gem",
-        "sh", "bash", "zsh",
-    ]
+    # Handle potential .exe extension in Windows
+    if _SYSTEM_NAME == "Windows" and cmd_name.endswith(".exe"):
+        cmd_name = cmd_name[:-4]
+
+    # Looks like a valid shell command if the first word is in our builtins list
+    return cmd_name in SHELL_BUILTINS
 
-    # Add macOS specific commands
-    if platform.system() == "Darwin":
-        builtins.extend(["open", "pbcopy", "pbpaste", "defaults", "softwareupdate", "xcode-select", "pkgutil", "osascript", "networksetup"])
+# Safe informational commands that should execute immediately
+INFORMATIONAL_PATTERNS = [
+    r'^ls(\s|$)',  # ls commands
+    r'^pwd(\s|$)',  # pwd command
+    r'^whoami(\s|$)',  # whoami command
+    r'^date(\s|$)',  # date command
+    r'^cat(\s|$)',  # cat command
+    r'^head(\s|$)',  # head command
+    r'^tail(\s|$)',  # tail command
+    r'^grep(\s|$)',  # grep command
+    r'^find(\s|$)',  # find command
+    r'^echo(\s|$)',  # echo command
+    r'^which(\s|$)',  # which command
+    r'^whereis(\s|$)',  # whereis command
+    r'^ps(\s|$)',  # ps command
+    r'^top(\s|$)',  # top command
+    r'^df(\s|$)',  # df command
+    r'^du(\s|$)',  # du command
+    r'^free(\s|$)',  # free command
+    r'^uname(\s|$)',  # uname command
+    r'^hostname(\s|$)',  # hostname command
+    r'^id(\s|$)',  # id command
+    r'^env(\s|$)',  # env command
+    r'^printenv(\s|$)',  # printenv command
+    r'^jobs(\s|$)',  # jobs command
+    r'^history(\s|$)',  # history command
+    r'^alias(\s|$)',  # alias command
+    r'^type(\s|$)',  # type command
+    r'^command(\s|$)',  # command command
+    r'^git\s+(status|log|diff|show|branch|remote|config)(\s|$)',  # git informational commands
+    r'^npm\s+(list|ls|info|show|view)(\s|$)',  # npm informational commands
+    r'^pip\s+(list|show|freeze)(\s|$)',  # pip informational commands
+    r'^python\s+--version|python\s+-V',  # python version
+    r'^node\s+--version|node\s+-v',  # node version
+    r'^java\s+--version|java\s+-version',  # java version
+    r'^gcc\s+--version|gcc\s+-v',  # gcc version
+    r'^clang\s+--version|clang\s+-v',  # clang version
+    r'^make\s+--version|make\s+-v',  # make version
+    r'^cmake\s+--version|cmake\s+-version',  # cmake version
+    r'^docker\s+(version|info|ps|images|logs)(\s|$)',  # docker informational commands
+    r'^kubectl\s+(version|get|describe|logs)(\s|$)',  # kubectl informational commands
+    r'^aws\s+(help|version)(\s|$)',  # aws informational commands
+    r'^gcloud\s+(help|version)(\s|$)',  # gcloud informational commands
+    r'^curl\s+--version|curl\s+-V',  # curl version
+    r'^wget\s+--version|wget\s+-V',  # wget version
+    r'^ssh\s+-V',  # ssh version
+    r'^rsync\s+--version|rsync\s+-V',  # rsync version
+    r'^tar\s+--version|tar\s+-V',  # tar version
+    r'^zip\s+--version|zip\s+-v',  # zip version
+    r'^unzip\s+--version|unzip\s+-v',  # unzip version
+    r'^gzip\s+--version|gzip\s+-V',  # gzip version
+    r'^bzip2\s+--version|bzip2\s+-V',  # bzip2 version
+    r'^xz\s+--version|xz\s+-V',  # xz version
+    r'^vim\s+--version|vim\s+-v',  # vim version
+    r'^nano\s+--version|nano\s+-V',  # nano version
+    r'^emacs\s+--version|emacs\s+-version',  # emacs version
+    r'^code\s+--version|code\s+-v',  # vscode version
+    r'^subl\s+--version|subl\s+-v',  # sublime version
+    r'^atom\s+--version|atom\s+-v',  # atom version
+]
 
-    # Add Linux specific commands
-    if platform.system() == "Linux":
-        builtins.extend(["systemctl", "journalctl", "apt", "apt-get", "yum", "dnf", "pacman"])
+# Safe command combinations (pipes that don't modify files)
+SAFE_PIPE_PATTERNS = [
+    r'^ls\s+\|\s+grep',  # ls piped to grep
+    r'^find\s+.*\|\s+grep',  # find piped to grep
+    r'^cat\s+.*\|\s+grep',  # cat piped to grep
+    r'^head\s+.*\|\s+grep',  # head piped to grep
+    r'^tail\s+.*\|\s+grep',  # tail piped to grep
+    r'^ps\s+\|\s+grep',  # ps piped to grep
+    r'^df\s+\|\s+grep',  # df piped to grep
+    r'^du\s+\|\s+grep',  # du piped to grep
+    r'^git\s+.*\|\s+grep',  # git commands piped to grep
+    r'^cat\s+.*\|\s+head',  # cat piped to head
+    r'^cat\s+.*\|\s+tail',  # cat piped to tail
+    r'^grep\s+.*\|\s+head',  # grep piped to head
+    r'^grep\s+.*\|\s+tail',  # grep piped to tail
+    r'^find\s+.*\|\s+head',  # find piped to head
+    r'^find\s+.*\|\s+tail',  # find piped to tail
+    r'^ls\s+.*\|\s+head',  # ls piped to head
+    r'^ls\s+.*\|\s+tail',  # ls piped to tail
+    r'^cat\s+.*\|\s+wc',  # cat piped to wc
+    r'^grep\s+.*\|\s+wc',  # grep piped to wc
+    r'^find\s+.*\|\s+wc',  # find piped to wc
+    r'^ls\s+.*\|\s+wc',  # ls piped to wc
+    r'^head\s+.*\|\s+wc',  # head piped to wc
+    r'^tail\s+.*\|\s+wc',  # tail piped to wc
+    r'^ps\s+\|\s+wc',  # ps piped to wc
+    r'^df\s+\|\s+wc',  # df piped to wc
+    r'^du\s+\|\s+wc',  # du piped to wc
+    r'^git\s+.*\|\s+wc',  # git commands piped to wc
+    r'^cat\s+.*\|\s+sort',  # cat piped to sort
+    r'^grep\s+.*\|\s+sort',  # grep piped to sort
+    r'^find\s+.*\|\s+sort',  # find piped to sort
+    r'^ls\s+.*\|\s+sort',  # ls piped to sort
+    r'^head\s+.*\|\s+sort',  # head piped to sort
+    r'^tail\s+.*\|\s+sort',  # tail piped to sort
+    r'^ps\s+\|\s+sort',  # ps piped to sort
+    r'^df\s+\|\s+sort',  # df piped to sort
+    r'^du\s+\|\s+sort',  # du piped to sort
+    r'^git\s+.*\|\s+sort',  # git commands piped to sort
+    r'^cat\s+.*\|\s+uniq',  # cat piped to uniq
+    r'^grep\s+.*\|\s+uniq',  # grep piped to uniq
+    r'^find\s+.*\|\s+uniq',  # find piped to uniq
+    r'^ls\s+.*\|\s+uniq',  # ls piped to uniq
+    r'^head\s+.*\|\s+uniq',  # head piped to uniq
+    r'^tail\s+.*\|\s+uniq',  # tail piped to uniq
+    r'^ps\s+\|\s+uniq',  # ps piped to uniq
+    r'^df\s+\|\s+uniq',  # df piped to uniq
+    r'^du\s+\|\s+uniq',  # du piped to uniq
+    r'^git\s+.*\|\s+uniq',  # git commands piped to uniq
+]
 
-    # Add Windows specific commands (with or without .exe extension)
-    if platform.system() == "Windows":
-        builtins.extend(["dir", "powershell", "cmd", "ipconfig", "ping", "netstat", "tasklist", "taskkill", "fc", "type"])
-        # Handle potential .exe extension in Windows
-        windows_cmd = re.sub(r'\.exe$', '', cmd_name)
-        if windows_cmd in builtins:
-            return True
+# Safe redirects (reading from files, not writing to them)
+SAFE_REDIRECT_PATTERNS = [
+    r'^cat\s+.*<\s+',  # cat with input redirect
+    r'^grep\s+.*<\s+',  # grep with input redirect
+    r'^head\s+.*<\s+',  # head with input redirect
+    r'^tail\s+.*<\s+',  # tail with input redirect
+    r'^sort\s+.*<\s+',  # sort with input redirect
+    r'^uniq\s+.*<\s+',  # uniq with input redirect
+    r'^wc\s+.*<\s+',  # wc with input redirect
+    r'^find\s+.*<\s+',  # find with input redirect
+    r'^ls\s+.*<\s+',  # ls with input redirect
+    r'^ps\s+.*<\s+',  # ps with input redirect
+    r'^df\s+.*<\s+',  # df with input redirect
+    r'^du\s+.*<\s+',  # du with input redirect
+    r'^git\s+.*<\s+',  # git commands with input redirect
+    r'^npm\s+.*<\s+',  # npm commands with input redirect
+    r'^pip\s+.*<\s+',  # pip commands with input redirect
+    r'^docker\s+.*<\s+',  # docker commands with input redirect
+    r'^kubectl\s+.*<\s+',  # kubectl commands with input redirect
+    r'^aws\s+.*<\s+',  # aws commands with input redirect
+    r'^gcloud\s+.*<\s+',  # gcloud commands with input redirect
+    r'^curl\s+.*<\s+',  # curl commands with input redirect
+    r'^wget\s+.*<\s+',  # wget commands with input redirect
+    r'^ssh\s+.*<\s+',  # ssh commands with input redirect
+    r'^rsync\s+.*<\s+',  # rsync commands with input redirect
+    r'^tar\s+.*<\s+',  # tar commands with input redirect
+    r'^zip\s+.*<\s+',  # zip commands with input redirect
+    r'^unzip\s+.*<\s+',  # unzip commands with input redirect
+    r'^gzip\s+.*<\s+',  # gzip commands with input redirect
+    r'^bzip2\s+.*<\s+',  # bzip2 commands with input redirect
+    r'^xz\s+.*<\s+',  # xz commands with input redirect
+    r'^vim\s+.*<\s+',  # vim commands with input redirect
+    r'^nano\s+.*<\s+',  # nano commands with input redirect
+    r'^emacs\s+.*<\s+',  # emacs commands with input redirect
+    r'^code\s+.*<\s+',  # vscode commands with input redirect
+    r'^subl\s+.*<\s+',  # sublime commands with input redirect
+    r'^atom\s+.*<\s+',  # atom commands with input redirect
+]
 
-    # Looks like a valid shell command if the first word is in our builtins list
-    return cmd_name in builtins
+# One alternation: a single scan per command instead of one search per pattern
+_INFORMATIONAL_RE = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in INFORMATIONAL_PATTERNS + SAFE_PIPE_PATTERNS + SAFE_REDIRECT_PATTERNS),
+    re.IGNORECASE
+)
 
 def is_informational_command(cmd):
     """Check if a command is purely informational and safe to execute without confirmation.
@@ -71,221 +235,99 @@ def is_informational_command(cmd):
     if not cmd:
         return False
     
-    import re
-    
-    # List of safe informational commands that should execute immediately
-    informational_patterns = [
-        r'^ls(\s|$)',  # ls commands
-        r'^pwd(\s|$)',  # pwd command
-        r'^whoami(\s|$)',  # whoami command
-        r'^date(\s|$)',  # date command
-        r'^cat(\s|$)',  # cat command
-        r'^head(\s|$)',  # head command
-        r'^tail(\s|$)',  # tail command
-        r'^grep(\s|$)',  # grep command
-        r'^find(\s|$)',  # find command
-        r'^echo(\s|$)',  # echo command
-        r'^which(\s|$)',  # which command
-        r'^whereis(\s|$)',  # whereis command
-        r'^ps(\s|$)',  # ps command
-        r'^top(\s|$)',  # top command
-        r'^df(\s|$)',  # df command
-        r'^du(\s|$)',  # du command
-        r'^free(\s|$)',  # free command
-        r'^uname(\s|$)',  # uname command
-        r'^hostname(\s|$)',  # hostname command
-        r'^id(\s|$)',  # id command
-        r'^env(\s|$)',  # env command
-        r'^printenv(\s|$)',  # printenv command
-        r'^jobs(\s|$)',  # jobs command
-        r'^history(\s|$)',  # history command
-        r'^alias(\s|$)',  # alias command
-        r'^type(\s|$)',  # type command
-        r'^command(\s|$)',  # command command
-        r'^git\s+(status|log|diff|show|branch|remote|config)(\s|$)',  # git informational commands
-        r'^npm\s+(list|ls|info|show|view)(\s|$)',  # npm informational commands
-        r'^pip\s+(list|show|freeze)(\s|$)',  # pip informational commands
-        r'^python\s+--version|python\s+-V',  # python version
-        r'^node\s+--version|node\s+-v',  # node version
-        r'^java\s+--version|java\s+-version',  # java version
-        r'^gcc\s+--version|gcc\s+-v',  # gcc version
-        r'^clang\s+--version|clang\s+-v',  # clang version
-        r'^make\s+--version|make\s+-v',  # make version
-        r'^cmake\s+--version|cmake\s+-version',  # cmake version
-        r'^docker\s+(version|info|ps|images|logs)(\s|$)',  # docker informational commands
-        r'^kubectl\s+(version|get|describe|logs)(\s|$)',  # kubectl informational commands
-        r'^aws\s+(help|version)(\s|$)',  # aws informational commands
-        r'^gcloud\s+(help|version)(\s|$)',  # gcloud informational commands
-        r'^curl\s+--version|curl\s+-V',  # curl version
-        r'^wget\s+--version|wget\s+-V',  # wget version
-        r'^ssh\s+-V',  # ssh version
-        r'^rsync\s+--version|rsync\s+-V',  # rsync version
-        r'^tar\s+--version|tar\s+-V',  # tar version
-        r'^zip\s+--version|zip\s+-v',  # zip version
-        r'^unzip\s+--version|unzip\s+-v',  # unzip version
-        r'^gzip\s+--version|gzip\s+-V',  # gzip version
-        r'^bzip2\s+--version|bzip2\s+-V',  # bzip2 version
-        r'^xz\s+--version|xz\s+-V',  # xz version
-        r'^vim\s+--version|vim\s+-v',  # vim version
-        r'^nano\s+--version|nano\s+-V',  # nano version
-        r'^emacs\s+--version|emacs\s+-version',  # emacs version
-        r'^code\s+--version|code\s+-v',  # vscode version
-        r'^subl\s+--version|subl\s+-v',  # sublime version
-        r'^atom\s+--version|atom\s+-v',  # atom version
-    ]
-    
-    for pattern in informational_patterns:
-        if re.search(pattern, cmd, re.IGNORECASE):
-            return True  # Command is informational and safe
-    
-    # Check for safe command combinations (pipes, redirects that don't modify files)
-    safe_combinations = [
-        r'^ls\s+\|\s+grep',  # ls piped to grep
-        r'^find\s+.*\|\s+grep',  # find piped to grep
-        r'^cat\s+.*\|\s+grep',  # cat piped to grep
-        r'^head\s+.*\|\s+grep',  # head piped to grep
-        r'^tail\s+.*\|\s+grep',  # tail piped to grep
-        r'^ps\s+\|\s+grep',  # ps piped to grep
-        r'^df\s+\|\s+grep',  # df piped to grep
-        r'^du\s+\|\s+grep',  # du piped to grep
-        r'^git\s+.*\|\s+grep',  # git commands piped to grep
-        r'^cat\s+.*\|\s+head',  # cat piped to head
-        r'^cat\s+.*\|\s+tail',  # cat piped to tail
-        r'^grep\s+.*\|\s+head',  # grep piped to head
-        r'^grep\s+.*\|\s+tail',  # grep piped to tail
-        r'^find\s+.*\|\s+head',  # find piped to head
-        r'^find\s+.*\|\s+tail',  # find piped to tail
-        r'^ls\s+.*\|\s+head',  # ls piped to head
-        r'^ls\s+.*\|\s+tail',  # ls piped to tail
-        r'^cat\s+.*\|\s+wc',  # cat piped to wc
-        r'^grep\s+.*\|\s+wc',  # grep piped to wc
-        r'^find\s+.*\|\s+wc',  # find piped to wc
-        r'^ls\s+.*\|\s+wc',  # ls piped to wc
-        r'^head\s+.*\|\s+wc',  # head piped to wc
-        r'^tail\s+.*\|\s+wc',  # tail piped to wc
-        r'^ps\s+\|\s+wc',  # ps piped to wc
-        r'^df\s+\|\s+wc',  # df piped to wc
-        r'^du\s+\|\s+wc',  # du piped to wc
-        r'^git\s+.*\|\s+wc',  # git commands piped to wc
-        r'^cat\s+.*\|\s+sort',  # cat piped to sort
-        r'^grep\s+.*\|\s+sort',  # grep piped to sort
-        r'^find\s+.*\|\s+sort',  # find piped to sort
-        r'^ls\s+.*\|\s+sort',  # ls piped to sort
-        r'^head\s+.*\|\s+sort',  # head piped to sort
-        r'^tail\s+.*\|\s+sort',  # tail piped to sort
-        r'^ps\s+\|\s+sort',  # ps piped to sort
-        r'^df\s+\|\s+sort',  # df piped to sort
-        r'^du\s+\|\s+sort',  # du piped to sort
-        r'^git\s+.*\|\s+sort',  # git commands piped to sort
-        r'^cat\s+.*\|\s+uniq',  # cat piped to uniq
-        r'^grep\s+.*\|\s+uniq',  # grep piped to uniq
-        r'^find\s+.*\|\s+uniq',  # find piped to uniq
-        r'^ls\s+.*\|\s+uniq',  # ls piped to uniq
-        r'^head\s+.*\|\s+uniq',  # head piped to uniq
-        r'^tail\s+.*\|\s+uniq',  # tail piped to uniq
-        r'^ps\s+\|\s+uniq',  # ps piped to uniq
-        r'^df\s+\|\s+uniq',  # df piped to uniq
-        r'^du\s+\|\s+uniq',  # du piped to uniq
-        r'^git\s+.*\|\s+uniq',  # git commands piped to uniq
-    ]
-    
-    for pattern in safe_combinations:
-        if re.search(pattern, cmd, re.IGNORECASE):
-            return True  # Command is informational and safe
-    
-    # Check for safe redirects (reading from files, not writing to them)
-    safe_redirects = [
-        r'^cat\s+.*<\s+',  # cat with input redirect
-        r'^grep\s+.*<\s+',  # grep with input redirect
-        r'^head\s+.*<\s+',  # head with input redirect
-        r'^tail\s+.*<\s+',  # tail with input redirect
-        r'^sort\s+.*<\s+',  # sort with input redirect
-        r'^uniq\s+.*<\s+',  # uniq with input redirect
-        r'^wc\s+.*<\s+',  # wc with input redirect
-        r'^find\s+.*<\s+',  # find with input redirect
-        r'^ls\s+.*<\s+',  # ls with input redirect
-        r'^ps\s+.*<\s+',  # ps with input redirect
-        r'^df\s+.*<\s+',  # df with input redirect
-        r'^du\s+.*<\s+',  # du with input redirect
-        r'^git\s+.*<\s+',  # git commands with input redirect
-        r'^npm\s+.*<\s+',  # npm commands with input redirect
-        r'^pip\s+.*<\s+',  # pip commands with input redirect
-        r'^docker\s+.*<\s+',  # docker commands with input redirect
-        r'^kubectl\s+.*<\s+',  # kubectl commands with input redirect
-        r'^aws\s+.*<\s+',  # aws commands with input redirect
-        r'^gcloud\s+.*<\s+',  # gcloud commands with input redirect
-        r'^curl\s+.*<\s+',  # curl commands with input redirect
-        r'^wget\s+.*<\s+',  # wget commands with input redirect
-        r'^ssh\s+.*<\s+',  # ssh commands with input redirect
-        r'^rsync\s+.*<\s+',  # rsync commands with input redirect
-        r'^tar\s+.*<\s+',  # tar commands with input redirect
-        r'^zip\s+.*<\s+',  # zip commands with input redirect
-        r'^unzip\s+.*<\s+',  # unzip commands with input redirect
-        r'^gzip\s+.*<\s+',  # gzip commands with input redirect
-        r'^bzip2\s+.*<\s+',  # bzip2 commands with input redirect
-        r'^xz\s+.*<\s+',  # xz commands with input redirect
-        r'^vim\s+.*<\s+',  # vim commands with input redirect
-        r'^nano\s+.*<\s+',  # nano commands with input redirect
-        r'^emacs\s+.*<\s+',  # emacs commands with input redirect
-        r'^code\s+.*<\s+',  # vscode commands with input redirect
-        r'^subl\s+.*<\s+',  # sublime commands with input redirect
-        r'^atom\s+.*<\s+',  # atom commands with input redirect
-    ]
-    
-    for pattern in safe_redirects:
-        if re.search(pattern, cmd, re.IGNORECASE):
-            return True  # Command is informational and safe
-    
-    return False
+    return _INFORMATIONAL_RE.search(cmd) is not None
+
+# Start of a command: beginning of line, after ; & | ( or inside $( / backticks, optionally via sudo
+_CMD_START = r'(?:^|[;&|(`\n]|\$\()\s*(?:sudo\s+(?:-\S+\s+)*)?'
+
+DANGEROUS_PATTERNS = [
+    _CMD_START + r'rm\s+(?:-\S+\s+)*-[a-zA-Z]*[rR][a-zA-Z]*\s+(?:-\S+\s+)*(?:/|~|\.\.)/?\*?(?=[\s;&|)`]|$)',  # recursive rm of /, ~ or ..
+    _CMD_START + r'chmod\s+(?:-\S+\s+)*0?777\b',  # overly permissive chmod
+    _CMD_START + r'chown\s+(?:-\S+\s+)*root\b',  # changing ownership to root
+    _CMD_START + r'(?:passwd|userdel|groupdel|fdisk|cryptsetup|format)\b',  # account and disk administration
+    _CMD_START + r'mkfs(?:\.\w+)?\b',  # filesystem creation
+    _CMD_START + r'dd\s+.*\bof=/dev/',  # writing straight to a device
+    _CMD_START + r'iptables\s+(?:\S+\s+)*(?:-F|--flush)\b',  # firewall flushing
+    _CMD_START + r'kill\s+(?:-\S+\s+)*-?1(?=\s|$)',  # killing init or every process
+    r'>\s*/(?:proc|sys)/',  # writing to the proc or sys filesystems
+    r'>\s*/dev/(?:sd|hd|nvme|disk)',  # overwriting a disk device
+    r':\(\)\s*\{\s*:\s*\|\s*:\s*&\s*\}\s*;\s*:',  # fork bomb
+]
+
+# One alternation means a single scan per command instead of one per pattern
+_DANGER_RE = re.compile("|".join(f"(?:{pattern})" for pattern in DANGEROUS_PATTERNS))
+
+# Literal triggers for the patterns above: a command containing none of these words
+# or markers cannot match _DANGER_RE, so the regex scan is skipped. Keep them in sync.
+_DANGER_WORDS = frozenset([
+    "rm", "chmod", "chown", "passwd", "userdel", "groupdel", "fdisk", "cryptsetup",
+    "format", "mkfs", "dd", "iptables", "kill",
+])
+_DANGER_MARKERS = (">", ":(")
+_WORD_RE = re.compile(r"[A-Za-z]+")
+
+def _may_be_dangerous(command):
+    """Cheap single-pass prefilter for _DANGER_RE."""
+    if any(marker in command for marker in _DANGER_MARKERS):
+        return True
+    # Stream the words so the check stops at the first trigger without building a list
+    return not _DANGER_WORDS.isdisjoint(m.group() for m in _WORD_RE.finditer(command))
+
+# Shell operators that need a real shell to run the command
+_SHELL_OPS_RE = re.compile(r"[|&;><]")
+
+def sanitize_command(command):
+    """Screen a command against the table of dangerous patterns.
+
+    Args:
+        command (str): Command to check
+
+    Returns:
+        str: The stripped command if it looks safe, or "" if it is empty or dangerous
+    """
+    if not command:
+        return ""
+    command = command.strip()
+    if _may_be_dangerous(command) and _DANGER_RE.search(command):
+        return ""
+    return command
 
 def run_shell_command(command):
     """Execute a shell command and return whether it was successful."""
-    try:
-        system_name = platform.system()
+    if not sanitize_command(command):
+        if command:
+            print(f"Refusing to run potentially dangerous command: {command}")
+        return False
 
+    try:
         # On Windows, many commands are shell built-ins (e.g., 'dir') and redirection
         # is processed by the shell. Use shell=True so built-ins and operators work.
-        if system_name == "Windows":
-            result = subprocess.run(
-                command,
-                shell=True,
-                check=False,
-                capture_output=True,
-                text=True,
-            )
+        if _SYSTEM_NAME == "Windows":
+            args, popen_kwargs = command, {"shell": True}
+        # On POSIX, let the shell handle pipelines/redirection. Prefer bash if available.
+        elif _SHELL_OPS_RE.search(command):
+            args, popen_kwargs = command, {"shell": True, "executable": os.environ.get("SHELL", "/bin/bash")}
         else:
-            # On POSIX, decide based on presence of shell operators
-            has_shell_ops = bool(re.search(r"[|&;><]", command))
-            if has_shell_ops:
-                # Let the shell handle pipelines/redirection. Prefer bash if available.
-                result = subprocess.run(
-                    command,
-                    shell=True,
-                    check=False,
-                    capture_output=True,
-                    text=True,
-                    executable=os.environ.get("SHELL", "/bin/bash"),
-                )
-            else:
-                # Execute direct binary without a shell
-                args = shlex.split(command)
-                result = subprocess.run(
-                    args,
-                    check=False,
-                    capture_output=True,
-                    text=True,
-                )
-
-        # Print the stdout
-        if result.stdout:
-            print(result.stdout.strip())
+            # Execute direct binary without a shell
+            args, popen_kwargs = shlex.split(command), {}
 
-        # Print the stderr (if any)
-        if result.stderr:
-            print(result.stderr.strip())
+        # Stream output line by line instead of buffering it all: memory stays flat for
+        # large outputs and the first line shows up immediately. stderr is merged into
+        # stdout so a single pipe is read and the two cannot deadlock each other.
+        with subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            **popen_kwargs,
+        ) as proc:
+            for line in proc.stdout:
+                sys.stdout.write(line)
+                sys.stdout.flush()
 
         # Return True if command succeeded, False otherwise
-        return result.returncode == 0
+        return proc.returncode == 0
 
     except Exception as e:
         print(f"Error executing command: {e}")
@@ -1,12 +1,20 @@
 """Configuration utilities for TerminalAI."""
 import os
+import sys
+import copy
 import json
 import appdirs
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # Optional speedup; fall back to the standard library
+    orjson = None
+
 CONFIG_PATH = os.path.expanduser("~/.terminalai_config.json")
 
-DEFAULT_SYSTEM_PROMPT = (
+# Interned, so a prompt loaded from the config that equals the default is the same object
+DEFAULT_SYSTEM_PROMPT = sys.intern(
     "You are TerminalAI. Your suggestions ARE EXECUTED AUTOMATICALLY by the user's terminal.\n\n"
     "RULES:\n"
     "1. ONLY PROVIDE ONE COMMAND per block. Use the user's CURRENT OS (provided in context).\n"
@@ -15,30 +23,109 @@ DEFAULT_SYSTEM_PROMPT = (
     "4. Format: ```bash\ncommand\n```"
 )
 
+# Connection pool and timeout settings, one copy per provider (see ai_providers.HttpSettings)
+DEFAULT_HTTP_CONFIG = {
+    "max_connections": 100,
+    "max_hosts": 10,
+    "timeout_s": 30,
+    "max_retries": 3
+}
+
 DEFAULT_CONFIG = {
     "providers": {
-        "openrouter": {"api_key": ""},
-        "gemini": {"api_key": ""},
-        "mistral": {"api_key": ""},
-        "ollama": {"host": "http://localhost:11434"}
+        "openrouter": {"api_key": "", "rate_limit_rpm": 0, "http": dict(DEFAULT_HTTP_CONFIG)},
+        "gemini": {"api_key": "", "rate_limit_rpm": 0, "http": dict(DEFAULT_HTTP_CONFIG)},
+        "mistral": {"api_key": "", "rate_limit_rpm": 0, "http": dict(DEFAULT_HTTP_CONFIG)},
+        "ollama": {"host": "http://localhost:11434", "http": dict(DEFAULT_HTTP_CONFIG, timeout_s=60)}
     },
     "default_provider": "openrouter",
+    # Multi-prompt requests: concurrency cap and requests-per-minute limit (0 = unlimited)
+    "batch": {"enabled": False, "max_concurrency": 8, "rate_limit_rpm": 0},
+    # Response cache (opt-in, since it stores prompts and answers on disk); entries expire after
+    # ttl_s and the oldest past max_entries are evicted. "semantic" also matches reworded
+    # questions (needs sentence-transformers)
+    "cache": {"enabled": False, "semantic": False, "threshold": 0.93, "ttl_s": 24 * 60 * 60, "max_entries": 1000},
     "system_prompt": DEFAULT_SYSTEM_PROMPT
 }
 
-def load_config():
-    if not os.path.exists(CONFIG_PATH):
+def json_loads(data):
+    """Parse JSON text or bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj, compact=False):
+    """Serialize obj as JSON text, using orjson when it is installed.
+
+    Args:
+        obj: The object to serialize.
+        compact: If True, emit no whitespace (for request bodies) instead of 2-space indentation.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=None if compact else orjson.OPT_INDENT_2).decode('utf-8')
+    if compact:
+        return json.dumps(obj, separators=(',', ':'))
+    return json.dumps(obj, indent=2)
+
+# Parsed config keyed by (path, mtime_ns, size), so the file is only re-read after it changes
+_CONFIG_CACHE = None
+
+def _read_config():
+    """Return the parsed config, re-reading the file only if it changed. Do not modify the result."""
+    global _CONFIG_CACHE
+    try:
+        st = os.stat(CONFIG_PATH)
+    except FileNotFoundError:
         save_config(DEFAULT_CONFIG)
-    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        st = os.stat(CONFIG_PATH)
+    key = (CONFIG_PATH, st.st_mtime_ns, st.st_size)
+    if _CONFIG_CACHE is None or _CONFIG_CACHE[0] != key:
+        with open(CONFIG_PATH, 'rb') as f:
+            _CONFIG_CACHE = (key, json_loads(f.read()))
+    return _CONFIG_CACHE[1]
+
+def load_config():
+    # Callers modify the returned dict before saving it, so never hand out the cached one
+    return copy.deepcopy(_read_config())
+
+def save_config(config, durable=True):
+    """Write the config atomically: to a temp file first, then renamed over CONFIG_PATH.
 
-def save_config(config):
-    with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=2)
+    Args:
+        config: The config dict to save.
+        durable: If False, skip the fsync. Use it when more edits follow right away.
+    """
+    global _CONFIG_CACHE
+    _CONFIG_CACHE = None
+    data = json_dumps(config).encode('utf-8')
+    tmp_path = CONFIG_PATH + ".tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        if durable:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, CONFIG_PATH)
+
+# Async variants for coroutines: the file I/O and parsing run in the loop's default
+# executor so the event loop keeps serving other tasks. Synchronous callers keep
+# using load_config()/save_config().
+async def load_config_async():
+    import asyncio  # Only coroutine callers pay for importing asyncio
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, load_config)
+
+async def save_config_async(config, durable=True):
+    import asyncio
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, save_config, config, durable)
 
 def get_system_prompt():
-    config = load_config()
-    return config.get("system_prompt", DEFAULT_SYSTEM_PROMPT)
+    # Read-only access, so skip the copy load_config() makes
+    return sys.intern(_read_config().get("system_prompt", DEFAULT_SYSTEM_PROMPT))
 
 def set_system_prompt(prompt):
     config = load_config()
@@ -46,6 +133,8 @@ def set_system_prompt(prompt):
     save_config(config)
 
 def reset_system_prompt():
+    if get_system_prompt() is DEFAULT_SYSTEM_PROMPT:
+        return
     config = load_config()
     config["system_prompt"] = DEFAULT_SYSTEM_PROMPT
     save_config(config)
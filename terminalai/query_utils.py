@@ -1,6 +1,9 @@
 """Utilities for processing user queries."""
 import re
 
+# Pattern for current directory references
+_CURRENT_DIR_RE = re.compile(r'\b(this|current|present)\s+(directory|dir|folder)\b', re.IGNORECASE)
+
 def preprocess_query(query):
     """Preprocess user queries to clarify potentially ambiguous requests.
 
@@ -20,9 +23,7 @@ def preprocess_query(query):
     has_desktop_keyword = any(keyword in query for keyword in desktop_keywords)
     has_location_indicator = any(indicator in query for indicator in location_indicators)
 
-    # Pattern for current directory references
-    current_dir_pattern = re.compile(r'\b(this|current|present)\s+(directory|dir|folder)\b', re.IGNORECASE)
-    has_current_dir_reference = bool(current_dir_pattern.search(query))
+    has_current_dir_reference = bool(_CURRENT_DIR_RE.search(query))
 
     # If query mentions desktop as a location and doesn't clearly specify current directory
     if has_desktop_keyword and has_location_indicator and not has_current_dir_reference:
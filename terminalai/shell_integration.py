@@ -2,85 +2,67 @@
 import os
 import platform
 import subprocess
+import functools
+import mmap
 from terminalai.color_utils import colorize_command
 from terminalai.clipboard_utils import copy_to_clipboard
-from rich.console import Console
-from rich.text import Text
-from rich.panel import Panel
 import getpass
+from pathlib import Path
+
+# Expanded once; every config path below is relative to it
+HOME_DIR = os.path.expanduser("~")
 
 def get_system_context():
     """Get system context information for the AI."""
-    # Get platform-specific info
+    # Only the working directory varies per call; it is spliced between the fixed parts
+    return os.getcwd().join(_system_context_parts())
+
+_WINDOWS_GUIDANCE = (
+    "- Use Windows-compatible commands (e.g., 'dir' instead of 'ls' for cmd.exe)\n"
+    "- For paths, use backslashes (\\) or forward slashes (/) which both work in most modern Windows contexts\n"
+    "- Use environment variables like %USERPROFILE% for user paths when appropriate\n"
+    "- NEVER use 'cd' followed by another command - each command runs in a new shell\n"
+    "- ALWAYS use absolute paths in commands (e.g., 'dir \"C:\\Users\\username\\Desktop\\*.log\"')\n"
+    "- For file operations, use the full path in the command itself\n"
+    "- Commands must be self-contained and work from any directory"
+)
+
+_UNIX_GUIDANCE = (
+    "- Use Unix/Linux compatible commands\n"
+    "- For paths, use forward slashes (/)\n"
+    "- Use ~ to represent the user's home directory when appropriate\n"
+    "- Use 'cd' followed by commands only when they can be combined with && or ;"
+)
+
+@functools.lru_cache(maxsize=1)
+def _system_context_parts():
+    """Render the system context once, split at the two places the cwd goes.
+
+    The platform, user and home paths are fixed for the life of the process.
+    """
     system_name = platform.system()
-    system_release = platform.release()
-    system_version = platform.version()
-    system_machine = platform.machine()
-
-    # Get user info
-    username = getpass.getuser()
-
-    # Get home directory and common paths
-    home_dir = os.path.expanduser("~")
-    desktop_dir = os.path.join(home_dir, "Desktop")
-    documents_dir = os.path.join(home_dir, "Documents")
-    downloads_dir = os.path.join(home_dir, "Downloads")
-
-    # Get current working directory
-    cwd = os.getcwd()
-
-    # Construct path reference guide based on OS
-    if system_name == "Windows":
-        path_guide = (
-            f"- When the user refers to 'my desktop', use the absolute path: {desktop_dir}\n"
-            f"- When the user refers to 'my documents', use the absolute path: {documents_dir}\n"
-            f"- When the user refers to 'my downloads', use the absolute path: {downloads_dir}\n"
-            f"- When the user refers to 'my home directory', use the absolute path: {home_dir}\n"
-            f"- When a location is not specified, assume they mean their current directory: {cwd}"
-        )
-    else:
-        path_guide = (
-            f"- When the user refers to 'my desktop', use the absolute path: {desktop_dir}\n"
-            f"- When the user refers to 'my documents', use the absolute path: {documents_dir}\n"
-            f"- When the user refers to 'my downloads', use the absolute path: {downloads_dir}\n"
-            f"- When the user refers to 'my home directory', use the absolute path: {home_dir}\n"
-            f"- When a location is not specified, assume they mean their current directory: {cwd}"
-        )
+    additional_guidance = _WINDOWS_GUIDANCE if system_name == "Windows" else _UNIX_GUIDANCE
 
-    # Add additional system-specific guidance
-    if system_name == "Windows":
-        additional_guidance = (
-            "- Use Windows-compatible commands (e.g., 'dir' instead of 'ls' for cmd.exe)\n"
-            "- For paths, use backslashes (\\) or forward slashes (/) which both work in most modern Windows contexts\n"
-            "- Use environment variables like %USERPROFILE% for user paths when appropriate\n"
-            "- NEVER use 'cd' followed by another command - each command runs in a new shell\n"
-            "- ALWAYS use absolute paths in commands (e.g., 'dir \"C:\\Users\\username\\Desktop\\*.log\"')\n"
-            "- For file operations, use the full path in the command itself\n"
-            "- Commands must be self-contained and work from any directory"
-        )
-    else:
-        additional_guidance = (
-            "- Use Unix/Linux compatible commands\n"
-            "- For paths, use forward slashes (/)\n"
-            "- Use ~ to represent the user's home directory when appropriate\n"
-            "- Use 'cd' followed by commands only when they can be combined with && or ;"
-        )
-
-    context = (
+    return (
         f"System Information:\n"
-        f"- OS: {system_name} {system_release} {system_version}\n"
-        f"- Architecture: {system_machine}\n"
-        f"- Username: {username}\n"
-        f"- Current Working Directory: {cwd}\n\n"
-        f"Path References:\n{path_guide}\n\n"
+        f"- OS: {system_name} {platform.release()} {platform.version()}\n"
+        f"- Architecture: {platform.machine()}\n"
+        f"- Username: {getpass.getuser()}\n"
+        f"- Current Working Directory: ",
+        f"\n\n"
+        f"Path References:\n"
+        f"- When the user refers to 'my desktop', use the absolute path: {os.path.join(HOME_DIR, 'Desktop')}\n"
+        f"- When the user refers to 'my documents', use the absolute path: {os.path.join(HOME_DIR, 'Documents')}\n"
+        f"- When the user refers to 'my downloads', use the absolute path: {os.path.join(HOME_DIR, 'Downloads')}\n"
+        f"- When the user refers to 'my home directory', use the absolute path: {HOME_DIR}\n"
+        f"- When a location is not specified, assume they mean their current directory: ",
+        f"\n\n"
         f"Command Guidelines:\n{additional_guidance}"
     )
 
-    return context
-
 def get_shell_config_file():
     system = platform.system()
-    home = os.path.expanduser("~")
+    home = HOME_DIR
     shell = os.environ.get("SHELL", "")
     config_file = ""
 
@@ -133,8 +115,41 @@ def get_shell_config_file():
             config_file = os.path.join(home, ".bash_profile")
     return config_file
 
+START_MARKER = '# >>> TERMINALAI SHELL INTEGRATION START'
+END_MARKER = '# <<< TERMINALAI SHELL INTEGRATION END'
+
+def _find_integration_block(content):
+    """Locate the TerminalAI block in a shell config file's content.
+
+    Returns:
+        A (start, end) slice of the block including both markers, or None.
+    """
+    start_idx = content.find(START_MARKER)
+    if start_idx == -1:
+        return None
+    end_idx = content.find(END_MARKER, start_idx)
+    if end_idx == -1:
+        return None
+    return start_idx, end_idx + len(END_MARKER)
+
+def _has_integration_block(config_file):
+    """Return True if the file contains the start marker.
+
+    The file is memory-mapped and searched as bytes, so the common "not
+    installed" case never reads or decodes the whole file.
+    """
+    with open(config_file, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm.find(START_MARKER.encode('utf-8')) != -1
+        except ValueError:  # Empty files cannot be mapped
+            return False
+
 def check_shell_integration():
     """Check if the ai shell integration is installed and highlight it in the config file."""
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.text import Text
     console = Console()
     config_file = get_shell_config_file()
     system = platform.system()
@@ -155,14 +170,10 @@ def check_shell_integration():
         return False
 
     # If we reach here, config_file is valid and os.path.exists(config_file) is True
-    with open(config_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    start_marker = '# >>> TERMINALAI SHELL INTEGRATION START'
-    end_marker = '# <<< TERMINALAI SHELL INTEGRATION END'
-    start_idx = content.find(start_marker)
-    end_idx = content.find(end_marker, start_idx)
-    if start_idx != -1 and end_idx != -1:
-        end_idx += len(end_marker)
+    content = Path(config_file).read_text(encoding='utf-8')
+    block_span = _find_integration_block(content)
+    if block_span:
+        start_idx, end_idx = block_span
         before = content[:start_idx]
         block = content[start_idx:end_idx]
         after = content[end_idx:]
@@ -204,15 +215,11 @@ def install_shell_integration():
                     "Could not determine shell config file. Please manually add the function to your shell config."
                 ))
                 return False
-        with open(config_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = Path(config_file).read_text(encoding='utf-8')
         # Remove any existing TerminalAI block
-        start_marker = '# >>> TERMINALAI SHELL INTEGRATION START'
-        end_marker = '# <<< TERMINALAI SHELL INTEGRATION END'
-        start_idx = content.find(start_marker)
-        end_idx = content.find(end_marker, start_idx)
-        if start_idx != -1 and end_idx != -1:
-            end_idx += len(end_marker)
+        block_span = _find_integration_block(content)
+        if block_span:
+            start_idx, end_idx = block_span
             content = content[:start_idx] + content[end_idx:]
         # Check for other ai aliases/functions
         if 'function ai' in content or 'alias ai=' in content:
@@ -269,7 +276,7 @@ ai() {
         if "zsh" in shell:
             source_cmd = "source ~/.zshrc"
         elif "bash" in shell:
-            if system == "Darwin" and os.path.exists(os.path.expanduser("~/.bash_profile")):
+            if system == "Darwin" and os.path.exists(os.path.join(HOME_DIR, ".bash_profile")):
                 source_cmd = "source ~/.bash_profile"
             else:
                 source_cmd = "source ~/.bashrc"
@@ -300,17 +307,13 @@ ai() {
                 print(colorize_command(f"Error creating PowerShell profile {config_file}: {e}"))
                 return False
 
-        with open(config_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        content = Path(config_file).read_text(encoding='utf-8')
 
-        start_marker = '# >>> TERMINALAI SHELL INTEGRATION START'
-        end_marker = '# <<< TERMINALAI SHELL INTEGRATION END'
-        start_idx = content.find(start_marker)
-        end_idx = content.find(end_marker, start_idx)
+        block_span = _find_integration_block(content)
 
-        if start_idx != -1 and end_idx != -1:
+        if block_span:
             # If block exists, remove it before adding the new one to ensure update
-            end_idx_inclusive = end_idx + len(end_marker)
+            start_idx, end_idx_inclusive = block_span
             # Preserve content before and after the block, handling potential newlines
             before_block = content[:start_idx].rstrip('\r\n')
             after_block = content[end_idx_inclusive:].lstrip('\r\n')
@@ -331,7 +334,7 @@ ai() {
             # We need to be careful not to detect our own block if it was just partially removed or in a comment
             # For now, if the markers aren't present but these are, we warn.
             # If the markers *were* present, we've already stripped our block.
-            if not (start_idx != -1 and end_idx != -1): # Only warn if we didn't just remove our own block
+            if not block_span: # Only warn if we didn't just remove our own block
                 print(colorize_command(
                     "Warning: An 'ai' function or alias might already exist in your PowerShell profile. "
                     "Please check your profile and resolve any conflicts before installing."
@@ -452,7 +455,7 @@ def uninstall_shell_integration():
     """Remove the ai shell function installed by TerminalAI."""
     system = platform.system()
     if system in ("Darwin", "Linux"):
-        home = os.path.expanduser("~")
+        home = HOME_DIR
         shell = os.environ.get("SHELL", "")
         config_file = ""
         if "zsh" in shell:
@@ -464,14 +467,12 @@ def uninstall_shell_integration():
         if not config_file or not os.path.exists(config_file):
             print(colorize_command("Could not determine shell config file."))
             return False
-        with open(config_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        start_marker = '# >>> TERMINALAI SHELL INTEGRATION START'
-        end_marker = '# <<< TERMINALAI SHELL INTEGRATION END'
-        start_idx = content.find(start_marker)
-        end_idx = content.find(end_marker, start_idx)
-        if start_idx != -1 and end_idx != -1:
-            end_idx += len(end_marker)
+        block_span = None
+        if _has_integration_block(config_file):
+            content = Path(config_file).read_text(encoding='utf-8')
+            block_span = _find_integration_block(content)
+        if block_span:
+            start_idx, end_idx = block_span
             # Remove any extra newlines before/after
             before = content[:start_idx].rstrip('\n')
             after = content[end_idx:].lstrip('\n')
@@ -494,16 +495,13 @@ def uninstall_shell_integration():
             print(colorize_command(f"PowerShell profile {config_file} not found. Nothing to uninstall."))
             return False
 
-        with open(config_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        start_marker = '# >>> TERMINALAI SHELL INTEGRATION START'
-        end_marker = '# <<< TERMINALAI SHELL INTEGRATION END'
-        start_idx = content.find(start_marker)
-        end_idx = content.find(end_marker, start_idx)
+        block_span = None
+        if _has_integration_block(config_file):
+            content = Path(config_file).read_text(encoding='utf-8')
+            block_span = _find_integration_block(content)
 
-        if start_idx != -1 and end_idx != -1:
-            end_idx_inclusive = end_idx + len(end_marker)
+        if block_span:
+            start_idx, end_idx_inclusive = block_span
 
             # Preserve content before and after the block
             before_block = content[:start_idx]
@@ -6,25 +6,19 @@ This ensures all imports work correctly. If you run this file directly, you may
 """
 import os
 import sys
-import requests
-from terminalai.__init__ import __version__
+from terminalai import __version__
 from terminalai.config import load_config
-from terminalai.ai_providers import get_provider
-from terminalai.command_extraction import extract_commands_from_output, is_stateful_command, is_risky_command
-from terminalai.formatting import print_ai_answer_with_rich
-from terminalai.shell_integration import get_system_context
+from terminalai.command_extraction import parse_response, extract_commands_from_output, classify_command
 from terminalai.cli_interaction import (
     parse_args, handle_commands, interactive_mode, setup_wizard,
     _set_default_provider_interactive,
-    _set_ollama_model_interactive
+    _set_ollama_model_interactive,
+    _show_batch_status,
+    _confirm
 )
 from terminalai.query_utils import preprocess_query
 from terminalai.color_utils import colorize_command
-from rich.console import Console
-from rich.text import Text
 from terminalai.file_reader import read_project_file
-from rich.panel import Panel
-import re
 
 if __name__ == "__main__" and (__package__ is None or __package__ == ""):
     print("[WARNING] It is recommended to run this script as a module:")
@@ -40,14 +34,21 @@ def main():
     is_eval_mode = getattr(args, 'eval_mode', False)
     rich_output_to_stderr = is_eval_mode
 
-    # In eval mode, all rich output goes to stderr, and only the raw command goes to stdout
-    console = Console(file=sys.stderr if rich_output_to_stderr else None)
-
     # --- Main Logic Based on Arguments ---
+    # Answered before rich is imported, so printing the version stays fast
     if args.version:
-        console.print(f"TerminalAI version {__version__}")
+        print(f"TerminalAI version {__version__}", file=sys.stderr if rich_output_to_stderr else sys.stdout)
         sys.exit(0)
 
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.text import Text
+    from terminalai.shell_integration import get_system_context
+    from terminalai.formatting import print_ai_answer_with_rich
+
+    # In eval mode, all rich output goes to stderr, and only the raw command goes to stdout
+    console = Console(file=sys.stderr if rich_output_to_stderr else None)
+
     # Check for setup flag or "setup" command
     if args.setup:
         setup_wizard()
@@ -63,6 +64,11 @@ def main():
         _set_ollama_model_interactive(console)
         sys.exit(0)
 
+    # Handle --batch-status flag
+    if args.batch_status:
+        _show_batch_status(console)
+        sys.exit(0)
+
     # Check if first argument is "setup" (positional argument)
     if args.query and args.query == "setup":
         setup_wizard()
@@ -99,11 +105,17 @@ def main():
     # Do NOT call interactive_mode after handling a direct query.
 
     # Get AI provider instance
+    # Imported here so --help, --version and setup never load the provider stack
+    from terminalai.ai_providers import get_provider
     provider = get_provider(provider_to_use) # Use the determined provider_to_use
     if not provider:
         print(colorize_command(f"Error: Provider '{provider_to_use}' is not configured properly or is unknown."), file=sys.stderr)
         print(colorize_command("Please run 'ai setup' to configure an AI provider, or check the provider name."), file=sys.stderr)
         sys.exit(1)
+    # Open the connection while we gather context, so the query does not wait on the handshake.
+    # With the response cache on, a repeated question needs no connection, so leave it to the query.
+    if not config.get("cache", {}).get("enabled", False):
+        provider.prewarm()
 
     # Get system context
     system_context = get_system_context()
@@ -212,6 +224,7 @@ File Location and Context:
         )
 
     # Generate response
+    from requests import RequestException
     try:
         # Ensure user_query is a string before passing to provider.generate_response
         if user_query is None:
@@ -235,7 +248,7 @@ File Location and Context:
         response = provider.generate_response(
             processed_query, final_system_context, verbose=args.verbose or args.long
         )
-    except (ValueError, TypeError, ConnectionError, requests.RequestException) as e:
+    except (ValueError, TypeError, ConnectionError, RequestException) as e:
         print(colorize_command(f"Error from AI provider: {str(e)}"), file=sys.stderr)
         sys.exit(1)
 
@@ -259,11 +272,14 @@ File Location and Context:
     if response.startswith("[AI] "):
         cleaned_response = response[len("[AI] ") :]
 
+    # Parse once; rendering and command extraction share the segments
+    segments = parse_response(cleaned_response)
+
     # Check if we need to output to stderr (in eval mode)
-    print_ai_answer_with_rich(cleaned_response, to_stderr=rich_output_to_stderr)
+    print_ai_answer_with_rich(cleaned_response, to_stderr=rich_output_to_stderr, segments=segments)
 
     # Extract and handle commands from the response
-    commands = extract_commands_from_output(response)
+    commands = extract_commands_from_output(cleaned_response, segments=segments)
 
     if commands:
         # In eval_mode (shell integration), we need special handling for commands
@@ -304,6 +320,9 @@ def handle_eval_mode_commands(commands, auto_confirm=False):
         commands: List of commands to handle
         auto_confirm: Whether to auto-confirm non-risky commands
     """
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.text import Text
     if not commands:
         return
 
@@ -313,8 +332,7 @@ def handle_eval_mode_commands(commands, auto_confirm=False):
     # For a single command
     if len(commands) == 1:
         command = commands[0]
-        is_stateful = is_stateful_command(command)
-        is_risky = is_risky_command(command)
+        is_stateful, is_risky = classify_command(command)
 
         # Show command with appropriate styling
         console.print("\n[Suggested command]", style="bold green")
@@ -339,12 +357,12 @@ def handle_eval_mode_commands(commands, auto_confirm=False):
 
         # Read from stdin (terminal input)
         try:
-            choice = input().lower() or default_choice
-        except (KeyboardInterrupt, EOFError):
+            confirmed = _confirm(default=default_choice == "y", single_key=not (is_risky or is_stateful))
+        except KeyboardInterrupt:
             console.print("\n[yellow]Command execution cancelled.[/yellow]")
             return
 
-        if choice == "y":
+        if confirmed:
             # Print the command to stdout for shell execution
             print(command)
         else:
@@ -352,22 +370,21 @@ def handle_eval_mode_commands(commands, auto_confirm=False):
 
     # Multiple commands
     else:
+        # Classified once here; the list display and the numbered choice reuse it
+        classified = [classify_command(cmd) for cmd in commands]
+
         # Display the list of commands
-        cmd_list_display = []
-        for i, cmd in enumerate(commands, 1):
-            is_risky_item = is_risky_command(cmd)
-            is_stateful_item = is_stateful_command(cmd)
-
-            display_item = Text()
-            display_item.append(f"{i}", style="cyan")
-            display_item.append(f": {cmd}", style="white")
+        # Built as a single Text for the panel content, one line per command
+        panel_content = Text()
+        for i, (cmd, (is_stateful_item, is_risky_item)) in enumerate(zip(commands, classified), 1):
+            if i > 1:
+                panel_content.append("\n")
+            panel_content.append(f"{i}", style="cyan")
+            panel_content.append(f": {cmd}", style="white")
             if is_risky_item:
-                display_item.append(" [RISKY]", style="bold red")
+                panel_content.append(" [RISKY]", style="bold red")
             if is_stateful_item:
-                display_item.append(" [STATEFUL]", style="bold yellow")
-            cmd_list_display.append(display_item)
-
-        panel_content = Text("\n").join(cmd_list_display)
+                panel_content.append(" [STATEFUL]", style="bold yellow")
         console.print(Panel(panel_content, title=f"Found {len(commands)} commands", border_style="blue"))
 
         # Prompt for which command to execute
@@ -387,8 +404,7 @@ def handle_eval_mode_commands(commands, auto_confirm=False):
             idx = int(user_choice) - 1
             if 0 <= idx < len(commands):
                 cmd_to_run = commands[idx]
-                is_risky_item = is_risky_command(cmd_to_run)
-                is_stateful_item = is_stateful_command(cmd_to_run)
+                is_stateful_item, is_risky_item = classified[idx]
 
                 # Show selected command
                 console.print(f"\n[Executing command {user_choice}]", style="bold green")
@@ -402,12 +418,12 @@ def handle_eval_mode_commands(commands, auto_confirm=False):
                 if is_risky_item:
                     console.print(Text(f"[RISKY] Execute this command? [y/N]: ", style="red bold"), end="")
                     try:
-                        confirm = input().lower() or "n"
-                    except (KeyboardInterrupt, EOFError):
+                        confirmed = _confirm(single_key=False)
+                    except KeyboardInterrupt:
                         console.print("\n[yellow]Command execution cancelled.[/yellow]")
                         return
 
-                    if confirm != "y":
+                    if not confirmed:
                         console.print("[yellow]Command execution cancelled.[/yellow]")
                         return
 
@@ -0,0 +1,347 @@
+"""
+Offline tests for the AI provider classes.
+All HTTP traffic goes through a fake session, so no network access is needed.
+"""
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+import requests
+import terminalai.ai_providers as ai_providers
+from terminalai.ai_providers import (
+    OpenRouterProvider, MistralProvider, OllamaProvider, GeminiProvider, HttpSettings, BatchProcessor,
+    CachedProvider, get_shared_session, get_provider
+)
+from terminalai.cache import SemanticCache
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response."""
+    def __init__(self, payload, status_code=200, headers=None):
+        self._payload = payload
+        self.text = str(payload)
+        self.content = json.dumps(payload).encode("utf-8")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self):
+        yield self.content
+
+    def json(self):
+        return self._payload
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class FakeSession:
+    """Records every POST and answers with a canned chat completion."""
+    def __init__(self, payload=None, delay=0.0):
+        self.payload = payload or {"choices": [{"message": {"content": "ls -l"}}]}
+        self.delay = delay
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        if self.delay:
+            time.sleep(self.delay)
+        return FakeResponse(self.payload)
+
+def test_shared_session_is_reused():
+    assert get_shared_session() is get_shared_session()
+    assert OpenRouterProvider("key").session is get_shared_session()
+
+def test_query_uses_injected_session():
+    session = FakeSession()
+    provider = MistralProvider("key", session=session)
+    assert provider.query("system\n\nuser") == "ls -l"
+    url, kwargs = session.calls[0]
+    assert url == "https://api.mistral.ai/v1/chat/completions"
+    body = json.loads(kwargs["data"])
+    assert body["model"] == "mistral-tiny"
+    assert body["messages"][0] == {"role": "system", "content": "system"}
+    assert kwargs["headers"]["Authorization"] == "Bearer key"
+
+def test_aquery_overlaps_requests():
+    session = FakeSession(payload={"response": "pwd"}, delay=0.2)
+    provider = OllamaProvider("http://localhost:11434", session=session)
+
+    async def run():
+        return await asyncio.gather(*(provider.aquery(f"q{i}") for i in range(4)))
+
+    start = time.monotonic()
+    results = asyncio.run(run())
+    assert results == ["pwd"] * 4
+    # Four 0.2s requests finish in well under their serial time of 0.8s
+    assert time.monotonic() - start < 0.6
+
+def test_get_provider_reads_http_settings(monkeypatch):
+    config = {
+        "default_provider": "mistral",
+        "providers": {
+            "mistral": {"api_key": "key", "http": {"max_connections": 500, "max_hosts": 4, "timeout_s": 5}},
+            "ollama": {"host": "http://localhost:11434"},
+        },
+    }
+    monkeypatch.setattr(ai_providers, "load_config", lambda: config)
+    provider = get_provider()
+    assert provider.http_settings == HttpSettings(max_connections=500, max_hosts=4, timeout=5)
+    assert provider.session is get_shared_session(provider.http_settings)
+    adapter = provider.session.get_adapter("https://api.mistral.ai/")
+    assert (adapter._pool_maxsize, adapter._pool_connections) == (500, 4)
+    assert provider.session is not get_shared_session()
+    # Ollama keeps its longer default timeout when no http section is configured
+    assert get_provider("ollama").http_settings.timeout == 60
+
+def test_batch_processor_keeps_order_and_rate_limit():
+    session = FakeSession(payload={"response": "ok"})
+    batch = BatchProcessor(OllamaProvider("http://localhost:11434", session=session),
+                           max_concurrency=2, rate_limit_rpm=600)
+    start = time.monotonic()
+    assert batch.query_many(["a", "b", "c"]) == ["ok", "ok", "ok"]
+    # 600 requests/minute spaces the three requests 0.1s apart
+    assert time.monotonic() - start >= 0.2
+    assert [json.loads(kwargs["data"])["prompt"] for _, kwargs in session.calls] == ["a", "b", "c"]
+    assert batch.model == "llama3"
+
+class FakeBatchSession(FakeSession):
+    """Serves Mistral's file upload, batch job and file download endpoints."""
+    def __init__(self):
+        super().__init__(payload={"id": "file-in"})
+        self.statuses = ["RUNNING", "SUCCESS"]
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        if url.endswith("/batch/jobs"):
+            return FakeResponse({"id": "job-1", "status": "QUEUED"})
+        return FakeResponse({"id": "file-in"})
+
+    def get(self, url, **kwargs):
+        if url.endswith("/content"):
+            lines = [
+                {"custom_id": "1", "response": {"body": {"choices": [{"message": {"content": "pwd"}}]}}},
+                {"custom_id": "0", "response": {"body": {"choices": [{"message": {"content": "ls"}}]}}},
+            ]
+            response = FakeResponse(None)
+            response.content = "\n".join(json.dumps(line) for line in lines).encode("utf-8")
+            return response
+        return FakeResponse({"status": self.statuses.pop(0), "output_file": "file-out",
+                             "total_requests": 2})
+
+def test_mistral_batch_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_providers, "BATCHES_PATH", str(tmp_path / "batches.json"))
+    provider = MistralProvider("key", session=FakeBatchSession())
+    batch_id = provider.submit_batch(["list files", "where am I"])
+    assert batch_id == "job-1"
+    assert ai_providers.load_batches()["job-1"]["prompts"] == 2
+    assert provider.poll_batch(batch_id, interval=0) == ["ls", "pwd"]
+
+def run_isolated(code):
+    """Run code in a fresh interpreter in isolated mode (-I), with only this checkout added to sys.path.
+
+    Isolated mode skips PYTHONPATH, the user site directory and PYTHON* variables,
+    so nothing imported by the environment can mask what the CLI itself loads.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(ai_providers.__file__)))
+    code = f"import sys; sys.path.insert(0, {root!r}); {code}"
+    result = subprocess.run([sys.executable, "-I", "-c", code], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+def test_cli_import_does_not_load_requests():
+    assert run_isolated("import terminalai.terminalai_cli; print('requests' in sys.modules)") == "False"
+
+def test_cli_import_defers_heavy_modules():
+    # terminalai.__init__ would be a second copy of the package module
+    modules = ["asyncio", "pygments", "rich.console", "terminalai.ai_providers", "terminalai.formatting",
+               "terminalai.shell_integration", "terminalai.__init__"]
+    code = f"import terminalai.terminalai_cli; print([m for m in {modules!r} if m in sys.modules])"
+    assert run_isolated(code) == "[]"
+
+def test_registered_providers_are_dispatched_by_name(monkeypatch):
+    monkeypatch.setattr(ai_providers, "_PROVIDERS", dict(ai_providers._PROVIDERS))
+
+    @ai_providers.register("echo", "prefix", ">")
+    class EchoProvider(ai_providers.AIProvider):
+        def __init__(self, prefix, session=None, http_settings=None):
+            super().__init__(session, http_settings)
+            self.prefix = prefix
+
+        def query(self, prompt):
+            return f"{self.prefix} {prompt}"
+
+    config = {"providers": {"ollama": {"model": "mistral"}, "mistral": {"api_key": ""}},
+              "cache": {"enabled": False}}
+    monkeypatch.setattr(ai_providers, "load_config", lambda: config)
+    assert get_provider("echo").query("hi") == "> hi"
+    assert get_provider("ollama").model == "mistral"
+    assert get_provider("mistral") is None
+    assert get_provider("unknown") is None
+
+class FakeTagsSession(FakeSession):
+    """Serves Ollama's /api/tags endpoint with an ETag, honouring If-None-Match."""
+    def __init__(self):
+        super().__init__()
+        self.online = True
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        if not self.online:
+            raise ConnectionError("Ollama is not running")
+        if kwargs.get("headers", {}).get("If-None-Match") == '"v1"':
+            return FakeResponse(None, status_code=304)
+        return FakeResponse({"models": [{"name": "llama3", "size": 4 * 1024**3}, {"name": "mistral"}]},
+                            headers={"ETag": '"v1"'})
+
+def test_ollama_list_models(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_providers, "MODELS_CACHE_PATH", str(tmp_path / "models.json"))
+    session = FakeTagsSession()
+    provider = OllamaProvider("http://localhost:11434", session=session)
+    models = provider.list_models()
+    assert [m["name"] for m in models] == ["llama3", "mistral"]
+    assert session.calls[0][0] == "http://localhost:11434/api/tags"
+    assert session.calls[0][1]["stream"] is True
+
+def test_ollama_malformed_listing_is_a_request_error():
+    class GarbledTagsSession(FakeSession):
+        def get(self, url, **kwargs):
+            response = FakeResponse(None)
+            response.content = b"<html>502 Bad Gateway</html>"
+            response.raw = io.BytesIO(response.content)
+            return response
+    provider = OllamaProvider("http://localhost:11434", session=GarbledTagsSession())
+    with pytest.raises(requests.RequestException, match="Malformed /api/tags response"):
+        list(provider.iter_models())
+
+def test_request_bodies_reuse_prebuilt_prefix():
+    prefix = ai_providers.build_body_prefix({"model": "m", "stream": False})
+    body = ai_providers.finish_body(prefix, prompt='say "hi"')
+    assert json.loads(body) == {"model": "m", "stream": False, "prompt": 'say "hi"'}
+    assert json.loads(ai_providers.finish_body(ai_providers.build_body_prefix({}), prompt="x")) == {"prompt": "x"}
+
+class FakeHeadSession(FakeSession):
+    def head(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        raise requests.ConnectionError("offline")
+
+def test_prewarm_sends_head_in_background_and_ignores_errors(caplog):
+    session = FakeHeadSession()
+    provider = CachedProvider(OllamaProvider("http://localhost:11434", session=session), SemanticCache())
+    with caplog.at_level("DEBUG", logger="terminalai.ai_providers"):
+        provider.prewarm().join(timeout=5)
+    assert session.calls == [("http://localhost:11434/", {"allow_redirects": False, "timeout": 60})]
+    assert "offline" in caplog.text
+    assert MistralProvider("key", session=FakeSession()).prewarm_url() == "https://api.mistral.ai/"
+    assert ai_providers.AIProvider(session=session).prewarm() is None
+
+def test_wrappers_forward_batch_calls():
+    provider = CachedProvider(MistralProvider("key", session=FakeBatchSession()), SemanticCache())
+    assert provider.get_batch("job-1")["status"] == "RUNNING"
+
+def test_ollama_list_models_revalidates_and_falls_back_to_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_providers, "MODELS_CACHE_PATH", str(tmp_path / "cache" / "models.json"))
+    session = FakeTagsSession()
+    provider = OllamaProvider("http://localhost:11434", session=session)
+    first = provider.list_models()
+    assert provider.list_models() == first
+    assert session.calls[1][1]["headers"] == {"If-None-Match": '"v1"'}
+    session.online = False
+    assert provider.list_models() == first
+    assert OllamaProvider("http://other:11434", session=session).list_models().startswith("[Ollama API error]")
+
+def test_get_provider_async(monkeypatch):
+    config = {"providers": {"ollama": {"host": "http://localhost:11434"}}, "cache": {"enabled": False}}
+    monkeypatch.setattr(ai_providers, "load_config", lambda: config)
+    provider = asyncio.run(ai_providers.get_provider_async("ollama"))
+    assert isinstance(provider, OllamaProvider)
+
+class ThrottlingSession(FakeSession):
+    """Answers 429 a given number of times before succeeding."""
+    def __init__(self, throttled):
+        super().__init__(payload={"response": "ok"})
+        self.throttled = throttled
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        if self.throttled:
+            self.throttled -= 1
+            return FakeResponse(None, status_code=429, headers={"Retry-After": "0"})
+        return FakeResponse(self.payload)
+
+def test_post_retries_throttled_requests():
+    session = ThrottlingSession(throttled=2)
+    provider = OllamaProvider("http://localhost:11434", session=session)
+    assert provider.query("hi") == "ok"
+    assert len(session.calls) == 3
+
+    session = ThrottlingSession(throttled=5)
+    provider = OllamaProvider("http://localhost:11434", session=session,
+                              http_settings=HttpSettings(max_retries=1))
+    assert provider.query("hi").startswith("[Ollama API error]")
+    assert len(session.calls) == 2
+
+def test_rate_limiter_is_shared_per_provider_name(monkeypatch):
+    monkeypatch.setattr(ai_providers, "_LIMITERS", {})
+    monkeypatch.setattr(ai_providers, "_provider_cache", {})
+    config = {"providers": {"mistral": {"api_key": "key", "rate_limit_rpm": 60}}, "cache": {"enabled": False}}
+    monkeypatch.setattr(ai_providers, "load_config", lambda: config)
+    first, second = get_provider("mistral"), get_provider("mistral")
+    assert first.rate_limiter is second.rate_limiter
+    assert first.rate_limiter.interval == 1.0
+    first.rate_limiter.defer(5)
+    assert second.rate_limiter.reserve() > 4
+
+def test_providers_share_request_helpers():
+    assert MistralProvider._chat_body("just a question") == {
+        "messages": [{"role": "user", "content": "just a question"}]}
+    session = FakeSession(payload={"candidates": [{"content": {"parts": [{"text": "pwd"}]}}]})
+    assert GeminiProvider("key", session=session).query("system\n\nwhere am I") == "pwd"
+    body = json.loads(session.calls[0][1]["data"])
+    assert body["contents"][0]["parts"][0]["text"] == "System instructions: system\n\nUser query: where am I"
+    assert GeminiProvider("key", session=FakeSession()).query("hi").startswith("[Gemini API error]")
+
+def test_query_many_uses_threads_and_skips_pool_for_one_prompt(monkeypatch):
+    session = FakeSession(payload={"response": "pwd"}, delay=0.2)
+    provider = OllamaProvider("http://localhost:11434", session=session)
+    start = time.monotonic()
+    assert provider.query_many([f"q{i}" for i in range(4)]) == ["pwd"] * 4
+    assert time.monotonic() - start < 0.6
+    # A lone prompt never starts a thread pool
+    import concurrent.futures
+    monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", None)
+    assert provider.query_many(["q"]) == ["pwd"]
+
+class FakeStreamSession(FakeSession):
+    """Answers with Ollama's newline-delimited JSON stream."""
+    CHUNKS = [{"response": "ls"}, {"response": " -l\n"}, None, {"response": "", "done": True}, {"response": "!"}]
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        response = FakeResponse(None)
+        response.iter_lines = lambda: (json.dumps(c).encode() if c else b"" for c in self.CHUNKS)
+        return response
+
+def test_ollama_streams_response_chunks():
+    session = FakeStreamSession()
+    provider = OllamaProvider("http://localhost:11434", session=session)
+    assert list(provider.stream_query("list")) == ["ls", " -l\n"]
+    assert session.calls[0][1]["stream"] is True
+    assert json.loads(session.calls[0][1]["data"])["stream"] is True
+    assert provider.query("list") == "ls -l"
+
+def test_get_provider_is_reused_until_config_changes(monkeypatch):
+    monkeypatch.setattr(ai_providers, "_provider_cache", {})
+    config = {"default_provider": "ollama", "providers": {"ollama": {"model": "llama3"}}}
+    monkeypatch.setattr(ai_providers, "load_config", lambda: json.loads(json.dumps(config)))
+    provider = get_provider()
+    assert get_provider("ollama") is provider
+    assert get_provider(session=FakeSession()) is not provider
+    config["providers"]["ollama"]["model"] = "mistral"
+    assert get_provider().model == "mistral"
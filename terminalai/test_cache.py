@@ -0,0 +1,71 @@
+"""
+Offline tests for the response cache.
+"""
+from terminalai.cache import SemanticCache, is_error_response, split_prompt
+from terminalai.ai_providers import CachedProvider, OllamaProvider
+from terminalai.test_ai_providers import FakeSession
+
+def fake_embedder(text):
+    """Bag-of-words vector over a tiny vocabulary."""
+    vocab = ["list", "files", "show", "disk", "space"]
+    words = text.lower().split()
+    return [float(words.count(word)) for word in vocab]
+
+def test_split_prompt():
+    assert split_prompt("system\n\nrules\n\nlist files") == ("system\n\nrules", "list files")
+    assert split_prompt("list files") == ("", "list files")
+
+def test_is_error_response():
+    assert is_error_response("[Ollama API error] connection refused")
+    assert not is_error_response("[AI] ls")
+    assert not is_error_response("ls -l")
+
+def test_cached_provider_skips_repeat_requests(tmp_path):
+    session = FakeSession(payload={"response": "ls -l"})
+    provider = CachedProvider(OllamaProvider("http://localhost:11434", session=session),
+                              SemanticCache(str(tmp_path / "cache.db")))
+    assert provider.query("ctx\n\nlist files") == "ls -l"
+    assert provider.query("ctx\n\nlist files") == "ls -l"
+    assert len(session.calls) == 1
+    assert provider.model == "llama3"
+
+def test_error_responses_are_not_cached(tmp_path):
+    session = FakeSession(payload={"error": "model not found"})
+    provider = CachedProvider(OllamaProvider("http://localhost:11434", session=session),
+                              SemanticCache(str(tmp_path / "cache.db")))
+    provider.query("ctx\n\nlist files")
+    provider.query("ctx\n\nlist files")
+    assert len(session.calls) == 2
+
+def test_semantic_hit_requires_same_context(tmp_path):
+    cache = SemanticCache(str(tmp_path / "cache.db"), threshold=0.9, embedder=fake_embedder)
+    cache.put("cwd: /home\n\nlist files", "ls")
+    assert cache.get("cwd: /home\n\nlist the files") == "ls"
+    assert cache.get("cwd: /tmp\n\nlist the files") is None
+    assert cache.get("cwd: /home\n\nshow disk space") is None
+
+def test_cache_is_opt_in():
+    from terminalai.ai_providers import _build_provider
+    config = {"providers": {"ollama": {"host": "http://localhost:11434", "model": "llama3"}}}
+    provider = _build_provider(config, "ollama", FakeSession())
+    assert isinstance(provider, OllamaProvider)
+    assert isinstance(_build_provider(dict(config, cache={"enabled": True}), "ollama", FakeSession()),
+                      CachedProvider)
+
+def test_expired_entries_are_not_served(tmp_path):
+    cache = SemanticCache(str(tmp_path / "cache.db"), ttl_s=0)
+    cache.put("ctx\n\nlist files", "ls -l")
+    assert cache.get("ctx\n\nlist files") is None
+
+def test_oldest_entries_are_evicted(tmp_path):
+    cache = SemanticCache(str(tmp_path / "cache.db"), max_entries=2)
+    for question in ("one", "two", "three"):
+        cache.put("ctx\n\n" + question, question)
+    assert cache.get("ctx\n\none") is None
+    assert cache.get("ctx\n\nthree") == "three"
+
+def test_cache_file_is_private(tmp_path):
+    import os
+    path = tmp_path / "cache.db"
+    SemanticCache(str(path)).put("ctx\n\nlist files", "ls -l")
+    assert os.stat(path).st_mode & 0o777 == 0o600
@@ -2,56 +2,86 @@
 Automated tests for TerminalAI command extraction and formatting logic.
 Ensures that command parsing is robust and safe. All file/folder operations are performed in a dedicated test directory.
 """
+import contextlib
+import io
 import os
 import shutil
-import subprocess
 import sys
-import re
+import threading
+import unittest.mock
 import pytest
 import platform
 from terminalai.command_extraction import extract_commands, is_stateful_command, is_risky_command
+from terminalai.terminalai_cli import main as cli_main
 
 # Test directory for all file/folder operations
-TEST_DIR = os.path.join(os.getcwd(), "test_terminalai_parsing")
+# One directory per pytest-xdist worker, so parallel runs (pytest -n auto) never remove each other's files
+TEST_DIR = os.path.join(os.getcwd(), f"test_terminalai_parsing_{os.environ.get('PYTEST_XDIST_WORKER', 'main')}")
 
-@pytest.fixture(scope="module", autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 def setup_and_teardown():
-    # Setup: create test directory
-    if not os.path.exists(TEST_DIR):
-        os.makedirs(TEST_DIR)
+    # Setup: create test directory (created once per session; both extraction modules share it)
+    os.makedirs(TEST_DIR, exist_ok=True)
     yield
-    # Teardown: remove test directory and its contents
-    if os.path.exists(TEST_DIR):
-        shutil.rmtree(TEST_DIR)
+    # Teardown: remove test directory and its contents, unless kept for the next local run
+    if os.environ.get("TERMINALAI_KEEP_TESTDIR") != "1":
+        shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+def _code_blocks(output):
+    """Return the bodies of fenced code blocks (minus a bash/sh tag) using str.find() instead of a lazy regex."""
+    blocks = []
+    pos = 0
+    while True:
+        start = output.find('```', pos)
+        if start < 0:
+            return blocks
+        body = start + 3
+        if output.startswith('bash', body):
+            body += 4
+        elif output.startswith('sh', body):
+            body += 2
+        if output.startswith('\n', body):
+            body += 1
+        end = output.find('```', body)
+        if end < 0:
+            return blocks
+        blocks.append(output[body:end])
+        pos = end + 3
+
+def _panel_lines(output):
+    """Return the non-empty contents of rich panel rows (lines framed by │ ... │)."""
+    lines = []
+    if '│' not in output:
+        return lines
+    for raw in output.splitlines():
+        row = raw.strip()
+        if len(row) >= 2 and row[0] == '│' and row[-1] == '│':
+            inner = row[1:-1].strip()
+            if inner:
+                lines.append(inner)
+    return lines
+
+# Panel rows that hold CLI chrome rather than a command
+_PANEL_SKIP_PREFIXES = ('TerminalAI', 'Command', 'Found', 'AI Chat Mode', 'Type ')
 
 def extract_commands_from_output(output):
     """Extract commands from both Markdown code blocks and rich panel output."""
     commands = []
     # Extract from Markdown code blocks
-    code_blocks = re.findall(r'```(?:bash|sh)?\n?([\s\S]*?)```', output)
+    code_blocks = _code_blocks(output)
     for block in code_blocks:
         for line in block.splitlines():
             line = line.strip()
             if line and not line.startswith('#'):
                 commands.append(line)
     # Extract from rich panels (lines between │ ... │)
-    panel_lines = re.findall(
-    r'^\s*│\s*(.*?)\s*│\s*$',
-    output,
-    re.MULTILINE
-)
+    panel_lines = _panel_lines(output)
     for line in panel_lines:
         # Exclude lines that are just explanations or empty
-        if line and not line.startswith('TerminalAI') and not line.startswith('Command') and not line.startswith('Found') and not line.startswith('AI Chat Mode') and not line.startswith('Type '):
+        if line and not line.startswith(_PANEL_SKIP_PREFIXES):
             commands.append(line.strip())
     # Deduplicate, preserve order
-    seen = set()
-    result = []
-    for cmd in commands:
-        if cmd and cmd not in seen:
-            seen.add(cmd)
-            result.append(cmd)
-    return result
+    return [cmd for cmd in dict.fromkeys(commands) if cmd]
 
 def test_single_command_in_code_block():
     ai_response = """
@@ -160,34 +190,31 @@ cp file.txt /path/to/folder/
     assert commands == ["cp file.txt /path/to/folder/"]
 
 def test_command_with_actual_test_dir():
+    expected = f"touch {TEST_DIR}/file.txt"
     ai_response = f"""
 ```bash
-touch {TEST_DIR}/file.txt
+{expected}
 ```
 """
     commands = extract_commands(ai_response)
-    assert commands == [f"touch {TEST_DIR}/file.txt"]
+    assert commands == [expected]
+
+def run_cli(argv, stdin=""):
+    """Run the CLI in this process with the given arguments and stdin; return (stdout, stderr)."""
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with unittest.mock.patch.object(sys, "argv", ["ai", *argv]), \
+            unittest.mock.patch.object(sys, "stdin", io.StringIO(stdin)), \
+            contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            cli_main()
+        except SystemExit:
+            pass
+    return stdout.getvalue(), stderr.getvalue()
 
 def run_cli_query(query, auto_yes=False):
     """Run the CLI with a direct query and return stdout + stderr."""
-    cli_args = [sys.executable, '-m', 'terminalai.terminalai_cli']
-    if auto_yes:
-        cli_args.append('-y')
-    cli_args.append(query)
-    
-    # Prepare environment for the subprocess, especially for UTF-8 output
-    subproc_env = os.environ.copy()
-    subproc_env["PYTHONIOENCODING"] = "UTF-8"
-    
-    result = subprocess.run(
-        cli_args, 
-        capture_output=True, 
-        text=True, 
-        check=False, 
-        env=subproc_env,
-        encoding='utf-8' # Be explicit about encoding for text=True
-    )
-    return result.stdout + result.stderr
+    stdout, stderr = run_cli((["-y"] if auto_yes else []) + [query])
+    return stdout + stderr
 
 def test_cli_direct_query():
     query = "How do I list files in the current directory?"
@@ -207,29 +234,9 @@ def test_cli_direct_query():
 
 # Interactive mode test (simulate user input)
 def test_cli_interactive_mode():
-    # Prepare environment for the subprocess
-    subproc_env = os.environ.copy()
-    subproc_env["PYTHONIOENCODING"] = "UTF-8"
-    # subproc_env["TERM"] = "xterm-256color" # Can be useful for Rich
-
-    process = subprocess.Popen(
-        [sys.executable, '-m', 'terminalai.terminalai_cli'],
-        stdin=subprocess.PIPE, 
-        stdout=subprocess.PIPE, 
-        stderr=subprocess.PIPE, 
-        text=True, # Python 3.7+ text mode implies UTF-8 by default usually, but PYTHONIOENCODING makes it certain
-        env=subproc_env,
-        encoding='utf-8' # Be explicit for pipes
-    )
-    
+    # stdin is not a terminal, so the CLI reads the question as piped input
     input_sequence = "How do I list files in the current directory?\nexit\n"
-    
-    try:
-        stdout, stderr = process.communicate(input=input_sequence, timeout=20) # Increased timeout
-    except subprocess.TimeoutExpired:
-        process.kill()
-        stdout, stderr = process.communicate()
-        pytest.fail("CLI interactive mode test timed out")
+    stdout, stderr = run_cli([], stdin=input_sequence)
 
     output = stdout + stderr
     # Check that no UnicodeEncodeError occurred
@@ -435,3 +442,232 @@ def test_offline_extraction_case(ai_response, expected):
     assert commands == expected
 
 # Add more tests as needed to cover edge cases, e.g. code blocks with explanations, mixed factual and command responses, etc.
+
+@pytest.mark.parametrize("size, expected", [
+    (0, "Unknown size"), (None, "Unknown size"), (512, "512 B"), (1023, "1023 B"),
+    (1024, "1.0 KB"), (5 * 1024**2, "5.0 MB"), (int(4.7 * 1024**3), "4.7 GB"), (3 * 1024**4, "3.0 TB"),
+])
+def test_format_size(size, expected):
+    from terminalai.formatting import format_size
+    assert format_size(size) == expected
+
+@pytest.mark.parametrize("line, expected", [
+    ("python3 manage.py runserver", True),
+    ("cat notes.txt | grep todo", True),
+    ("the cat sat > mat", True),
+    ("This command will list files.", False),
+    ("random words here", False),
+])
+def test_is_likely_command_known_commands(line, expected):
+    from terminalai.command_extraction import is_likely_command
+    assert is_likely_command(line) == expected
+
+def test_parse_response_segments_are_shared():
+    from terminalai.command_extraction import parse_response, extract_commands_from_output as extract_from_output
+    ai_response = "Run this:\n```bash\n# list files\nls -la\nls -la\n```\nThen\n```\nhello world\n```\ncd /tmp\n"
+    segments = parse_response(ai_response)
+    assert segments == [
+        ('text', "Run this:\n"), ('code', "# list files"), ('cmd', "ls -la"), ('cmd', "ls -la"),
+        ('text', "\nThen\n"), ('block', "hello world"), ('text', "\ncd /tmp\n"),
+    ]
+    assert extract_commands(ai_response, segments=segments) == ["ls -la"]
+    assert extract_from_output(ai_response, segments=segments) == ["ls -la", "cd /tmp"]
+
+@pytest.mark.parametrize("cmd, expected", [
+    ("sudo apt update", True), ("RM -rf build", True), ("/usr/bin/chmod +x run.sh", True),
+    ("ls -la", False), ("echo rm", False), ("", False),
+])
+def test_is_risky_command_checks_first_word(cmd, expected):
+    assert is_risky_command(cmd) == expected
+
+@pytest.mark.parametrize("cmd", ["cd /tmp", "sudo rm -rf /tmp/x", "ls -la", "Export FOO=1", "  ", ""])
+def test_classify_command_matches_individual_checks(cmd):
+    from terminalai.command_extraction import classify_command
+    assert classify_command(cmd) == (is_stateful_command(cmd), is_risky_command(cmd))
+
+def test_unclosed_fence_is_parsed_in_linear_time():
+    import time
+    from terminalai.command_extraction import parse_response
+    start = time.monotonic()
+    assert extract_commands("```" + "a" * 50000) == []
+    assert parse_response("```bash ls -l```") == [('text', ''), ('cmd', "ls -l"), ('text', '')]
+    # The previous pattern needed tens of seconds for this input
+    assert time.monotonic() - start < 1
+
+@pytest.mark.parametrize("answer, default, expected", [
+    ("y", False, True), ("Yes", False, True), (" n ", True, False), ("", True, True), ("", False, False),
+])
+def test_confirm_reads_first_character(monkeypatch, answer, default, expected):
+    from terminalai.cli_interaction import _confirm
+    monkeypatch.setattr("terminalai.cli_interaction._read_key", lambda: None)
+    monkeypatch.setattr("builtins.input", lambda: answer)
+    assert _confirm(default=default) is expected
+
+@pytest.mark.parametrize("key, default, expected", [
+    ("y", False, True), ("Y", False, True), ("n", True, False), ("x", True, False),
+    ("\r", True, True), ("\n", False, False), ("", True, False), ("\x04", True, False),
+])
+def test_confirm_answers_on_a_single_keypress(monkeypatch, key, default, expected):
+    from terminalai.cli_interaction import _confirm
+    monkeypatch.setattr("terminalai.cli_interaction._read_key", lambda: key)
+    monkeypatch.setattr("builtins.input", lambda: pytest.fail("should not wait for a line"))
+    assert _confirm(default=default) is expected
+
+def test_confirm_reads_a_line_for_deliberate_answers(monkeypatch):
+    from terminalai.cli_interaction import _confirm
+    monkeypatch.setattr("terminalai.cli_interaction._read_key", lambda: pytest.fail("should read a line"))
+    monkeypatch.setattr("builtins.input", lambda: "y")
+    assert _confirm(default=False, single_key=False) is True
+
+def test_confirm_treats_end_of_input_as_no(monkeypatch):
+    from terminalai.cli_interaction import _confirm
+    monkeypatch.setattr("terminalai.cli_interaction._read_key", lambda: None)
+    def closed_stdin():
+        raise EOFError
+    monkeypatch.setattr("builtins.input", closed_stdin)
+    assert _confirm(default=True) is False
+
+def test_parse_args_fills_long_option_defaults(monkeypatch):
+    from terminalai.cli_interaction import parse_args
+    monkeypatch.setattr(sys, "argv", ["ai", "list files"])
+    plain = vars(parse_args())
+    monkeypatch.setattr(sys, "argv", ["ai", "--provider", "ollama", "list files"])
+    full = vars(parse_args())
+    assert plain.keys() == full.keys()
+    assert full == dict(plain, provider="ollama")
+
+def test_fast_parse_args_matches_full_parser(monkeypatch):
+    import terminalai.cli_interaction as cli_interaction
+    for argv in (["list files"], ["-y", "-v", "show disk usage", "extra"], ["--long"], ["--version"], [], ["--eval-mode", "pwd"]):
+        monkeypatch.setattr(sys, "argv", ["ai", *argv])
+        fast = cli_interaction.parse_args()
+        with monkeypatch.context() as m:
+            m.setattr(cli_interaction, "_fast_parse_args", lambda argv: None)
+            assert vars(fast) == vars(cli_interaction.parse_args())
+    assert cli_interaction.parse_args().eval_mode is True
+    assert cli_interaction._fast_parse_args(["--version"]).version is True
+    assert cli_interaction._fast_parse_args(["-yv", "pwd"]) is None
+    assert cli_interaction._fast_parse_args(["--provider", "ollama"]) is None
+
+def test_risk_provider_is_only_loaded_for_risky_commands(monkeypatch):
+    import terminalai.cli_interaction as cli_interaction
+    loads = []
+    monkeypatch.setattr(cli_interaction, "load_config", lambda: loads.append(1) or {"default_provider": ""})
+    monkeypatch.setattr(cli_interaction, "run_command", lambda *args, **kwargs: None)
+    cli_interaction.handle_commands(["ls -la", "pwd"], auto_confirm=True)
+    assert not loads
+    from rich.console import Console
+    message = cli_interaction._get_ai_risk_assessment("rm -rf /tmp/x", Console())
+    assert loads and "requires a configured AI provider" in message
+
+@pytest.mark.parametrize("command, expected", [
+    ("ls -la", False), ("git log --oneline", False), ("ls | wc -l", True), ("make && make install", True),
+    ("echo $HOME", True), ("ls *.py", True), ("echo {a,b}", True), ("sleep 5 &", True),
+    ("grep 'a|b' notes.txt", False), ("echo 'cost: $5'", False), ('echo "$HOME"', True), (r"cat file\[1\].txt", False),
+    ("ls ~/Downloads", True), ("git show HEAD~1", False), ("FOO=1 make", True), ("echo $(date)", True),
+])
+def test_shell_operator_detection(command, expected):
+    from terminalai.cli_interaction import _needs_shell
+    assert _needs_shell(command) is expected
+
+def test_risk_assessments_only_wait_out_the_remaining_interval(monkeypatch):
+    import terminalai.cli_interaction as cli_interaction
+    class Provider:
+        def generate_response(self, query, **kwargs):
+            return "risky"
+    clock, sleeps = [100.0], []
+    monkeypatch.setattr(cli_interaction, "_risk_provider", lambda console: Provider())
+    monkeypatch.setattr(cli_interaction, "_last_risk_assessment", 0.0)
+    monkeypatch.setattr(cli_interaction.time, "monotonic", lambda: clock[0])
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+    monkeypatch.setattr(cli_interaction.time, "sleep", sleep)
+    assert cli_interaction._get_ai_risk_assessment("rm -rf /tmp/x", None) == "risky"
+    assert sleeps == []
+    clock[0] += 1.0
+    cli_interaction._get_ai_risk_assessment("rm -rf /tmp/y", None)
+    clock[0] += 5.0
+    cli_interaction._get_ai_risk_assessment("rm -rf /tmp/z", None)
+    assert sleeps == [0.5]
+
+def test_risk_assessments_for_run_all_are_fetched_together(monkeypatch):
+    import terminalai.cli_interaction as cli_interaction
+    started = []
+    class Provider:
+        def generate_response(self, query, **kwargs):
+            started.append(threading.get_ident())
+            assert "directory is '/work'" in query
+            return query.splitlines()[-2]
+    monkeypatch.setattr(cli_interaction, "_risk_provider", lambda console: Provider())
+    monkeypatch.setattr(cli_interaction, "_reserve_risk_assessment_slot", lambda: 0)
+    commands = ["rm -rf /tmp/a", "rm -rf /tmp/b", "sudo reboot"]
+    monkeypatch.setattr(cli_interaction.os, "getcwd", lambda: pytest.fail("cwd was passed in"))
+    assert cli_interaction._get_ai_risk_assessments(commands, None, "/work") == {cmd: cmd for cmd in commands}
+    assert threading.get_ident() not in started
+    assert cli_interaction._get_ai_risk_assessments([], None) == {}
+
+def test_batch_status_names_the_provider(monkeypatch):
+    from rich.console import Console
+    import terminalai.ai_providers as ai_providers
+    from terminalai.cli_interaction import _show_batch_status
+    class Provider:
+        def get_batch(self, batch_id):
+            return {"status": "[RUNNING]"}
+    monkeypatch.setattr(ai_providers, "load_batches", lambda: {
+        "job-1": {"provider": "mistral", "prompts": 2, "submitted_at": "2024-01-01T00:00:00"}
+    })
+    monkeypatch.setattr(ai_providers, "get_provider", lambda name: Provider())
+    console = Console(file=io.StringIO(), width=200)
+    assert _show_batch_status(console)
+    assert console.file.getvalue().strip() == "job-1 [mistral] 2 prompts, submitted 2024-01-01T00:00:00: [RUNNING]"
+
+def test_risk_assessments_without_provider_load_it_once(monkeypatch):
+    import terminalai.cli_interaction as cli_interaction
+    lookups = []
+    monkeypatch.setattr(cli_interaction, "_risk_provider", lambda console: lookups.append(console))
+    commands = ["rm -rf /tmp/a", "sudo reboot"]
+    assert cli_interaction._get_ai_risk_assessments(commands, None) == {
+        cmd: "Risk assessment requires a configured AI provider." for cmd in commands
+    }
+    assert len(lookups) == 1
+
+def test_run_keeping_tail_bounds_output():
+    from terminalai.cli_interaction import _run_keeping_tail
+    script = "import sys\nfor i in range(25): print(i)\nprint('oops', file=sys.stderr)\nsys.exit(3)"
+    process, stdout_tail, stderr_tail, dropped = _run_keeping_tail([sys.executable, "-c", script], max_lines=10)
+    assert process.returncode == 3
+    assert list(stdout_tail) == [f"{i}\n" for i in range(15, 25)] and dropped == 15
+    assert list(stderr_tail) == ["oops\n"]
+
+def test_console_is_shared_and_follows_stdout(monkeypatch):
+    import terminalai.cli_interaction as cli_interaction
+    monkeypatch.setattr(cli_interaction, "_console", None)
+    console = cli_interaction._get_console()
+    assert cli_interaction._get_console() is console
+    buffer = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", buffer)
+    console.print("hello")
+    assert buffer.getvalue() == "hello\n"
+
+@pytest.mark.parametrize("is_stateful, is_risky, auto_confirm, ask, answer, expected", [
+    (True, False, True, True, "y", ["copied"]),
+    (False, False, True, True, None, ["ran"]),
+    (False, False, False, False, None, ["ran"]),
+    (False, False, False, True, "", ["ran"]),
+    (False, True, True, False, "", []),
+    (False, True, False, True, "y", ["ran"]),
+])
+def test_confirm_and_run_follows_classification(monkeypatch, is_stateful, is_risky, auto_confirm, ask, answer, expected):
+    import terminalai.cli_interaction as cli_interaction
+    from rich.console import Console
+    actions = []
+    def no_prompt():
+        raise AssertionError("should not prompt")
+    monkeypatch.setattr("builtins.input", no_prompt if answer is None else (lambda: answer))
+    monkeypatch.setattr(cli_interaction, "_read_key", lambda: None)
+    monkeypatch.setattr(cli_interaction, "copy_to_clipboard", lambda cmd: actions.append("copied"))
+    monkeypatch.setattr(cli_interaction, "run_command", lambda cmd, auto_confirm=False: actions.append("ran"))
+    cli_interaction._confirm_and_run("cmd", Console(file=io.StringIO()), is_stateful, is_risky,
+                                     auto_confirm=auto_confirm, ask=ask)
+    assert actions == expected
@@ -0,0 +1,43 @@
+"""
+Tests for command classification and the dangerous-command filter.
+"""
+import sys
+import pytest
+from terminalai.command_utils import (
+    sanitize_command, run_shell_command, is_informational_command, is_shell_command
+)
+
+@pytest.mark.parametrize("command", [
+    "rm -rf /", "rm -rf ../", "sudo rm -rf /*", "ls; rm -rf /", "ls $(rm -rf /)", "ls `rm -rf /`",
+    "chmod 777 file.txt", "chown root file.txt", "sudo passwd root", "userdel user",
+    "dd if=file of=/dev/sda", "mkfs.ext4 /dev/sda1", "iptables -F", "kill -9 1",
+    "echo test > /proc/sys/kernel/panic", ":(){ :|:& };:",
+])
+def test_sanitize_command_rejects_dangerous(command):
+    assert sanitize_command(command) == ""
+
+@pytest.mark.parametrize("command", [
+    "ls -la", "cat /etc/passwd", "rm -rf build/", "kill -9 1234", "git log --format=%H", "chmod 755 run.sh",
+])
+def test_sanitize_command_keeps_safe(command):
+    assert sanitize_command(f"  {command} ") == command
+
+def test_run_shell_command_refuses_dangerous():
+    assert run_shell_command("rm -rf /") is False
+    assert run_shell_command("") is False
+    assert run_shell_command(None) is False
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell syntax")
+def test_run_shell_command_streams_merged_output(capsys):
+    assert run_shell_command("echo out; echo err 1>&2") is True
+    assert capsys.readouterr().out == "out\nerr\n"
+    assert run_shell_command("ls /nonexistent-terminalai-dir") is False
+
+def test_classifiers():
+    assert is_shell_command("ls -la")
+    assert not is_shell_command("just text")
+    assert is_shell_command("$( git rev-parse HEAD )")
+    assert not is_shell_command("   ")
+    assert is_informational_command("git status")
+    assert is_informational_command("cat notes.txt | grep todo")
+    assert not is_informational_command("rm notes.txt")
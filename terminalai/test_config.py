@@ -0,0 +1,69 @@
+"""
+Tests for loading and saving the config file.
+"""
+import asyncio
+import pytest
+import terminalai.config as config
+
+def use_tmp_config(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    monkeypatch.setattr(config, "CONFIG_PATH", str(path))
+    monkeypatch.setattr(config, "_CONFIG_CACHE", None)
+    return path
+
+def test_load_config_creates_defaults(tmp_path, monkeypatch):
+    path = use_tmp_config(tmp_path, monkeypatch)
+    assert config.load_config()["default_provider"] == "openrouter"
+    assert path.exists()
+
+def test_load_config_parses_once(tmp_path, monkeypatch):
+    use_tmp_config(tmp_path, monkeypatch)
+    config.load_config()
+    calls = []
+    real_loads = config.json_loads
+    monkeypatch.setattr(config, "json_loads", lambda data: calls.append(data) or real_loads(data))
+    first = config.load_config()
+    first["default_provider"] = "changed"
+    assert config.load_config()["default_provider"] == "openrouter"
+    assert calls == []
+
+def test_save_config_invalidates_cache(tmp_path, monkeypatch):
+    use_tmp_config(tmp_path, monkeypatch)
+    config.set_system_prompt("Be brief.")
+    assert config.get_system_prompt() == "Be brief."
+    config.reset_system_prompt()
+    assert config.get_system_prompt() == config.DEFAULT_SYSTEM_PROMPT
+
+def test_json_helpers_round_trip():
+    data = {"providers": {"ollama": {"host": "http://localhost:11434"}}, "n": [1, 2]}
+    text = config.json_dumps(data)
+    assert '\n  "providers"' in text
+    assert config.json_loads(text) == data
+    assert config.json_loads(text.encode("utf-8")) == data
+
+def test_save_config_replaces_file_atomically(tmp_path, monkeypatch):
+    path = use_tmp_config(tmp_path, monkeypatch)
+    config.save_config({"default_provider": "ollama"}, durable=False)
+    assert config.load_config() == {"default_provider": "ollama"}
+    assert not (tmp_path / "config.json.tmp").exists()
+    assert path.stat().st_mode & 0o777 == 0o600
+
+def test_get_system_prompt_skips_copy_and_reset_skips_write(tmp_path, monkeypatch):
+    path = use_tmp_config(tmp_path, monkeypatch)
+    assert config.get_system_prompt() is config.DEFAULT_SYSTEM_PROMPT
+    monkeypatch.setattr(config.copy, "deepcopy", lambda obj: pytest.fail("config was copied"))
+    config.get_system_prompt()
+    mtime = path.stat().st_mtime_ns
+    config.reset_system_prompt()
+    assert path.stat().st_mtime_ns == mtime
+
+def test_async_config_round_trip(tmp_path, monkeypatch):
+    use_tmp_config(tmp_path, monkeypatch)
+
+    async def run():
+        cfg = await config.load_config_async()
+        cfg["default_provider"] = "ollama"
+        await config.save_config_async(cfg, durable=False)
+        return await config.load_config_async()
+
+    assert asyncio.run(run())["default_provider"] == "ollama"
@@ -13,6 +13,7 @@ def test_ollama_provider():
     
     from terminalai.ai_providers import OllamaProvider
     from terminalai.config import load_config
+    from terminalai.formatting import format_size
     
     # Get the configured host from config
     config = load_config()
@@ -38,17 +39,7 @@ def test_ollama_provider():
             model_modified = model.get('modified_at', 'Unknown')
             
             # Format size in human-readable format
-            if model_size > 0:
-                if model_size >= 1024**3:
-                    size_str = f"{model_size / (1024**3):.1f} GB"
-                elif model_size >= 1024**2:
-                    size_str = f"{model_size / (1024**2):.1f} MB"
-                elif model_size >= 1024:
-                    size_str = f"{model_size / 1024:.1f} KB"
-                else:
-                    size_str = f"{model_size} B"
-            else:
-                size_str = "Unknown size"
+            size_str = format_size(model_size)
             
             print(f"  {i}. {model_name}")
             print(f"     Size: {size_str}")